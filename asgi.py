@@ -0,0 +1,4 @@
+from food_planner import app as flask_app
+from food_planner_app.asgi import create_asgi_app
+
+app = create_asgi_app(flask_app)
@@ -0,0 +1,122 @@
+"""
+Async read path benchmark: concurrent connections against the sync and the async app.
+
+Both apps are driven in-process against the same SQLite file, so only request handling is measured:
+the sync app with a pool of worker threads (like a threaded WSGI server), the async app with one
+event loop (like an ASGI server). Every client keeps one request in flight at a time.
+
+    python -m benchmarks.async_reads --duration 5 --clients 1 16 64 --workers 4
+    python -m benchmarks.async_reads --database instance/food_planner.db
+"""
+import argparse
+import asyncio
+import logging
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from werkzeug.test import EnvironBuilder, run_wsgi_app
+
+from config import Config
+from food_planner_app import create_app, db
+from food_planner_app.asgi import create_asgi_app
+from food_planner_app.commands.importing import import_file
+
+SAMPLES_DIR = Path(__file__).resolve().parent.parent / 'food_planner_app' / 'samples'
+PATHS = [
+    ('/api/v1/recipes', 'limit=20'),
+    ('/api/v1/recipes/1', ''),
+    ('/api/v1/ingredients', 'sort=-calories&limit=20'),
+    ('/api/v1/recipes/random', 'days=7'),
+]
+
+
+def make_app(database: Path):
+    class BenchmarkConfig(Config):
+        SECRET_KEY = 'benchmark'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        if not database.exists() or database.stat().st_size == 0:
+            db.create_all()
+            import_file(db.session, SAMPLES_DIR / 'ingredients.json')
+            import_file(db.session, SAMPLES_DIR / 'recipes.json')
+    return app
+
+
+def run_sync(app, clients: int, workers: int, duration: float) -> int:
+    completed = [0] * clients
+    deadline = time.perf_counter() + duration
+
+    def handle(path: str, query: str) -> None:
+        app_iter, status, _ = run_wsgi_app(app, EnvironBuilder(path=path, query_string=query).get_environ())
+        b''.join(app_iter)
+
+    def client(index: int, pool: ThreadPoolExecutor) -> None:
+        while time.perf_counter() < deadline:
+            pool.submit(handle, *PATHS[completed[index] % len(PATHS)]).result()
+            completed[index] += 1
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        threads = [threading.Thread(target=client, args=(index, pool)) for index in range(clients)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+    return sum(completed)
+
+
+async def _asgi_get(asgi_app, path: str, query: str) -> None:
+    scope = {
+        'type': 'http', 'http_version': '1.1', 'method': 'GET', 'path': path, 'root_path': '',
+        'query_string': query.encode(), 'headers': [], 'server': ('localhost', 80),
+    }
+
+    async def receive():
+        return {'type': 'http.request', 'body': b'', 'more_body': False}
+
+    async def send(message):
+        pass
+
+    await asgi_app(scope, receive, send)
+
+
+async def run_async(app, clients: int, duration: float) -> int:
+    asgi_app = create_asgi_app(app)
+    deadline = time.perf_counter() + duration
+
+    async def client() -> int:
+        completed = 0
+        while time.perf_counter() < deadline:
+            await _asgi_get(asgi_app, *PATHS[completed % len(PATHS)])
+            completed += 1
+        return completed
+
+    try:
+        return sum(await asyncio.gather(*[client() for _ in range(clients)]))
+    finally:
+        await asgi_app.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=5)
+    parser.add_argument('--clients', type=int, nargs='+', default=[1, 16, 64])
+    parser.add_argument('--workers', type=int, default=4, help='worker threads of the sync app')
+    parser.add_argument('--database', type=Path, help='SQLite file to read from, samples are loaded into a temporary one by default')
+    args = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    app = make_app(args.database or Path(tempfile.mkdtemp()) / 'bench.db')
+    print(f"{'clients':>8} {'sync req/s':>12} {'async req/s':>12}")
+    for clients in args.clients:
+        sync_rps = run_sync(app, clients, args.workers, args.duration) / args.duration
+        async_rps = asyncio.run(run_async(app, clients, args.duration)) / args.duration
+        print(f'{clients:>8} {sync_rps:>12.1f} {async_rps:>12.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Synthetic catalogs for benchmarks, generated once per size with `flask db-manage generate`'s generator
+and kept as SQLite files in benchmarks/data/.
+"""
+import re
+import shutil
+import tempfile
+from pathlib import Path
+
+from config import SqliteConfig
+from food_planner_app import create_app, db
+from food_planner_app.commands.generating import generate_catalog
+
+DATA_DIR = Path(__file__).resolve().parent / 'data'
+SIZE_RE = re.compile(r'(\d+)([km]?)', re.IGNORECASE)
+SIZE_UNITS = {'': 1, 'k': 1000, 'm': 1000000}
+
+
+def parse_size(size: str) -> int:
+    """'1k' -> 1000, '1m' -> 1000000."""
+    match = SIZE_RE.fullmatch(size.strip())
+    if match is None:
+        raise ValueError(f'Invalid dataset size: {size}')
+    return int(match.group(1)) * SIZE_UNITS[match.group(2).lower()]
+
+
+def benchmark_config(database: Path):
+    class BenchmarkConfig(SqliteConfig):
+        SECRET_KEY = 'benchmark'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+    return BenchmarkConfig
+
+
+def _generate(database: Path, recipes: int, seed: int) -> None:
+    app = create_app(benchmark_config(database))
+    with app.app_context():
+        db.create_all()
+        generate_catalog(db.session, max(50, recipes // 200), recipes, seed=seed)
+        db.session.remove()
+        db.engine.dispose()
+
+
+def ensure_dataset(size: str, seed: int = 0) -> Path:
+    """Returns the catalog file of the given size, generating it on first use."""
+    recipes = parse_size(size)
+    database = DATA_DIR / f'catalog-{recipes}-{seed}.db'
+    if not database.exists():
+        DATA_DIR.mkdir(exist_ok=True)
+        partial = database.with_suffix('.partial')
+        partial.unlink(missing_ok=True)
+        _generate(partial, recipes, seed)
+        partial.rename(database)
+    return database
+
+
+def working_copy(database: Path) -> Path:
+    """Copy of a catalog which benchmarks may write to without spoiling the cached one."""
+    copy = Path(tempfile.mkdtemp()) / database.name
+    shutil.copy(database, copy)
+    return copy
@@ -0,0 +1,284 @@
+"""
+Endpoint benchmark suite: every route of the ingredients, recipes and auth blueprints against synthetic catalogs.
+
+For each dataset size and route it reports req/s, p50/p95/p99 latency and SQL statements per request,
+measured in-process with the Flask test client. Results are saved as JSON. Given a baseline file,
+routes whose p50 or req/s got worse by more than --threshold, or which issue more statements, are
+listed as regressions and the run exits with status 1.
+
+    python -m benchmarks.endpoints --sizes 1k 100k 1m --requests 200 --output results.json
+    python -m benchmarks.endpoints --sizes 1k --baseline results.json --threshold 0.2
+"""
+import argparse
+import json
+import logging
+import platform
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+from sqlalchemy import func, select
+
+from benchmarks.datasets import benchmark_config, ensure_dataset, parse_size, working_copy
+from food_planner_app import create_app, db
+from food_planner_app.commands.generating import DISHES, STYLES
+from food_planner_app.models import Ingredient, Recipe
+from food_planner_app.query_counter import QueryCounter
+
+BLUEPRINTS = ('ingredients', 'recipes', 'auth')
+PASSWORDS = ('bench-password-1', 'bench-password-2')
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+@dataclass
+class Context:
+    client: object
+    rng: random.Random
+    recipes: int
+    ingredients: list
+    token: str = ''
+    password: str = PASSWORDS[0]
+    counter: int = 0
+    state: dict = field(default_factory=dict)
+
+    @property
+    def headers(self) -> dict:
+        return {'Authorization': f'Bearer {self.token}'}
+
+    def unique(self, prefix: str) -> str:
+        self.counter += 1
+        return f'{prefix} {self.counter}'
+
+    def recipe_id(self) -> int:
+        return self.rng.randint(1, self.recipes)
+
+    def recipe_payload(self) -> dict:
+        return {
+            'name': self.unique('bench recipe'),
+            'instructions': 'Mix everything.',
+            'servings': 2,
+            'ingredients': [{'name': name, 'amount': 100} for name in self.rng.sample(self.ingredients, 3)],
+        }
+
+    def create(self, url: str, payload: dict) -> int:
+        return self.client.post(url, json=payload, headers=self.headers).get_json()['data']['id']
+
+
+def _update_password(ctx: Context) -> dict:
+    new_password = PASSWORDS[1] if ctx.password == PASSWORDS[0] else PASSWORDS[0]
+    payload = {'current_password': ctx.password, 'new_password': new_password}
+    ctx.password = new_password
+    return {'method': 'PUT', 'path': '/api/v1/auth/update/password/', 'json': payload, 'headers': ctx.headers}
+
+
+# endpoint -> builds the next request, any setup it does through ctx.client is not measured
+SCENARIOS = {
+    'ingredients.get_ingredients': lambda ctx: {
+        'path': '/api/v1/ingredients', 'query_string': {'sort': '-calories', 'limit': 20, 'page': ctx.rng.randint(1, 3)},
+    },
+    'ingredients.export_ingredients': lambda ctx: {
+        'path': '/api/v1/ingredients/export', 'query_string': {'calories[gte]': 500},
+    },
+    'ingredients.get_ingredient': lambda ctx: {
+        'path': f'/api/v1/ingredients/{ctx.rng.randint(1, len(ctx.ingredients))}',
+    },
+    'ingredients.create_ingredient': lambda ctx: {
+        'method': 'POST', 'path': '/api/v1/ingredients', 'headers': ctx.headers,
+        'json': {'name': ctx.unique('bench ingredient'), 'calories': 100, 'unit': 'g'},
+    },
+    'ingredients.update_ingredient': lambda ctx: {
+        'method': 'PUT', 'path': f'/api/v1/ingredients/{ctx.rng.randint(1, len(ctx.ingredients))}',
+        'headers': ctx.headers, 'json': {'unit': ctx.rng.choice(('g', 'ml', 'pcs'))},
+    },
+    'ingredients.delete_ingredient': lambda ctx: {
+        'method': 'DELETE', 'headers': ctx.headers, 'path': '/api/v1/ingredients/{}'.format(
+            ctx.create('/api/v1/ingredients', {'name': ctx.unique('bench ingredient'), 'calories': 1, 'unit': 'g'})
+        ),
+    },
+    'recipes.get_recipes': lambda ctx: {
+        'path': '/api/v1/recipes', 'query_string': {'limit': 20, 'page': ctx.rng.randint(1, 50)},
+    },
+    'recipes.export_recipes': lambda ctx: {
+        'path': '/api/v1/recipes/export', 'query_string': {'id[lte]': 1000},
+    },
+    'recipes.search_recipes': lambda ctx: {
+        'path': '/api/v1/recipes/search', 'query_string': {'q': f'{ctx.rng.choice(STYLES)} {ctx.rng.choice(DISHES)}'},
+    },
+    'recipes.recipes_by_ingredients': lambda ctx: {
+        'path': '/api/v1/recipes/by-ingredients',
+        'query_string': {'have': ','.join(ctx.rng.sample(ctx.ingredients, 8)), 'missing': 1},
+    },
+    'recipes.get_recipe': lambda ctx: {'path': f'/api/v1/recipes/{ctx.recipe_id()}'},
+    'recipes.random_recipes': lambda ctx: {'path': '/api/v1/recipes/random', 'query_string': {'days': 7}},
+    'recipes.create_recipe': lambda ctx: {
+        'method': 'POST', 'path': '/api/v1/recipes', 'headers': ctx.headers, 'json': ctx.recipe_payload(),
+    },
+    'recipes.create_recipes_bulk': lambda ctx: {
+        'method': 'POST', 'path': '/api/v1/recipes/bulk', 'headers': ctx.headers,
+        'json': [ctx.recipe_payload() for _ in range(10)],
+    },
+    'recipes.update_recipe': lambda ctx: {
+        'method': 'PUT', 'path': f'/api/v1/recipes/{ctx.recipe_id()}', 'headers': ctx.headers,
+        'json': {'servings': ctx.rng.randint(1, 6)},
+    },
+    'recipes.delete_recipe': lambda ctx: {
+        'method': 'DELETE', 'headers': ctx.headers,
+        'path': '/api/v1/recipes/{}'.format(ctx.create('/api/v1/recipes', ctx.recipe_payload())),
+    },
+    'auth.register': lambda ctx: {
+        'method': 'POST', 'path': '/api/v1/auth/register', 'json': {
+            'username': ctx.unique('bench user'), 'password': 'bench-password', 'email': f'user{ctx.counter}@example.com',
+        },
+    },
+    'auth.login': lambda ctx: {
+        'method': 'POST', 'path': '/api/v1/auth/login', 'json': {'username': 'bench', 'password': ctx.password},
+    },
+    'auth.get_current_user': lambda ctx: {'path': '/api/v1/auth/me', 'headers': ctx.headers},
+    'auth.update_user_password': _update_password,
+    'auth.update_user_data': lambda ctx: {
+        'method': 'PATCH', 'path': '/api/v1/auth/update/data/', 'headers': ctx.headers,
+        'json': {'email': f'bench{ctx.rng.randint(1, 10 ** 9)}@example.com'},
+    },
+}
+
+
+def benchmark_endpoint(ctx: Context, endpoint: str, requests: int, warmup: int, queries: QueryCounter) -> dict:
+    scenario = SCENARIOS[endpoint]
+    latencies, statement_counts, errors = [], [], 0
+
+    for index in range(warmup + requests):
+        kwargs = scenario(ctx)
+        kwargs.setdefault('method', 'GET')
+        queries.clear()
+
+        started = time.perf_counter()
+        response = ctx.client.open(**kwargs)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+
+        if index < warmup:
+            continue
+        latencies.append(elapsed)
+        statement_counts.append(len(queries))
+        errors += response.status_code >= 400
+
+    total = sum(latencies)
+    return {
+        'requests': requests,
+        'errors': errors,
+        'rps': requests / total if total else 0.0,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'queries': sum(statement_counts) / len(statement_counts) if statement_counts else 0.0,
+    }
+
+
+def run_size(size: str, args) -> dict:
+    database = working_copy(ensure_dataset(size, args.seed))
+    app = create_app(benchmark_config(database))
+
+    endpoints = sorted(
+        rule.endpoint for rule in app.url_map.iter_rules() if rule.endpoint.split('.')[0] in BLUEPRINTS
+    )
+    missing = [endpoint for endpoint in endpoints if endpoint not in SCENARIOS]
+    if missing:
+        raise SystemExit(f"No benchmark scenario for: {', '.join(missing)}")
+    if args.endpoints:
+        endpoints = [endpoint for endpoint in endpoints if any(pattern in endpoint for pattern in args.endpoints)]
+
+    with app.app_context():
+        engine = db.engine
+        recipes = db.session.execute(select(func.max(Recipe.id))).scalar()
+        ingredients = db.session.execute(select(Ingredient.name).order_by(Ingredient.id)).scalars().all()
+
+    client = app.test_client()
+    ctx = Context(client, random.Random(args.seed), recipes, ingredients)
+    user = {'username': 'bench', 'password': ctx.password, 'email': 'bench@example.com'}
+    ctx.token = client.post('/api/v1/auth/register', json=user).get_json()['token']
+
+    results = {}
+    with QueryCounter(engine, capture_call_sites=False) as queries:
+        for endpoint in endpoints:
+            results[endpoint] = benchmark_endpoint(ctx, endpoint, args.requests, args.warmup, queries)
+            print_row(size, endpoint, results[endpoint])
+
+    with app.app_context():
+        db.engine.dispose()
+    database.unlink()
+    return results
+
+
+def print_row(size: str, endpoint: str, result: dict) -> None:
+    print(
+        f"{size:>5} {endpoint:<34} {result['rps']:>9.1f} {result['p50_ms']:>8.2f} {result['p95_ms']:>8.2f} "
+        f"{result['p99_ms']:>8.2f} {result['queries']:>8.1f} {result['errors']:>6}",
+        flush=True
+    )
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Lists (size, endpoint, reason) of routes which got slower than the baseline by more than `threshold`."""
+    regressions = []
+    for size, endpoints in results.items():
+        for endpoint, result in endpoints.items():
+            base = baseline.get(size, {}).get(endpoint)
+            if base is None:
+                continue
+            if result['p50_ms'] > base['p50_ms'] * (1 + threshold):
+                regressions.append((size, endpoint, f"p50 {base['p50_ms']:.2f} -> {result['p50_ms']:.2f} ms"))
+            if result['rps'] < base['rps'] * (1 - threshold):
+                regressions.append((size, endpoint, f"req/s {base['rps']:.1f} -> {result['rps']:.1f}"))
+            if result['queries'] > base['queries']:
+                regressions.append((size, endpoint, f"queries {base['queries']:.1f} -> {result['queries']:.1f}"))
+    return regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', nargs='+', default=['1k'], help='catalog sizes in recipes, e.g. 1k 100k 1m')
+    parser.add_argument('--requests', type=int, default=100, help='measured requests per route')
+    parser.add_argument('--warmup', type=int, default=5, help='unmeasured requests per route')
+    parser.add_argument('--endpoints', nargs='*', help='only routes whose endpoint contains one of these')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, help='save results as JSON')
+    parser.add_argument('--baseline', type=Path, help='JSON results of an earlier run to compare with')
+    parser.add_argument('--threshold', type=float, default=0.2, help='tolerated relative slowdown')
+    args = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+    logging.getLogger('food_planner_app').setLevel(logging.CRITICAL)
+    for size in args.sizes:
+        parse_size(size)
+
+    print(f"{'size':>5} {'endpoint':<34} {'req/s':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8} {'errors':>6}")
+    results = {size: run_size(size, args) for size in args.sizes}
+
+    if args.output:
+        args.output.write_text(json.dumps({
+            'created': datetime.now(timezone.utc).isoformat(),
+            'python': platform.python_version(),
+            'requests': args.requests,
+            'seed': args.seed,
+            'results': results,
+        }, indent=2))
+
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text())['results'], args.threshold)
+        for size, endpoint, reason in regressions:
+            print(f'REGRESSION {size} {endpoint}: {reason}')
+        if regressions:
+            sys.exit(1)
+        print(f'No regressions above {args.threshold:.0%} against {args.baseline}')
+
+
+if __name__ == '__main__':
+    main()
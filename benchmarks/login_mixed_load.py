@@ -0,0 +1,118 @@
+"""
+Mixed load benchmark: login storms against read endpoints.
+
+Runs the app on a local threaded server backed by a temporary SQLite file, hammers
+/auth/login and /ingredients concurrently and reports latency percentiles of both,
+once with inline hashing (PASSWORD_HASH_WORKERS=0) and once per given pool size.
+
+    python -m benchmarks.login_mixed_load --duration 10 --login-clients 8 --read-clients 8 --workers 2 4
+"""
+import argparse
+import json
+import logging
+import statistics
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from werkzeug.serving import make_server
+
+from config import Config
+from food_planner_app import create_app, db
+from food_planner_app.commands.importing import import_file
+
+SAMPLES_DIR = Path(__file__).resolve().parent.parent / 'food_planner_app' / 'samples'
+USER = {'username': 'bench', 'password': 'bench-password', 'email': 'bench@example.com'}
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def request(url: str, payload: dict = None) -> None:
+    data = json.dumps(payload).encode() if payload is not None else None
+    req = urllib.request.Request(url, data=data, headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req) as response:
+            response.read()
+    except urllib.error.HTTPError as exc:
+        exc.read()
+
+
+def client_loop(url: str, payload, deadline: float, latencies: list) -> None:
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        request(url, payload)
+        latencies.append(time.perf_counter() - started)
+
+
+def run(workers: int, args) -> dict:
+    database = Path(tempfile.mkdtemp()) / 'bench.db'
+
+    class BenchmarkConfig(Config):
+        SECRET_KEY = 'benchmark'
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{database}'
+        PASSWORD_HASH_WORKERS = workers
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+        import_file(db.session, SAMPLES_DIR / 'ingredients.json')
+
+    server = make_server('127.0.0.1', 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_port}/api/v1'
+    request(f'{base_url}/auth/register', USER)
+
+    login_latencies, read_latencies = [], []
+    deadline = time.perf_counter() + args.duration
+    credentials = {'username': USER['username'], 'password': USER['password']}
+    threads = [
+        threading.Thread(target=client_loop, args=(f'{base_url}/auth/login', credentials, deadline, login_latencies))
+        for _ in range(args.login_clients)
+    ] + [
+        threading.Thread(target=client_loop, args=(f'{base_url}/ingredients', None, deadline, read_latencies))
+        for _ in range(args.read_clients)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    server.shutdown()
+
+    return {
+        'hash_workers': workers,
+        'login_rps': len(login_latencies) / args.duration,
+        'login_p50_ms': percentile(login_latencies, 0.50) * 1000,
+        'login_p99_ms': percentile(login_latencies, 0.99) * 1000,
+        'read_rps': len(read_latencies) / args.duration,
+        'read_p50_ms': percentile(read_latencies, 0.50) * 1000,
+        'read_p99_ms': percentile(read_latencies, 0.99) * 1000,
+        'read_mean_ms': statistics.fmean(read_latencies) * 1000 if read_latencies else 0.0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--duration', type=float, default=10)
+    parser.add_argument('--login-clients', type=int, default=8)
+    parser.add_argument('--read-clients', type=int, default=8)
+    parser.add_argument('--workers', type=int, nargs='+', default=[2])
+    args = parser.parse_args()
+    logging.getLogger('werkzeug').setLevel(logging.ERROR)
+
+    results = [run(workers, args) for workers in [0, *args.workers]]
+    columns = list(results[0])
+    print(' '.join(f'{column:>13}' for column in columns))
+    for result in results:
+        print(' '.join(f'{result[column]:>13.1f}' for column in columns))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""
+Serialization micro-benchmark: list page encoding before and after compiled serializers.
+
+Loads ingredients and recipes into an in-memory SQLite database and measures rows/sec of turning
+already fetched pages into a JSON response body, for the marshmallow / hand-built dicts with the
+stdlib encoder ("before") and the compiled serializers with the orjson provider ("after").
+
+    python -m benchmarks.serialization --sizes 5 100 1000
+"""
+import argparse
+import time
+from decimal import Decimal
+
+from flask.json.provider import DefaultJSONProvider
+from sqlalchemy import select
+
+from config import Config
+from food_planner_app import create_app, db
+from food_planner_app.models import Ingredient, IngredientSchema, Recipe
+from food_planner_app.recipes.recipes import RECIPE_FIELDS, _get_serializer
+from food_planner_app.serialization import OrjsonProvider, schema_serializer
+
+
+class BenchmarkConfig(Config):
+    SECRET_KEY = 'benchmark'
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+
+
+def populate(count: int) -> None:
+    db.session.add_all([
+        Ingredient(name=f'ingredient {i}', calories=Decimal(i % 900) + Decimal('0.25'), unit='g')
+        for i in range(count)
+    ])
+    db.session.add_all([
+        Recipe(name=f'recipe {i}', description='Benchmark recipe', servings=i % 4 + 1,
+               total_calories=Decimal(i) + Decimal('0.5'), calories_per_serving=Decimal(i % 700))
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def ingredients_before(items, provider):
+    return provider.dumps({'data': IngredientSchema(many=True).dump(items)})
+
+
+def ingredients_after(items, provider):
+    serialize = schema_serializer(IngredientSchema)
+    return provider.dumps({'data': [serialize(item) for item in items]})
+
+
+def recipes_before(items, provider):
+    data = [
+        {
+            'id': recipe.id,
+            'name': recipe.name,
+            'description': recipe.description,
+            'servings': recipe.servings,
+            'total_calories': float(recipe.total_calories),
+            'calories_per_serving': float(recipe.calories_per_serving),
+        }
+        for recipe in items
+    ]
+    return provider.dumps({'data': data})
+
+
+def recipes_after(items, provider):
+    serialize = _get_serializer(RECIPE_FIELDS)
+    return provider.dumps({'data': [serialize(recipe) for recipe in items]})
+
+
+def rows_per_second(func, items, provider, min_seconds: float) -> float:
+    rows = 0
+    started = time.perf_counter()
+    while (elapsed := time.perf_counter() - started) < min_seconds:
+        func(items, provider)
+        rows += len(items)
+    return rows / elapsed
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[5, 100, 1000])
+    parser.add_argument('--seconds', type=float, default=1.0, help='minimum time per measurement')
+    args = parser.parse_args()
+
+    app = create_app(BenchmarkConfig)
+    with app.app_context():
+        db.create_all()
+        populate(max(args.sizes))
+        stdlib, fast = DefaultJSONProvider(app), OrjsonProvider(app)
+
+        cases = [
+            ('ingredients', Ingredient, ingredients_before, ingredients_after),
+            ('recipes', Recipe, recipes_before, recipes_after),
+        ]
+        print(f"{'endpoint':<12} {'rows':>5} {'before rows/s':>14} {'after rows/s':>14} {'speedup':>8}")
+        for name, model, before, after in cases:
+            for size in args.sizes:
+                items = db.session.execute(select(model).order_by(model.id).limit(size)).scalars().all()
+                old = rows_per_second(before, items, stdlib, args.seconds)
+                new = rows_per_second(after, items, fast, args.seconds)
+                print(f'{name:<12} {size:>5} {old:>14,.0f} {new:>14,.0f} {new / old:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
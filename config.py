@@ -13,12 +13,55 @@ class Config:
     SECRET_KEY = os.environ.get('SECRET_KEY')
     SQLALCHEMY_DATABASE_URI = os.environ.get('SQLALCHEMY_DATABASE_URI')
     SQLALCHEMY_TRACK_MODIFICATIONS = False
+    SQLALCHEMY_BINDS = {'replica': os.environ['REPLICA_DATABASE_URI']} if os.environ.get('REPLICA_DATABASE_URI') else {}
+    ASYNC_DATABASE_URI = os.environ.get('ASYNC_DATABASE_URI')
+    REPLICA_BINDS = tuple(SQLALCHEMY_BINDS)
+    # seconds this process reads from the primary after its own commits; replica lag is not measured
+    REPLICA_LAG_TOLERANCE = float(os.environ.get('REPLICA_LAG_TOLERANCE', 5))
     PER_PAGE = 5
+    COUNT_CACHE_SIZE = 1024
+    QUERY_PLAN_CACHE_SIZE = 256
+    BULK_BATCH_SIZE = 500
+    EXPORT_BATCH_SIZE = 1000
+    ORJSON_ENABLED = True
+    FULL_TEXT_SEARCH = 'auto'
+    METRICS_ENABLED = True
     JWT_EXPIRED_MINUTES = 30
+    JWT_CACHE_ENABLED = True
+    JWT_CACHE_SIZE = 10000
+    PASSWORD_HASH_METHOD = 'scrypt:32768:8:1'
+    PASSWORD_HASH_POOL = 'thread'
+    PASSWORD_HASH_WORKERS = 2
+    SQLITE_PRAGMAS = {}
+
+
+class SqliteConfig(Config):
+    """Profile for nodes running on a SQLite file: readers never wait for writers and writers wait instead of failing."""
+    SQLITE_BUSY_TIMEOUT_MS = int(os.environ.get('SQLITE_BUSY_TIMEOUT_MS', 5000))
+    SQLITE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'foreign_keys': 'ON',
+        'busy_timeout': SQLITE_BUSY_TIMEOUT_MS,
+        'mmap_size': int(os.environ.get('SQLITE_MMAP_SIZE', 256 * 1024 * 1024)),
+        'cache_size': -int(os.environ.get('SQLITE_CACHE_SIZE_KB', 64 * 1024)),
+    }
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'pool_size': int(os.environ.get('DB_POOL_SIZE', 5)),
+        'max_overflow': int(os.environ.get('DB_MAX_OVERFLOW', 10)),
+        'pool_timeout': int(os.environ.get('DB_POOL_TIMEOUT', 30)),
+        'connect_args': {'timeout': SQLITE_BUSY_TIMEOUT_MS / 1000},
+    }
 
 
 class TestingConfig(Config):
     TESTING = True
     DEBUG = True
     SQLALCHEMY_DATABASE_URI = "sqlite:///:memory:"
+    PASSWORD_HASH_METHOD = 'pbkdf2:sha256:1000'
+
 
+config_profiles = {
+    'default': Config,
+    'sqlite': SqliteConfig,
+}
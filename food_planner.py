@@ -1,4 +1,6 @@
-from food_planner_app import create_app
+import os
 
-app = create_app()
+from config import config_profiles
+from food_planner_app import create_app
 
+app = create_app(config_profiles[os.environ.get('CONFIG_PROFILE', 'default')])
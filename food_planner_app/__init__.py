@@ -3,9 +3,10 @@ from flask_migrate import Migrate
 from flask_sqlalchemy import SQLAlchemy
 
 from config import Config
+from food_planner_app.routing import RoutingSession
 
 
-db = SQLAlchemy()
+db = SQLAlchemy(session_options={'class_': RoutingSession})
 migrate = Migrate()
 
 
@@ -13,18 +14,30 @@ def create_app(config_class=Config):
     app = Flask(__name__)
     app.config.from_object(config_class)
 
+    from food_planner_app.serialization import OrjsonProvider, orjson
+    if orjson is not None and app.config.get('ORJSON_ENABLED', True):
+        app.json = OrjsonProvider(app)
+
     db.init_app(app)
     migrate.init_app(app, db)
 
+    from food_planner_app.engines import configure_engines
+    configure_engines(app)
+
+    from food_planner_app.metrics import init_metrics
+    init_metrics(app)
+
     from food_planner_app.commands import db_manage_bp
     from food_planner_app.errors import errors_bp
     from food_planner_app.ingredients import ingredients_bp
+    from food_planner_app.plans import plans_bp
     from food_planner_app.recipes import recipes_bp
     from food_planner_app.auth import auth_bp
     app.register_blueprint(db_manage_bp)
     app.register_blueprint(errors_bp)
     app.register_blueprint(ingredients_bp, url_prefix='/api/v1')
     app.register_blueprint(recipes_bp, url_prefix='/api/v1')
+    app.register_blueprint(plans_bp, url_prefix='/api/v1')
     app.register_blueprint(auth_bp, url_prefix='/api/v1/auth')
 
     return app
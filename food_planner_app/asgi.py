@@ -0,0 +1,182 @@
+import io
+import sys
+
+from asgiref.wsgi import WsgiToAsgi
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import RequestRedirect
+
+from food_planner_app import db
+from food_planner_app.engines import sqlite_pragmas_listener
+from food_planner_app.routing import replica_bind_key
+
+ASYNC_ENDPOINTS = {
+    'ingredients.get_ingredients',
+    'ingredients.get_ingredient',
+    'recipes.get_recipes',
+    'recipes.get_recipe',
+    'recipes.random_recipes',
+}
+ASYNC_DRIVERS = {
+    'sqlite': 'sqlite+aiosqlite',
+    'mysql': 'mysql+aiomysql',
+    'postgresql': 'postgresql+asyncpg',
+}
+
+
+def _async_url(app, bind_key=None):
+    """URL of `bind_key` with the driver swapped for its asyncio counterpart, ASYNC_DATABASE_URI overrides the primary."""
+    if bind_key is None:
+        url = app.config.get('ASYNC_DATABASE_URI') or app.config['SQLALCHEMY_DATABASE_URI']
+    else:
+        url = app.config['SQLALCHEMY_BINDS'][bind_key]
+    url = make_url(url)
+    if not url.get_driver_name().startswith('aio') and url.get_backend_name() in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[url.get_backend_name()])
+    return url
+
+
+def check_async_drivers(app) -> None:
+    """Fails at startup instead of on the first request when the async driver of a bind is not installed."""
+    for bind_key in (None, *app.config.get('REPLICA_BINDS', ())):
+        url = _async_url(app, bind_key)
+        try:
+            url.get_dialect().import_dbapi()
+        except ImportError as exc:
+            raise RuntimeError(
+                f'The ASGI app needs the {url.drivername} driver for {url.render_as_string()}, install it '
+                f'or point ASYNC_DATABASE_URI at a supported async driver: {exc}'
+            ) from exc
+
+
+def get_async_engine(app, bind_key=None):
+    """
+    Async engine mirroring the sync engine of `bind_key`, with the driver swapped for its asyncio
+    counterpart. ASYNC_DATABASE_URI overrides the primary URL. Engines are created once per app.
+    """
+    engines = app.extensions.setdefault('async_engines', {})
+    engine = engines.get(bind_key)
+    if engine is None:
+        url = _async_url(app, bind_key)
+        options = dict(app.config.get('SQLALCHEMY_ENGINE_OPTIONS', {}))
+        options.pop('connect_args', None)
+        engine = engines[bind_key] = create_async_engine(url, **options)
+
+        if url.get_backend_name() == 'sqlite' and app.config.get('SQLITE_PRAGMAS'):
+            event.listen(engine.sync_engine, 'connect', sqlite_pragmas_listener(app.config['SQLITE_PRAGMAS']))
+    return engine
+
+
+def _build_environ(scope: dict) -> dict:
+    root_path = scope.get('root_path', '')
+    path = scope['path']
+    server_name, server_port = scope.get('server') or ('localhost', 80)
+
+    environ = {
+        'REQUEST_METHOD': scope['method'],
+        'SCRIPT_NAME': root_path.encode().decode('latin1'),
+        'PATH_INFO': path[len(root_path):].encode().decode('latin1') if path.startswith(root_path) else path,
+        'QUERY_STRING': scope['query_string'].decode('ascii'),
+        'SERVER_NAME': server_name,
+        'SERVER_PORT': str(server_port),
+        'SERVER_PROTOCOL': f"HTTP/{scope.get('http_version', '1.1')}",
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': scope.get('scheme', 'http'),
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': True,
+        'wsgi.run_once': False,
+    }
+    if scope.get('client'):
+        environ['REMOTE_ADDR'] = scope['client'][0]
+    for name, value in scope.get('headers', []):
+        key = name.decode('latin1').upper().replace('-', '_')
+        if key not in ('CONTENT_TYPE', 'CONTENT_LENGTH'):
+            key = f'HTTP_{key}'
+        value = value.decode('latin1')
+        environ[key] = f'{environ[key]},{value}' if key in environ else value
+    return environ
+
+
+def _run_wsgi(sync_session, app, environ: dict, start_response) -> bytes:
+    """
+    Runs the regular Flask request handling with db.session bound to the async session's sync facade.
+    Inside AsyncSession.run_sync every database round trip awaits on the event loop instead of blocking it.
+    """
+    with app.app_context():
+        db.session.registry.set(sync_session)
+        iterable = app.wsgi_app(environ, start_response)
+        try:
+            return b''.join(iterable)
+        finally:
+            if hasattr(iterable, 'close'):
+                iterable.close()
+
+
+class AsyncReadApp:
+    """
+    ASGI application serving the read endpoints in ASYNC_ENDPOINTS on the event loop through SQLAlchemy's
+    async engine, with the same views, URLs and JSON as the sync app. Every other request goes to the
+    Flask app through asgiref's WSGI adapter, which runs it in a worker thread.
+
+    Only the database round trips of those reads are awaited. The view itself, serialization included,
+    still runs on the event loop thread and blocks it while it computes.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.wsgi = WsgiToAsgi(app)
+
+    def _match(self, scope: dict):
+        if scope['method'] not in ('GET', 'HEAD'):
+            return None
+        adapter = self.app.url_map.bind('localhost', script_name=scope.get('root_path') or None)
+        try:
+            endpoint, _ = adapter.match(scope['path'][len(scope.get('root_path', '')):], method=scope['method'])
+        except (HTTPException, RequestRedirect):
+            return None
+        return endpoint if endpoint in ASYNC_ENDPOINTS else None
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            await self._lifespan(receive, send)
+        elif scope['type'] == 'http' and self._match(scope) is not None:
+            await self._handle(scope, send)
+        else:
+            await self.wsgi(scope, receive, send)
+
+    async def _handle(self, scope: dict, send) -> None:
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response['status'] = int(status.split(' ', 1)[0])
+            response['headers'] = [(name.lower().encode('latin1'), value.encode('latin1')) for name, value in headers]
+
+        engine = get_async_engine(self.app, replica_bind_key(self.app))
+        async with AsyncSession(engine, expire_on_commit=False) as session:
+            body = await session.run_sync(_run_wsgi, self.app, _build_environ(scope), start_response)
+
+        await send({'type': 'http.response.start', 'status': response['status'], 'headers': response['headers']})
+        await send({'type': 'http.response.body', 'body': body})
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                await self.dispose()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def dispose(self) -> None:
+        for engine in self.app.extensions.pop('async_engines', {}).values():
+            await engine.dispose()
+
+
+def create_asgi_app(app) -> AsyncReadApp:
+    check_async_drivers(app)
+    return AsyncReadApp(app)
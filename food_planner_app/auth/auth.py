@@ -45,6 +45,10 @@ def login(args: dict):
     if not user or not user.is_password_valid(args['password']):
         abort(401, description="Invalid credentials")
 
+    if user.is_password_outdated():
+        user.password = user.generate_hashed_password(args['password'])
+        db.session.commit()
+
     token = user.generate_jwt()
 
     return jsonify({
@@ -71,7 +75,7 @@ def get_current_user(user_id: int):
 @validate_json_content_type
 @use_args(user_password_update_schema, error_status_code=400)
 def update_user_password(user_id: int, args: dict):
-    user = db.Session.get(User, user_id)
+    user = db.session.get(User, user_id)
     if not user:
         abort(404, description=f'User with id {user_id} not found')
 
@@ -1,18 +1,30 @@
-import json
 from pathlib import Path
 
-from sqlalchemy import text
+import click
+from sqlalchemy import func, or_, select, text
 
 from food_planner_app import db
 from food_planner_app.commands import db_manage_bp
-from food_planner_app.models import Ingredient, Recipe
+from food_planner_app.commands.generating import generate_catalog
+from food_planner_app.commands.importing import import_file
+from food_planner_app.models import Ingredient, Recipe, RecipeIngredient
+from food_planner_app.nutrition import recipe_calories_subquery, refresh_recipe_calories
+from food_planner_app.search import TEXT_VERSION
+from food_planner_app.versions import bump_table_versions
 
 
-def load_json_data(file_name: str) -> list:
-    json_path = Path(__file__).parent.parent / 'samples' / file_name
-    with open(json_path) as file:
-        data_json = json.load(file)
-        return data_json
+SAMPLES_DIR = Path(__file__).parent.parent / 'samples'
+
+
+def print_import_stats(stats: dict) -> None:
+    rate = stats.get('rows', 0) / stats['seconds'] if stats['seconds'] else 0
+    print(
+        f"Ingredients: {stats.get('ingredients_inserted', 0)} inserted, {stats.get('ingredients_updated', 0)} updated, "
+        f"{stats.get('ingredients_skipped', 0)} skipped. "
+        f"Recipes: {stats.get('recipes_inserted', 0)} inserted, {stats.get('recipes_updated', 0)} updated, "
+        f"{stats.get('recipes_skipped', 0)} skipped."
+    )
+    print(f"{stats.get('rows', 0)} rows in {stats['seconds']:.2f}s ({rate:.0f} rows/sec)")
 
 
 @db_manage_bp.cli.group()
@@ -25,32 +37,86 @@ def db_manage():
 def add_data():
     """Add sample data to database"""
     try:
-        data_json = load_json_data('ingredients.json')
-        for item in data_json:
-            ingredient = Ingredient(**item)
-            db.session.add(ingredient)
-
-        data_json = load_json_data('recipes.json')
-        for item in data_json:
-            recipe = Recipe(**item)
-            db.session.add(recipe)
-
-        db.session.commit()
+        for file_name in ('ingredients.json', 'recipes.json'):
+            import_file(db.session, SAMPLES_DIR / file_name)
         print("Sample ingredients and recipes added successfully.")
     except Exception as exc:
         print('Unexpected error: {}'.format(exc))
 
 
+@db_manage.command('import')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False, path_type=Path))
+@click.option('--chunk-size', default=1000, show_default=True, help='Records upserted per executemany batch.')
+def import_data(path: Path, chunk_size: int):
+    """Import ingredients and recipes from a JSON array or NDJSON file"""
+    stats = import_file(db.session, path, chunk_size)
+    print_import_stats(stats)
+
+
+@db_manage.command()
+@click.option('--ingredients', default=1000, show_default=True, help='Number of ingredients to generate.')
+@click.option('--recipes', default=10000, show_default=True, help='Number of recipes to generate.')
+@click.option('--avg-ingredients', default=6.0, show_default=True, help='Average number of ingredients per recipe.')
+@click.option('--seed', default=0, show_default=True, help='Random seed, the same seed generates the same catalog.')
+@click.option('--batch-size', default=5000, show_default=True, help='Rows inserted per executemany batch.')
+def generate(ingredients: int, recipes: int, avg_ingredients: float, seed: int, batch_size: int):
+    """Generate a synthetic catalog for load and scale testing"""
+    if recipes and not ingredients:
+        raise click.BadParameter('recipes need at least one ingredient', param_hint='--ingredients')
+    stats = generate_catalog(db.session, ingredients, recipes, avg_ingredients, seed, batch_size)
+    rows = stats.get('ingredients', 0) + stats.get('recipes', 0) + stats.get('links', 0)
+    print(
+        f"Generated {stats.get('ingredients', 0)} ingredients and {stats.get('recipes', 0)} recipes "
+        f"with {stats.get('links', 0)} recipe ingredients."
+    )
+    print(f"{rows} rows in {stats['seconds']:.2f}s ({rows / stats['seconds']:.0f} rows/sec)")
+
+
 @db_manage.command()
 def remove_data():
     """Remove all data from the database"""
     try:
+        db.session.execute(text('DELETE FROM recipe_ingredients'))
         db.session.execute(text('DELETE FROM recipes'))
-        db.session.execute(text('ALTER TABLE recipes AUTO_INCREMENT = 1'))
         db.session.execute(text('DELETE FROM ingredients'))
-        db.session.execute(text('ALTER TABLE ingredients AUTO_INCREMENT = 1'))
+        if db.engine.dialect.name == 'mysql':
+            db.session.execute(text('ALTER TABLE recipes AUTO_INCREMENT = 1'))
+            db.session.execute(text('ALTER TABLE ingredients AUTO_INCREMENT = 1'))
+        # raw deletes bypass flush events, caches and ETags keyed on table versions must see them
+        bump_table_versions(
+            db.session, [Recipe.__tablename__, Ingredient.__tablename__, RecipeIngredient.__tablename__, TEXT_VERSION]
+        )
         db.session.commit()
         print('Data has been successfully remove from database')
     except Exception as exc:
         print('Unexpected error: {}'.format(exc))
 
+
+
+@db_manage.command()
+@click.option('--fix', is_flag=True, help='Recompute recipes with inconsistent calories.')
+def check_calories(fix: bool):
+    """Check materialized recipe calories against their ingredients"""
+    expected = recipe_calories_subquery()
+    stmt = (
+        select(Recipe.id, Recipe.name, Recipe.total_calories, expected)
+        .where(or_(
+            func.abs(Recipe.total_calories - expected) > 0.005,
+            func.abs(Recipe.calories_per_serving - expected / Recipe.servings) > 0.005
+        ))
+        .order_by(Recipe.id)
+    )
+    mismatches = db.session.execute(stmt).all()
+
+    for recipe_id, name, stored, computed in mismatches:
+        print(f'Recipe {recipe_id} ({name}): stored {stored}, expected {computed}')
+
+    if not mismatches:
+        print('All recipe calories are consistent.')
+        return
+
+    print(f'{len(mismatches)} recipe(s) with inconsistent calories.')
+    if fix:
+        refresh_recipe_calories(db.session, [row.id for row in mismatches])
+        db.session.commit()
+        print('Recipe calories have been recomputed.')
@@ -0,0 +1,161 @@
+import itertools
+import random
+import time
+from collections import Counter
+
+from sqlalchemy import insert, select
+
+from food_planner_app.models import Ingredient, Recipe
+from food_planner_app.recipes.bulk import insert_recipes
+from food_planner_app.versions import bump_table_versions
+
+# name, unit, calories per 100 units (per piece for pcs)
+BASE_INGREDIENTS = (
+    ('flour', 'g', 364), ('rice', 'g', 130), ('pasta', 'g', 131), ('oats', 'g', 389), ('bread', 'g', 265),
+    ('potato', 'g', 77), ('sweet potato', 'g', 86), ('quinoa', 'g', 120), ('couscous', 'g', 112),
+    ('chicken breast', 'g', 165), ('chicken thigh', 'g', 209), ('beef', 'g', 250), ('pork loin', 'g', 242),
+    ('turkey', 'g', 135), ('salmon', 'g', 208), ('tuna', 'g', 132), ('cod', 'g', 82), ('shrimp', 'g', 99),
+    ('tofu', 'g', 76), ('lentils', 'g', 116), ('chickpeas', 'g', 164), ('black beans', 'g', 132),
+    ('egg', 'pcs', 78), ('milk', 'ml', 42), ('cream', 'ml', 340), ('yogurt', 'g', 59), ('butter', 'g', 717),
+    ('cheddar', 'g', 403), ('mozzarella', 'g', 280), ('parmesan', 'g', 431), ('feta', 'g', 264),
+    ('olive oil', 'ml', 884), ('sunflower oil', 'ml', 884), ('vinegar', 'ml', 18), ('soy sauce', 'ml', 53),
+    ('honey', 'g', 304), ('sugar', 'g', 387), ('salt', 'g', 0), ('black pepper', 'g', 251), ('paprika', 'g', 282),
+    ('garlic', 'pcs', 4), ('onion', 'pcs', 44), ('tomato', 'pcs', 22), ('carrot', 'pcs', 25), ('bell pepper', 'pcs', 31),
+    ('zucchini', 'g', 17), ('spinach', 'g', 23), ('broccoli', 'g', 34), ('mushrooms', 'g', 22), ('cabbage', 'g', 25),
+    ('cucumber', 'g', 15), ('lettuce', 'g', 15), ('avocado', 'pcs', 240), ('lemon', 'pcs', 17), ('apple', 'pcs', 95),
+    ('banana', 'pcs', 105), ('strawberries', 'g', 32), ('blueberries', 'g', 57), ('almonds', 'g', 579),
+    ('walnuts', 'g', 654), ('peanut butter', 'g', 588), ('coconut milk', 'ml', 230), ('basil', 'g', 23),
+    ('parsley', 'g', 36), ('ginger', 'g', 80), ('cinnamon', 'g', 247), ('dark chocolate', 'g', 546),
+)
+VARIANTS = (
+    'organic', 'frozen', 'dried', 'smoked', 'fresh', 'canned', 'low-fat', 'whole', 'wholegrain', 'roasted',
+    'raw', 'sliced', 'diced', 'ground', 'light', 'bio', 'local', 'wild', 'free-range', 'unsalted',
+)
+STYLES = (
+    'Classic', 'Spicy', 'Creamy', 'Quick', 'Rustic', 'Crispy', 'Grilled', 'Baked', 'Roasted', 'Lemony',
+    'Smoky', 'Garlicky', 'Sweet', 'Hearty', 'Light', 'Herby', 'Cheesy', 'Tangy', 'One-pot', 'Homestyle',
+)
+DISHES = (
+    'salad', 'soup', 'stew', 'curry', 'bowl', 'pasta', 'risotto', 'stir-fry', 'casserole', 'wrap',
+    'sandwich', 'omelette', 'pancakes', 'skillet', 'bake', 'tacos', 'pie', 'smoothie', 'porridge', 'skewers',
+)
+AMOUNTS = {
+    'g': range(10, 505, 5),
+    'ml': range(10, 510, 10),
+    'pcs': range(1, 7),
+}
+ZIPF_EXPONENT = 1.07
+
+
+def ingredient_names(count: int, taken: set = frozenset()):
+    """Yields `count` unique (name, base, unit, calories): plain bases first, then with variants, then numbered."""
+    candidates = itertools.chain(
+        ((base, base, unit, calories) for base, unit, calories in BASE_INGREDIENTS),
+        (
+            (f'{base} {variant}', base, unit, calories)
+            for variant in VARIANTS for base, unit, calories in BASE_INGREDIENTS
+        ),
+        (
+            (f'{base} {number}', base, unit, calories)
+            for number in itertools.count(2) for base, unit, calories in BASE_INGREDIENTS
+        ),
+    )
+    for candidate in candidates:
+        if count == 0:
+            return
+        if candidate[0] in taken:
+            continue
+        count -= 1
+        yield candidate
+
+
+def zipf_weights(count: int, exponent: float = ZIPF_EXPONENT) -> list:
+    """Cumulative weights giving the ingredient at rank r a probability proportional to 1 / r ** exponent."""
+    return list(itertools.accumulate(1 / rank ** exponent for rank in range(1, count + 1)))
+
+
+class CatalogGenerator:
+    """
+    Writes a synthetic catalog of realistic looking ingredients and recipes with bulk inserts.
+    Ingredient popularity follows a Zipf distribution, so a few staples appear in most recipes and
+    the long tail rarely does. Names are unique, the same seed always produces the same catalog.
+    Every batch is committed on its own.
+    """
+
+    def __init__(self, session, seed: int = 0, batch_size: int = 5000):
+        self.session = session
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.stats = Counter()
+        self.ingredients = []
+        self._taken_recipe_names = set(self.session.execute(select(Recipe.name)).scalars())
+        self._recipe_names = Counter()
+
+    def add_ingredients(self, count: int) -> None:
+        taken = set(self.session.execute(select(Ingredient.name)).scalars())
+        generated = list(ingredient_names(count, taken))
+        records = [
+            {'name': name, 'calories': round(calories * self.rng.uniform(0.8, 1.2), 2), 'unit': unit}
+            for name, _, unit, calories in generated
+        ]
+
+        for start in range(0, len(records), self.batch_size):
+            self.session.execute(insert(Ingredient.__table__), records[start:start + self.batch_size])
+        if records:
+            bump_table_versions(self.session, [Ingredient.__tablename__])
+        self.session.commit()
+
+        # generation order is popularity order, the base names are the staples
+        self.ingredients = [(name, base, unit) for name, base, unit, _ in generated]
+        self.stats['ingredients'] += len(records)
+
+    def _recipe_name(self, main: str, dish: str) -> str:
+        base = f'{self.rng.choice(STYLES)} {main} {dish}'
+        while True:
+            self._recipe_names[base] += 1
+            count = self._recipe_names[base]
+            name = base if count == 1 else f'{base} {count}'
+            if name not in self._taken_recipe_names:
+                return name
+
+    def _recipe(self, cum_weights: list, avg_ingredients: float) -> dict:
+        count = round(self.rng.gauss(avg_ingredients, avg_ingredients / 3))
+        count = max(1, min(count, len(self.ingredients)))
+        chosen = {}
+        while len(chosen) < count:
+            for ingredient in self.rng.choices(self.ingredients, cum_weights=cum_weights, k=count - len(chosen)):
+                chosen[ingredient[0]] = ingredient
+
+        ingredients = list(chosen.values())
+        dish = self.rng.choice(DISHES)
+        return {
+            'name': self._recipe_name(ingredients[0][1], dish),
+            'description': f"Homemade {dish} with {' and '.join(name for name, _, _ in ingredients[:2])}.",
+            'servings': self.rng.choice((1, 2, 2, 2, 3, 4, 4, 6)),
+            'ingredients': [
+                {'name': name, 'amount': self.rng.choice(AMOUNTS[unit])} for name, _, unit in ingredients
+            ],
+        }
+
+    def add_recipes(self, count: int, avg_ingredients: float = 6) -> None:
+        if count and not self.ingredients:
+            raise ValueError('Recipes need generated ingredients, add some first')
+
+        ingredient_ids = dict(self.session.execute(select(Ingredient.name, Ingredient.id)).all())
+        cum_weights = zipf_weights(len(self.ingredients))
+
+        for start in range(0, count, self.batch_size):
+            batch = [self._recipe(cum_weights, avg_ingredients) for _ in range(min(self.batch_size, count - start))]
+            insert_recipes(self.session, batch, ingredient_ids, self.batch_size)
+            self.session.commit()
+            self.stats['recipes'] += len(batch)
+            self.stats['links'] += sum(len(recipe['ingredients']) for recipe in batch)
+
+
+def generate_catalog(session, ingredients: int, recipes: int, avg_ingredients: float = 6, seed: int = 0,
+                     batch_size: int = 5000) -> dict:
+    started = time.perf_counter()
+    generator = CatalogGenerator(session, seed, batch_size)
+    generator.add_ingredients(ingredients)
+    generator.add_recipes(recipes, avg_ingredients)
+    return dict(generator.stats, seconds=time.perf_counter() - started)
@@ -0,0 +1,236 @@
+import json
+import time
+from collections import Counter
+from pathlib import Path
+
+import click
+from marshmallow import ValidationError
+from sqlalchemy import bindparam, delete, insert, select, update
+
+from food_planner_app.models import Ingredient, Recipe, RecipeIngredient, ingredient_schema, recipe_create_schema
+from food_planner_app.nutrition import refresh_recipe_calories
+from food_planner_app.recipes.bulk import insert_recipes
+from food_planner_app.search import TEXT_VERSION
+from food_planner_app.versions import bump_table_versions
+
+NDJSON_SUFFIXES = {'.ndjson', '.jsonl'}
+READ_SIZE = 1 << 16
+
+
+def _iter_json_array(file):
+    """Yields items of a top level JSON array without loading the whole document."""
+    decoder = json.JSONDecoder()
+    buffer = ''
+    while not buffer:
+        chunk = file.read(READ_SIZE)
+        if not chunk:
+            return
+        buffer = chunk.lstrip()
+    if not buffer.startswith('['):
+        raise ValueError('Expected a JSON array of records')
+    buffer = buffer[1:]
+
+    while True:
+        buffer = buffer.lstrip()
+        if buffer.startswith(','):
+            buffer = buffer[1:].lstrip()
+        if buffer.startswith(']'):
+            return
+        try:
+            item, end = decoder.raw_decode(buffer)
+        except json.JSONDecodeError:
+            chunk = file.read(READ_SIZE)
+            if not chunk:
+                raise
+            buffer += chunk
+            continue
+        yield item
+        buffer = buffer[end:]
+
+
+def iter_records(path: Path):
+    """Yields records of a JSON array or NDJSON file one by one."""
+    with open(path, encoding='utf-8') as file:
+        if path.suffix in NDJSON_SUFFIXES:
+            for line in file:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            yield from _iter_json_array(file)
+
+
+class CatalogImporter:
+    """
+    Upserts ingredient and recipe records in chunks with executemany.
+    Ingredient names are resolved through an in-memory map loaded once, so records never trigger per row lookups.
+    Records are loaded with the API's schemas, invalid ones are reported and skipped.
+    Records equal to the stored rows are left alone, so re-importing a file does not invalidate any cache.
+    Every chunk is committed on its own which makes an interrupted import safe to run again.
+    """
+
+    def __init__(self, session, chunk_size: int = 1000):
+        self.session = session
+        self.chunk_size = chunk_size
+        self.stats = Counter()
+        self.ingredients = {}
+        self.ingredient_ids = {}
+        self._ingredient_buffer = {}
+        self._recipe_buffer = {}
+        self._remember_ingredients(select(Ingredient.id, Ingredient.name, Ingredient.calories, Ingredient.unit))
+
+    def _remember_ingredients(self, stmt) -> None:
+        for row in self.session.execute(stmt):
+            self.ingredients[row.name] = (float(row.calories), row.unit)
+            self.ingredient_ids[row.name] = row.id
+
+    def add(self, record: dict) -> None:
+        is_recipe = isinstance(record, dict) and 'ingredients' in record
+        try:
+            if is_recipe:
+                # instructions are not stored, catalogs do not carry them
+                record = recipe_create_schema.load(record, partial=('instructions',))
+            else:
+                record = ingredient_schema.load({'unit': 'g', **record} if isinstance(record, dict) else record)
+        except ValidationError as err:
+            name = (record.get('name') if isinstance(record, dict) else None) or 'without a name'
+            click.echo(f"Skipping {'recipe' if is_recipe else 'ingredient'} {name}: {err.messages}", err=True)
+            self.stats['recipes_skipped' if is_recipe else 'ingredients_skipped'] += 1
+            return
+
+        if is_recipe:
+            self._recipe_buffer[record['name']] = record
+            if len(self._recipe_buffer) >= self.chunk_size:
+                self.flush()
+        else:
+            self._ingredient_buffer[record['name']] = record
+            if len(self._ingredient_buffer) >= self.chunk_size:
+                self._flush_ingredients()
+
+    def flush(self) -> None:
+        # recipes may refer to ingredients from the same file, so those go first
+        self._flush_ingredients()
+        self._flush_recipes()
+
+    def _flush_ingredients(self) -> None:
+        records = list(self._ingredient_buffer.values())
+        self._ingredient_buffer.clear()
+        if not records:
+            return
+
+        new = []
+        changed = []
+        for record in records:
+            values = {'name': record['name'], 'calories': record['calories'], 'unit': record['unit']}
+            current = self.ingredients.get(record['name'])
+            if current is None:
+                new.append(values)
+            elif current != (float(values['calories']), values['unit']):
+                values['_id'] = self.ingredient_ids[record['name']]
+                changed.append(values)
+
+        if new:
+            self.session.execute(insert(Ingredient.__table__), new)
+        if changed:
+            self.session.execute(
+                update(Ingredient.__table__)
+                .where(Ingredient.id == bindparam('_id'))
+                .values(calories=bindparam('calories'), unit=bindparam('unit')),
+                changed
+            )
+            refresh_recipe_calories(self.session, ingredient_ids=[values['_id'] for values in changed])
+        if new or changed:
+            bump_table_versions(self.session, [Ingredient.__tablename__])
+
+        names = [record['name'] for record in records]
+        self._remember_ingredients(
+            select(Ingredient.id, Ingredient.name, Ingredient.calories, Ingredient.unit).where(Ingredient.name.in_(names))
+        )
+
+        self.session.commit()
+        self.stats['ingredients_inserted'] += len(new)
+        self.stats['ingredients_updated'] += len(changed)
+
+    def _flush_recipes(self) -> None:
+        records = []
+        for record in self._recipe_buffer.values():
+            unknown = [ing['name'] for ing in record['ingredients'] if ing['name'] not in self.ingredient_ids]
+            if unknown:
+                click.echo(f"Skipping recipe {record['name']}: ingredient not found: {', '.join(unknown)}", err=True)
+                self.stats['recipes_skipped'] += 1
+            else:
+                records.append(record)
+        self._recipe_buffer.clear()
+        if not records:
+            return
+
+        names = [record['name'] for record in records]
+        existing = dict(self.session.execute(select(Recipe.name, Recipe.id).where(Recipe.name.in_(names))).all())
+        new = [record for record in records if record['name'] not in existing]
+        current = self._load_recipes(list(existing.values())) if existing else {}
+        changed = [
+            record for record in records
+            if record['name'] in existing and current[existing[record['name']]] != self._recipe_state(record)
+        ]
+
+        insert_recipes(self.session, new, self.ingredient_ids, self.chunk_size)
+
+        if changed:
+            recipe_ids = [existing[record['name']] for record in changed]
+            self.session.execute(
+                update(Recipe.__table__)
+                .where(Recipe.id == bindparam('_id'))
+                .values(description=bindparam('description'), servings=bindparam('servings')),
+                [
+                    {'_id': existing[record['name']], 'description': record.get('description'), 'servings': record.get('servings', 1)}
+                    for record in changed
+                ]
+            )
+            self.session.execute(delete(RecipeIngredient.__table__).where(RecipeIngredient.recipe_id.in_(recipe_ids)))
+            links = [
+                {'recipe_id': existing[record['name']], 'ingredient_id': self.ingredient_ids[ing['name']], 'amount': ing['amount']}
+                for record in changed
+                for ing in record['ingredients']
+            ]
+            if links:
+                self.session.execute(insert(RecipeIngredient.__table__), links)
+            refresh_recipe_calories(self.session, recipe_ids)
+            bump_table_versions(self.session, [RecipeIngredient.__tablename__, TEXT_VERSION])
+
+        self.session.commit()
+        self.stats['recipes_inserted'] += len(new)
+        self.stats['recipes_updated'] += len(changed)
+
+
+    def _recipe_state(self, record: dict) -> tuple:
+        """Description, servings and {ingredient id: amount} of a record, comparable with _load_recipes."""
+        ingredients = {self.ingredient_ids[ing['name']]: float(ing['amount']) for ing in record['ingredients']}
+        return record.get('description'), record.get('servings', 1), ingredients
+
+    def _load_recipes(self, recipe_ids: list) -> dict:
+        recipes = {
+            row.id: (row.description, row.servings, {})
+            for row in self.session.execute(
+                select(Recipe.id, Recipe.description, Recipe.servings).where(Recipe.id.in_(recipe_ids))
+            )
+        }
+        rows = self.session.execute(
+            select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.amount)
+            .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+        )
+        for row in rows:
+            recipes[row.recipe_id][2][row.ingredient_id] = float(row.amount)
+        return recipes
+
+
+def import_file(session, path: Path, chunk_size: int = 1000) -> dict:
+    """Imports a JSON array or NDJSON catalog file, returns row counters and the elapsed time."""
+    started = time.perf_counter()
+    importer = CatalogImporter(session, chunk_size)
+    for record in iter_records(path):
+        importer.add(record)
+        importer.stats['rows'] += 1
+    importer.flush()
+
+    stats = dict(importer.stats)
+    stats['seconds'] = time.perf_counter() - started
+    return stats
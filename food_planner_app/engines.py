@@ -0,0 +1,30 @@
+from sqlalchemy import event
+
+from food_planner_app import db
+
+
+def sqlite_pragmas_listener(pragmas: dict):
+    """Connect event listener running PRAGMA statements on every new DBAPI connection."""
+    def on_connect(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        try:
+            for name, value in pragmas.items():
+                cursor.execute(f'PRAGMA {name} = {value}')
+        finally:
+            cursor.close()
+    return on_connect
+
+
+def configure_engines(app) -> None:
+    """
+    Applies SQLITE_PRAGMAS to every new connection of the app's SQLite engines.
+    Other dialects are left alone, pool settings come from SQLALCHEMY_ENGINE_OPTIONS.
+    """
+    pragmas = app.config.get('SQLITE_PRAGMAS')
+    if not pragmas:
+        return
+
+    with app.app_context():
+        for engine in db.engines.values():
+            if engine.dialect.name == 'sqlite':
+                event.listen(engine, 'connect', sqlite_pragmas_listener(pragmas))
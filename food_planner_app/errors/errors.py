@@ -21,7 +21,8 @@ class ErrorResponse:
 @errors_bp.app_errorhandler(400)
 def bad_request_error(err):
     if hasattr(err, "data") and err.data:
-        messages = err.data.get('messages', {}).get('json', {})
+        messages = err.data.get('messages', {})
+        messages = messages.get('json') or messages.get('query') or {}
     else:
         messages = err.description or "Bad request"
 
@@ -0,0 +1,64 @@
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import lru_cache
+
+from flask import current_app
+from werkzeug.security import check_password_hash, generate_password_hash
+
+POOL_TYPES = {'thread': ThreadPoolExecutor, 'process': ProcessPoolExecutor}
+EXECUTOR_KEY = 'password_hash_executor'
+
+_executor_lock = threading.Lock()
+
+
+def _get_executor():
+    """
+    Returns the hashing pool of the current app, configured by PASSWORD_HASH_POOL and PASSWORD_HASH_WORKERS,
+    or None when PASSWORD_HASH_WORKERS is 0 and hashing should run inline.
+    The pool is shut down when the app is garbage collected or the interpreter exits.
+    """
+    workers = current_app.config.get('PASSWORD_HASH_WORKERS', 2)
+    if not workers:
+        return None
+
+    executor = current_app.extensions.get(EXECUTOR_KEY)
+    if executor is None:
+        with _executor_lock:
+            executor = current_app.extensions.get(EXECUTOR_KEY)
+            if executor is None:
+                pool_type = POOL_TYPES[current_app.config.get('PASSWORD_HASH_POOL', 'thread')]
+                executor = current_app.extensions[EXECUTOR_KEY] = pool_type(max_workers=workers)
+                weakref.finalize(current_app._get_current_object(), executor.shutdown, wait=False, cancel_futures=True)
+    return executor
+
+
+def _run(func, *args):
+    """
+    Runs func in the app's hashing pool. The calling request thread still waits for the result,
+    the pool only caps how many hashes are computed at once, so a login storm cannot take every CPU.
+    """
+    executor = _get_executor()
+    if executor is None:
+        return func(*args)
+    return executor.submit(func, *args).result()
+
+
+@lru_cache
+def _method_prefix(method: str) -> str:
+    """Full method string stored in front of hashes, e.g. 'scrypt' is stored as 'scrypt:32768:8:1'."""
+    return generate_password_hash('', method).split('$', 1)[0]
+
+
+def hash_password(password: str) -> str:
+    return _run(generate_password_hash, password, current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt'))
+
+
+def verify_password(password_hash: str, password: str) -> bool:
+    return _run(check_password_hash, password_hash, password)
+
+
+def needs_rehash(password_hash: str) -> bool:
+    """True when the hash was made with a different method or cost than currently configured."""
+    method = current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+    return password_hash.split('$', 1)[0] != _method_prefix(method)
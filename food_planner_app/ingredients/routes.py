@@ -6,24 +6,31 @@ from webargs.flaskparser import use_args
 from food_planner_app import db
 from food_planner_app.ingredients import ingredients_bp
 from food_planner_app.models import Ingredient, IngredientSchema, ingredient_schema
+from food_planner_app.serialization import schema_serializer
 from food_planner_app.utils import (
     apply_filter,
     apply_order,
+    apply_projection,
+    conditional_get,
     get_pagination,
     get_schema_args,
+    stream_ndjson,
     token_required,
     validate_json_content_type,
 )
 
 
 @ingredients_bp.route('/ingredients', methods=['GET'])
+@conditional_get('ingredients')
 def get_ingredients():
     query = select(Ingredient)
     schema_args = get_schema_args(Ingredient)
     query = apply_order(Ingredient, query)
     query = apply_filter(Ingredient, query)
+    query = apply_projection(Ingredient, query, schema_args.get('only'))
     items, pagination = get_pagination(query, 'ingredients.get_ingredients')
-    ingredients = IngredientSchema(**schema_args).dump(items)
+    serialize = schema_serializer(IngredientSchema, schema_args.get('only'))
+    ingredients = [serialize(item) for item in items]
 
     return jsonify({
         'success': True,
@@ -33,7 +40,21 @@ def get_ingredients():
     })
 
 
+@ingredients_bp.route('/ingredients/export', methods=['GET'])
+@conditional_get('ingredients')
+def export_ingredients():
+    query = select(Ingredient)
+    schema_args = get_schema_args(Ingredient)
+    query = apply_order(Ingredient, query).order_by(Ingredient.id)
+    query = apply_filter(Ingredient, query)
+    query = apply_projection(Ingredient, query, schema_args.get('only'))
+    serialize = schema_serializer(IngredientSchema, schema_args.get('only'))
+
+    return stream_ndjson(query, lambda items: [serialize(item) for item in items])
+
+
 @ingredients_bp.route('/ingredients/<int:ingredient_id>', methods=['GET'])
+@conditional_get('ingredients')
 def get_ingredient(ingredient_id: int):
     ingredient = db.session.get(Ingredient, ingredient_id)
     if not ingredient:
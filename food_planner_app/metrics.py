@@ -0,0 +1,182 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from flask import Response, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from food_planner_app.cache import LRUCache
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+PREFIX = 'food_planner'
+
+# [started, statements, sql seconds, status] of the request being handled in this context
+_current_request = ContextVar('request_metrics', default=None)
+
+
+class Histogram:
+    """Bucket counts, sum and count of observed values. Not thread-safe on its own, guarded by Metrics."""
+
+    def __init__(self, buckets: tuple):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def snapshot(self) -> tuple:
+        return list(self.counts), self.sum
+
+
+class Metrics:
+    """
+    Per-endpoint request and SQL statistics of one app, aggregated under a single lock.
+    Every request takes the lock twice, once to count itself in flight and once to record its outcome.
+    """
+
+    def __init__(self):
+        self.in_flight = 0
+        self.requests = {}
+        self.latency = {}
+        self.sql_statements = {}
+        self.sql_seconds = {}
+        self._lock = threading.Lock()
+
+    def started(self) -> None:
+        with self._lock:
+            self.in_flight += 1
+
+    def finished(self, endpoint: str, method: str, status: int, seconds: float, statements: int,
+                 sql_seconds: float) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            latency = self.latency.get(endpoint)
+            if latency is None:
+                latency = self.latency[endpoint] = Histogram(LATENCY_BUCKETS)
+                self.sql_statements[endpoint] = Histogram(STATEMENT_BUCKETS)
+                self.sql_seconds[endpoint] = Histogram(LATENCY_BUCKETS)
+            latency.observe(seconds)
+            self.sql_statements[endpoint].observe(statements)
+            self.sql_seconds[endpoint].observe(sql_seconds)
+
+    def render(self, caches: dict = None) -> str:
+        """Prometheus text exposition format. `caches` maps names to LRUCache instances whose counters are exported."""
+        with self._lock:
+            in_flight = self.in_flight
+            requests = dict(self.requests)
+            histograms = [
+                (name, help_text, {endpoint: histogram.snapshot() for endpoint, histogram in values.items()}, buckets)
+                for name, help_text, values, buckets in (
+                    ('http_request_duration_seconds', 'Request latency by endpoint.', self.latency, LATENCY_BUCKETS),
+                    ('sql_statements_per_request', 'SQL statements executed per request.', self.sql_statements,
+                     STATEMENT_BUCKETS),
+                    ('sql_duration_seconds_per_request', 'Time spent executing SQL per request.', self.sql_seconds,
+                     LATENCY_BUCKETS),
+                )
+            ]
+
+        lines = [
+            f'# HELP {PREFIX}_http_requests_in_flight Requests currently being handled.',
+            f'# TYPE {PREFIX}_http_requests_in_flight gauge',
+            f'{PREFIX}_http_requests_in_flight {in_flight}',
+            f'# HELP {PREFIX}_http_requests_total Requests by endpoint, method and status code.',
+            f'# TYPE {PREFIX}_http_requests_total counter',
+        ]
+        for (endpoint, method, status), count in sorted(requests.items()):
+            lines.append(
+                f'{PREFIX}_http_requests_total{{endpoint="{_escape(endpoint)}",method="{method}",status="{status}"}} {count}'
+            )
+
+        for name, help_text, snapshots, buckets in histograms:
+            lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+            lines.append(f'# TYPE {PREFIX}_{name} histogram')
+            for endpoint, (counts, total) in sorted(snapshots.items()):
+                label = f'endpoint="{_escape(endpoint)}"'
+                cumulative = 0
+                for bound, count in zip(buckets, counts):
+                    cumulative += count
+                    lines.append(f'{PREFIX}_{name}_bucket{{{label},le="{bound}"}} {cumulative}')
+                cumulative += counts[-1]
+                lines.append(f'{PREFIX}_{name}_bucket{{{label},le="+Inf"}} {cumulative}')
+                lines.append(f'{PREFIX}_{name}_sum{{{label}}} {total!r}')
+                lines.append(f'{PREFIX}_{name}_count{{{label}}} {cumulative}')
+
+        cache_stats = {name: cache.stats() for name, cache in sorted((caches or {}).items())}
+        for name, stat, metric_type, help_text in (
+            ('cache_hits_total', 'hits', 'counter', 'Lookups served from the cache.'),
+            ('cache_misses_total', 'misses', 'counter', 'Lookups not found in the cache or expired.'),
+            ('cache_entries', 'size', 'gauge', 'Entries currently held by the cache.'),
+        ):
+            lines.append(f'# HELP {PREFIX}_{name} {help_text}')
+            lines.append(f'# TYPE {PREFIX}_{name} {metric_type}')
+            for cache, stats in cache_stats.items():
+                lines.append(f'{PREFIX}_{name}{{cache="{_escape(cache)}"}} {stats[stat]}')
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    if _current_request.get() is not None:
+        conn.info['metrics_query_started'] = time.perf_counter()
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    state = _current_request.get()
+    if state is None:
+        return
+    started = conn.info.pop('metrics_query_started', None)
+    if started is not None:
+        state[1] += 1
+        state[2] += time.perf_counter() - started
+
+
+def init_metrics(app) -> None:
+    """
+    Records latency, status codes, in-flight requests and SQL statement count and time of every request,
+    labelled by endpoint, and serves them at /metrics together with the counters of the app's LRU caches. Requests served by the ASGI app go through the
+    same hooks. SQL is attributed to the request active in the calling context, so work outside requests
+    (CLI commands, startup) is not counted.
+    """
+    if not app.config.get('METRICS_ENABLED', True):
+        return
+
+    metrics = app.extensions['metrics'] = Metrics()
+
+    @app.before_request
+    def start_request_metrics():
+        _current_request.set([time.perf_counter(), 0, 0.0, 500])
+        metrics.started()
+
+    @app.after_request
+    def record_status(response):
+        state = _current_request.get()
+        if state is not None:
+            state[3] = response.status_code
+        return response
+
+    @app.teardown_request
+    def finish_request_metrics(exc):
+        state = _current_request.get()
+        if state is None:
+            return
+        _current_request.set(None)
+        endpoint = request.url_rule.endpoint if request.url_rule is not None else 'unmatched'
+        metrics.finished(endpoint, request.method, state[3], time.perf_counter() - state[0], state[1], state[2])
+
+    @app.route('/metrics')
+    def export_metrics():
+        caches = {name: value for name, value in app.extensions.items() if isinstance(value, LRUCache)}
+        return Response(metrics.render(caches), content_type=CONTENT_TYPE)
@@ -3,10 +3,10 @@ from decimal import Decimal
 
 import jwt
 from flask import current_app
-from marshmallow import EXCLUDE, Schema, fields, validate
-from werkzeug.security import check_password_hash, generate_password_hash
+from marshmallow import EXCLUDE, Schema, ValidationError, fields, validate, validates
 
 from food_planner_app import db
+from food_planner_app.hashing import hash_password, needs_rehash, verify_password
 
 
 class Ingredient(db.Model):
@@ -17,6 +17,9 @@ class Ingredient(db.Model):
     calories = db.Column(db.Numeric(6,2), nullable=False)
     unit = db.Column(db.String(10), nullable=False, default="g")
 
+    __filterable__ = ('id', 'name', 'calories', 'unit')
+    __sortable__ = ('id', 'name', 'calories', 'unit')
+
     recipes = db.relationship(
         "RecipeIngredient",
         back_populates="ingredient",
@@ -32,8 +35,14 @@ class Recipe(db.Model):
 
     description = db.Column(db.Text)
     servings = db.Column(db.Integer, nullable=False, default=1)
+    total_calories = db.Column(db.Numeric(12,2), nullable=False, default=0, server_default="0", index=True)
+    calories_per_serving = db.Column(db.Numeric(12,2), nullable=False, default=0, server_default="0", index=True)
+
+    __table_args__ = (db.CheckConstraint('servings >= 1', name='ck_recipes_servings_positive'),)
+    __filterable__ = ('id', 'name', 'description', 'servings', 'total_calories', 'calories_per_serving')
+    __sortable__ = ('id', 'name', 'servings', 'total_calories', 'calories_per_serving')
 
-    ingredients = db.relationship("RecipeIngredient", back_populates="recipe", cascade="all, delete-orphan", lazy="joined")
+    ingredients = db.relationship("RecipeIngredient", back_populates="recipe", cascade="all, delete-orphan")
 
     def __repr__(self):
         return f"<Recipe {self.name}>"
@@ -49,10 +58,13 @@ class User(db.Model):
 
     @staticmethod
     def generate_hashed_password(password: str) -> str:
-        return generate_password_hash(password)
+        return hash_password(password)
 
     def is_password_valid(self, password: str) -> bool:
-        return check_password_hash(self.password, password)
+        return verify_password(self.password, password)
+
+    def is_password_outdated(self) -> bool:
+        return needs_rehash(self.password)
 
     def generate_jwt(self) -> bytes:
         payload = {
@@ -73,6 +85,13 @@ class RecipeIngredient(db.Model):
     ingredient = db.relationship("Ingredient", back_populates="recipes")
 
 
+class TableVersion(db.Model):
+    __tablename__ = "table_versions"
+
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
+
 class IngredientSchema(Schema):
     class Meta:
         unknown = EXCLUDE
@@ -93,6 +112,54 @@ class RecipeSchema(Schema):
     servings = fields.Integer(required=True, validate=validate.Range(min=1))
 
 
+class RecipeIngredientSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    name = fields.String(required=True, validate=validate.Length(min=2, max=50))
+    amount = fields.Decimal(
+        required=True, places=2, rounding=None,
+        validate=validate.Range(min=Decimal("0.00"), max=Decimal("9999.99"), min_inclusive=False)
+    )
+
+
+class RecipeCreateSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    name = fields.String(required=True, validate=validate.Length(min=2, max=50))
+    description = fields.String(load_default=None, allow_none=True)
+    instructions = fields.String(required=True)
+    servings = fields.Integer(load_default=1, validate=validate.Range(min=1))
+    ingredients = fields.List(fields.Nested(RecipeIngredientSchema), required=True)
+
+    @validates('ingredients')
+    def validate_ingredients(self, ingredients, **kwargs):
+        names = [ingredient['name'] for ingredient in ingredients]
+        duplicates = sorted({name for name in names if names.count(name) > 1})
+        if duplicates:
+            raise ValidationError(f"Duplicate ingredient: {', '.join(duplicates)}")
+
+
+class PlanQuerySchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    calories = fields.Float(required=True, validate=validate.Range(min=0, min_inclusive=False))
+    tolerance = fields.Float(load_default=100, validate=validate.Range(min=0))
+    days = fields.Integer(load_default=7, validate=validate.Range(min=1, max=14))
+    meals = fields.Integer(load_default=3, validate=validate.Range(min=1, max=6))
+    seed = fields.Integer(load_default=None)
+
+
+class ShoppingListItemSchema(Schema):
+    class Meta:
+        unknown = EXCLUDE
+
+    recipe_id = fields.Integer(required=True)
+    servings = fields.Integer(required=True, validate=validate.Range(min=1))
+
+
 class UserSchema(Schema):
     id = fields.Integer(dump_only=True)
     username = fields.String(required=True, validate=validate.Length(max=255))
@@ -116,7 +183,14 @@ class UserUpdateSchema(Schema):
 
 ingredient_schema = IngredientSchema()
 recipe_schema = RecipeSchema()
+recipe_create_schema = RecipeCreateSchema()
+plan_query_schema = PlanQuerySchema()
+shopping_list_schema = ShoppingListItemSchema(many=True)
 user_schema = UserSchema()
 user_password_update_schema = UserPasswordUpdateSchema()
 user_update_schema = UserUpdateSchema()
 
+
+
+# import after models creation to avoid circular imports
+from food_planner_app import nutrition, search, versions  # noqa: E402, F401
@@ -0,0 +1,77 @@
+from sqlalchemy import event, func, or_, select, update
+from sqlalchemy.orm import attributes
+
+from food_planner_app import db
+from food_planner_app.models import Ingredient, Recipe, RecipeIngredient
+from food_planner_app.versions import bump_table_versions
+
+
+def recipe_calories_subquery():
+    """
+    Correlated subquery summing amount * calories over the ingredients of a recipe.
+    It is the single source of truth for Recipe.total_calories.
+    """
+    return (
+        select(func.coalesce(func.sum(RecipeIngredient.amount * Ingredient.calories), 0))
+        .join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+        .where(RecipeIngredient.recipe_id == Recipe.id)
+        .scalar_subquery()
+    )
+
+
+def refresh_recipe_calories(session, recipe_ids=None, ingredient_ids=None) -> None:
+    """
+    Recomputes materialized calories of the recipes given by id or using any of the given ingredients.
+    Without arguments all recipes are recomputed.
+    """
+    criteria = []
+    if recipe_ids:
+        criteria.append(Recipe.id.in_(recipe_ids))
+    if ingredient_ids:
+        criteria.append(Recipe.id.in_(
+            select(RecipeIngredient.recipe_id).where(RecipeIngredient.ingredient_id.in_(ingredient_ids))
+        ))
+    if (recipe_ids is not None or ingredient_ids is not None) and not criteria:
+        return
+
+    total = recipe_calories_subquery()
+    stmt = update(Recipe.__table__).values(
+        total_calories=total,
+        calories_per_serving=total / Recipe.servings
+    )
+    if criteria:
+        stmt = stmt.where(or_(*criteria))
+    session.execute(stmt)
+    bump_table_versions(session, [Recipe.__tablename__])
+
+
+def _changed(obj, key: str) -> bool:
+    return attributes.get_history(obj, key).has_changes()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _refresh_after_flush(session, flush_context):
+    recipe_ids = set()
+    ingredient_ids = set()
+
+    for obj in list(session.new) + list(session.dirty) + list(session.deleted):
+        if isinstance(obj, RecipeIngredient):
+            recipe_ids.add(obj.recipe_id)
+        elif isinstance(obj, Ingredient) and obj not in session.new and _changed(obj, 'calories'):
+            ingredient_ids.add(obj.id)
+        elif isinstance(obj, Recipe) and obj in session.dirty and _changed(obj, 'servings'):
+            recipe_ids.add(obj.id)
+
+    recipe_ids.discard(None)
+    if recipe_ids or ingredient_ids:
+        refresh_recipe_calories(session, recipe_ids, ingredient_ids)
+        session.info['recipe_calories_stale'] = True
+
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _expire_after_flush(session, flush_context):
+    if not session.info.pop('recipe_calories_stale', False):
+        return
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, Recipe):
+            session.expire(obj, ['total_calories', 'calories_per_serving'])
@@ -0,0 +1,6 @@
+from flask import Blueprint
+
+plans_bp = Blueprint('plans', __name__)
+
+# import after Blueprint creation to avoid circular imports
+from food_planner_app.plans import plans  # noqa: E402
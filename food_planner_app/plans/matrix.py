@@ -0,0 +1,95 @@
+import numpy as np
+from sqlalchemy import select
+
+from food_planner_app import db
+from food_planner_app.models import Ingredient, Recipe, RecipeIngredient
+from food_planner_app.versions import get_versioned
+
+MATRIX_TABLES = (Recipe.__tablename__, RecipeIngredient.__tablename__, Ingredient.__tablename__)
+
+
+class CalorieMatrix:
+    """
+    Recipe x ingredient amount matrix stored in coordinate form (one entry per recipe ingredient),
+    multiplied by the ingredient calorie vector into per-serving calories of every recipe.
+    """
+
+    def __init__(self, recipe_ids, servings, rows, cols, amounts, calories):
+        self.recipe_ids = recipe_ids
+        self.servings = servings
+        self.rows = rows
+        self.cols = cols
+        self.amounts = amounts
+        self.calories = calories
+        totals = np.bincount(rows, weights=amounts * calories[cols], minlength=len(recipe_ids))
+        self.calories_per_serving = totals / servings
+
+    def __len__(self):
+        return len(self.recipe_ids)
+
+    @classmethod
+    def build(cls):
+        recipes = db.session.execute(select(Recipe.id, Recipe.servings).order_by(Recipe.id)).all()
+        ingredients = db.session.execute(select(Ingredient.id, Ingredient.calories).order_by(Ingredient.id)).all()
+        links = db.session.execute(
+            select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id, RecipeIngredient.amount)
+        ).all()
+
+        recipe_ids = np.fromiter((row[0] for row in recipes), dtype=np.int64, count=len(recipes))
+        servings = np.fromiter((row[1] for row in recipes), dtype=np.float64, count=len(recipes))
+        ingredient_ids = np.fromiter((row[0] for row in ingredients), dtype=np.int64, count=len(ingredients))
+        calories = np.fromiter((row[1] for row in ingredients), dtype=np.float64, count=len(ingredients))
+
+        rows = np.searchsorted(recipe_ids, np.fromiter((row[0] for row in links), dtype=np.int64, count=len(links)))
+        cols = np.searchsorted(ingredient_ids, np.fromiter((row[1] for row in links), dtype=np.int64, count=len(links)))
+        amounts = np.fromiter((row[2] for row in links), dtype=np.float64, count=len(links))
+
+        return cls(recipe_ids, servings, rows, cols, amounts, calories)
+
+
+def get_calorie_matrix() -> CalorieMatrix:
+    """
+    Returns the calorie matrix of the current app, rebuilding it only when
+    recipes, recipe ingredients or ingredients have been written since the last build.
+    """
+    return get_versioned('calorie_matrix', MATRIX_TABLES, CalorieMatrix.build)
+
+
+def generate_plan(matrix: CalorieMatrix, daily_calories: float, tolerance: float, days: int, meals: int,
+                  seed: int = None) -> list:
+    """
+    Picks `meals` recipes for each of `days` days so that every day lands within
+    `tolerance` of `daily_calories`. Each pick scores all recipes at once against the calories
+    still missing for the day and draws randomly among those within the per meal tolerance,
+    falling back to the closest one. Recipes are not repeated until the catalog runs out.
+    Returns a list of days, each being a list of matrix row indexes.
+    """
+    if not len(matrix):
+        return []
+
+    rng = np.random.default_rng(seed)
+    per_serving = matrix.calories_per_serving
+    available = np.ones(len(matrix), dtype=bool)
+    meal_tolerance = tolerance / meals
+
+    plan = []
+    for _ in range(days):
+        remaining = daily_calories
+        day = []
+        for meals_left in range(meals, 0, -1):
+            if not available.any():
+                available[:] = True
+
+            score = np.abs(per_serving - remaining / meals_left)
+            candidates = np.flatnonzero(available & (score <= meal_tolerance))
+            if candidates.size:
+                index = int(rng.choice(candidates))
+            else:
+                index = int(np.argmin(np.where(available, score, np.inf)))
+
+            available[index] = False
+            remaining -= per_serving[index]
+            day.append(index)
+        plan.append(day)
+
+    return plan
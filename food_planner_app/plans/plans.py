@@ -0,0 +1,114 @@
+from collections import Counter
+
+from flask import abort, jsonify
+from sqlalchemy import case, func, select
+from webargs.flaskparser import use_args
+
+from food_planner_app import db
+from food_planner_app.models import (
+    Ingredient,
+    Recipe,
+    RecipeIngredient,
+    plan_query_schema,
+    shopping_list_schema,
+)
+from food_planner_app.plans import plans_bp
+from food_planner_app.plans.matrix import generate_plan, get_calorie_matrix
+from food_planner_app.utils import validate_json_content_type
+
+
+@plans_bp.route('/plans/generate', methods=['GET'])
+@use_args(plan_query_schema, location='query', error_status_code=400)
+def generate(args: dict):
+    matrix = get_calorie_matrix()
+    plan = generate_plan(
+        matrix,
+        daily_calories=args['calories'],
+        tolerance=args['tolerance'],
+        days=args['days'],
+        meals=args['meals'],
+        seed=args['seed']
+    )
+
+    recipe_ids = {int(matrix.recipe_ids[index]) for day in plan for index in day}
+    rows = db.session.execute(
+        select(Recipe.id, Recipe.name, Recipe.servings).where(Recipe.id.in_(recipe_ids))
+    ).all()
+    rows_by_id = {row.id: row for row in rows}
+
+    data = []
+    for number, day in enumerate(plan, start=1):
+        recipes = []
+        for index in day:
+            row = rows_by_id[int(matrix.recipe_ids[index])]
+            recipes.append({
+                "id": row.id,
+                "name": row.name,
+                "servings": row.servings,
+                "calories_per_serving": round(float(matrix.calories_per_serving[index]), 2),
+            })
+        calories = round(sum(recipe["calories_per_serving"] for recipe in recipes), 2)
+        data.append({
+            "day": number,
+            "calories": calories,
+            "within_tolerance": abs(calories - args['calories']) <= args['tolerance'],
+            "recipes": recipes
+        })
+
+    return jsonify({
+        "success": True,
+        "days": args['days'],
+        "calories": args['calories'],
+        "tolerance": args['tolerance'],
+        "data": data
+    })
+
+
+@plans_bp.route('/shopping-list', methods=['POST'])
+@validate_json_content_type
+@use_args(shopping_list_schema, error_status_code=400)
+def shopping_list(args: list):
+    if not args:
+        abort(400, description="Provide at least one recipe")
+
+    servings = Counter()
+    for item in args:
+        servings[item['recipe_id']] += item['servings']
+
+    found = set(db.session.execute(select(Recipe.id).where(Recipe.id.in_(servings))).scalars())
+    missing = sorted(set(servings) - found)
+    if missing:
+        abort(404, description=f"Recipes not found: {', '.join(map(str, missing))}")
+
+    # amounts are stored per recipe, scale them to the requested servings before summing
+    scaled_amount = RecipeIngredient.amount * case(dict(servings), value=RecipeIngredient.recipe_id) / Recipe.servings
+    stmt = (
+        select(
+            Ingredient.name,
+            Ingredient.unit,
+            func.sum(scaled_amount).label('amount'),
+            func.sum(scaled_amount * Ingredient.calories).label('calories')
+        )
+        .select_from(RecipeIngredient)
+        .join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+        .join(Recipe, Recipe.id == RecipeIngredient.recipe_id)
+        .where(RecipeIngredient.recipe_id.in_(servings))
+        .group_by(Ingredient.id, Ingredient.name, Ingredient.unit)
+        .order_by(Ingredient.name)
+    )
+
+    data = [
+        {
+            "name": row.name,
+            "unit": row.unit,
+            "amount": round(float(row.amount), 2),
+            "calories": round(float(row.calories), 2)
+        }
+        for row in db.session.execute(stmt)
+    ]
+
+    return jsonify({
+        "success": True,
+        "data": data,
+        "records": len(data)
+    })
@@ -0,0 +1,87 @@
+import re
+import traceback
+from collections import Counter
+from pathlib import Path
+from typing import NamedTuple
+
+from sqlalchemy import event
+
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+WHITESPACE_RE = re.compile(r'\s+')
+
+
+class RecordedQuery(NamedTuple):
+    statement: str
+    parameters: object
+    call_site: str
+
+
+def _call_site() -> str:
+    """Innermost frame of the project's own code, skipping SQLAlchemy, Flask and this module."""
+    for frame in reversed(traceback.extract_stack()):
+        path = Path(frame.filename)
+        if path.is_relative_to(PROJECT_DIR) and path.name != 'query_counter.py' and 'site-packages' not in path.parts:
+            return f'{path.relative_to(PROJECT_DIR)}:{frame.lineno} in {frame.name}'
+    return '<unknown>'
+
+
+class QueryCounter:
+    """
+    Records every statement executed on `engine` while active, with the line of project code which caused it.
+
+        with QueryCounter(db.engine) as queries:
+            client.get('/api/v1/recipes')
+        queries.assert_at_most(4, 'recipes.get_recipes')
+
+    Iterating yields the SQL strings. Looking up call sites walks the stack for every statement,
+    pass capture_call_sites=False where only the count matters, e.g. when measuring latency.
+    """
+
+    def __init__(self, engine, capture_call_sites: bool = True):
+        self.engine = engine
+        self.capture_call_sites = capture_call_sites
+        self.queries = []
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc_info):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        call_site = _call_site() if self.capture_call_sites else ''
+        self.queries.append(RecordedQuery(statement, parameters, call_site))
+
+    def __len__(self):
+        return len(self.queries)
+
+    def __iter__(self):
+        return (query.statement for query in self.queries)
+
+    def clear(self) -> None:
+        self.queries.clear()
+
+    def report(self) -> str:
+        lines = []
+        for index, query in enumerate(self.queries, 1):
+            lines.append(f'{index:>3}. {WHITESPACE_RE.sub(" ", query.statement).strip()}')
+            if query.call_site:
+                lines.append(f'     at {query.call_site}')
+
+        repeated = Counter(query.statement for query in self.queries)
+        repeated = [(statement, count) for statement, count in repeated.items() if count > 1]
+        if repeated:
+            lines.append('Repeated statements (possible N+1):')
+            for statement, count in repeated:
+                sites = sorted({query.call_site for query in self.queries if query.statement == statement} - {''})
+                lines.append(f'  {count}x {WHITESPACE_RE.sub(" ", statement).strip()[:120]}')
+                lines.extend(f'     at {site}' for site in sites)
+        return '\n'.join(lines)
+
+    def assert_at_most(self, budget: int, label: str = 'block') -> None:
+        """Fails with every recorded statement and its call site when more than `budget` were executed."""
+        if len(self.queries) > budget:
+            raise AssertionError(
+                f'{label} executed {len(self.queries)} queries, budget is {budget}:\n{self.report()}'
+            )
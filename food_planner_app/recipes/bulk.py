@@ -0,0 +1,50 @@
+from sqlalchemy import insert, select
+
+from food_planner_app.models import Recipe, RecipeIngredient
+from food_planner_app.nutrition import refresh_recipe_calories
+from food_planner_app.search import TEXT_VERSION
+from food_planner_app.utils import chunked
+from food_planner_app.versions import bump_table_versions
+
+
+def insert_recipes(session, recipes: list, ingredient_ids: dict, batch_size: int) -> dict:
+    """
+    Inserts validated recipes and their ingredients with one executemany per table and batch.
+    `ingredient_ids` maps ingredient names to ids. Returns a mapping of recipe names to new ids.
+    Flush events are bypassed, so calories and table versions are refreshed explicitly.
+    """
+    recipe_ids = {}
+
+    for batch in chunked(recipes, batch_size):
+        session.execute(insert(Recipe.__table__), [
+            {
+                'name': recipe['name'],
+                'description': recipe.get('description'),
+                'servings': recipe.get('servings', 1),
+            }
+            for recipe in batch
+        ])
+
+        names = [recipe['name'] for recipe in batch]
+        batch_ids = dict(session.execute(select(Recipe.name, Recipe.id).where(Recipe.name.in_(names))).all())
+
+        links = [
+            {
+                'recipe_id': batch_ids[recipe['name']],
+                'ingredient_id': ingredient_ids[ingredient['name']],
+                'amount': ingredient['amount'],
+            }
+            for recipe in batch
+            for ingredient in recipe['ingredients']
+        ]
+        if links:
+            session.execute(insert(RecipeIngredient.__table__), links)
+
+        refresh_recipe_calories(session, list(batch_ids.values()))
+        recipe_ids.update(batch_ids)
+
+    if recipe_ids:
+        # recipes version is bumped by refresh_recipe_calories
+        bump_table_versions(session, [RecipeIngredient.__tablename__, TEXT_VERSION])
+
+    return recipe_ids
@@ -0,0 +1,133 @@
+import threading
+from collections import Counter
+
+from flask import current_app, has_app_context
+from sqlalchemy import event, select
+
+from food_planner_app import db
+from food_planner_app.models import RecipeIngredient
+from food_planner_app.versions import get_versioned, update_versioned
+
+INDEX_KEY = 'ingredient_index'
+PENDING_KEY = 'ingredient_index_pending'
+
+
+class IngredientIndex:
+    """
+    Recipes as bitsets over dense ingredient positions: bit `n` of a recipe mask is set when the recipe uses
+    the ingredient at position `n`. Positions are handed out by popularity, so the staples most recipes use
+    share the lowest bits and a typical mask is a word or two. A posting list per ingredient narrows a
+    lookup down to recipes sharing at least one ingredient with the pantry, each checked with a few
+    integer operations.
+    """
+
+    def __init__(self, rows):
+        self.positions = {}
+        self.masks = {}
+        self.postings = {}
+        self._ingredient_ids = []
+        self._lock = threading.Lock()
+
+        rows = list(rows)
+        popularity = Counter(ingredient_id for _, ingredient_id in rows)
+        for ingredient_id, _ in popularity.most_common():
+            self._position(ingredient_id)
+        self._load(rows)
+
+    def _position(self, ingredient_id: int) -> int:
+        position = self.positions.get(ingredient_id)
+        if position is None:
+            position = self.positions[ingredient_id] = len(self._ingredient_ids)
+            self._ingredient_ids.append(ingredient_id)
+        return position
+
+    def _load(self, rows) -> None:
+        for recipe_id, ingredient_id in rows:
+            self.masks[recipe_id] = self.masks.get(recipe_id, 0) | (1 << self._position(ingredient_id))
+            self.postings.setdefault(ingredient_id, set()).add(recipe_id)
+
+    def _drop(self, recipe_id: int) -> None:
+        mask = self.masks.pop(recipe_id, 0)
+        while mask:
+            low = mask & -mask
+            self.postings[self._ingredient_ids[low.bit_length() - 1]].discard(recipe_id)
+            mask ^= low
+
+    def update(self, recipe_ids, rows) -> None:
+        """Replaces masks of the given recipes with `rows`, recipes without rows are dropped."""
+        with self._lock:
+            for recipe_id in recipe_ids:
+                self._drop(recipe_id)
+            self._load(rows)
+
+    def search(self, ingredient_ids, max_missing: int = 0) -> list:
+        """
+        Returns (recipe id, number of missing ingredients) of recipes needing at most `max_missing`
+        ingredients outside of `ingredient_ids`, fewest missing first.
+        """
+        with self._lock:
+            have = 0
+            candidates = set()
+            for ingredient_id in ingredient_ids:
+                if ingredient_id in self.positions:
+                    have |= 1 << self.positions[ingredient_id]
+                    candidates.update(self.postings.get(ingredient_id, ()))
+
+            matches = []
+            masks = self.masks
+            for recipe_id in candidates:
+                missing = (masks[recipe_id] & ~have).bit_count()
+                if missing <= max_missing:
+                    matches.append((missing, recipe_id))
+        matches.sort()
+
+        return [(recipe_id, missing) for missing, recipe_id in matches]
+
+
+def _load_rows(recipe_ids=None):
+    stmt = select(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id)
+    if recipe_ids is not None:
+        stmt = stmt.where(RecipeIngredient.recipe_id.in_(recipe_ids))
+    return db.session.execute(stmt).all()
+
+
+def get_ingredient_index() -> IngredientIndex:
+    """
+    Returns the index of the current app. Writes made through this process are applied incrementally on commit,
+    any other change of the recipe_ingredients version (bulk imports, other workers) triggers a full rebuild.
+    """
+    return get_versioned(INDEX_KEY, (RecipeIngredient.__tablename__,), lambda: IngredientIndex(_load_rows()))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changes(session, flush_context):
+    changed = [*session.new, *session.deleted, *(obj for obj in session.dirty if session.is_modified(obj))]
+    recipe_ids = {obj.recipe_id for obj in changed if isinstance(obj, RecipeIngredient)}
+    if recipe_ids:
+        session.info.setdefault(PENDING_KEY, {'recipe_ids': set()})['recipe_ids'].update(recipe_ids)
+
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _load_changes(session, flush_context):
+    pending = session.info.get(PENDING_KEY)
+    if pending is None or not has_app_context() or INDEX_KEY not in current_app.extensions:
+        return
+
+    pending['rows'] = _load_rows(pending['recipe_ids'])
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_changes(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending is None or 'rows' not in pending or not has_app_context():
+        return
+
+    update_versioned(
+        session, INDEX_KEY, RecipeIngredient.__tablename__,
+        lambda index: index.update(pending['recipe_ids'], pending['rows'])
+    )
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop(PENDING_KEY, None)
@@ -1,40 +1,172 @@
-from flask import abort, jsonify, request
+from collections import defaultdict
+
+from flask import abort, current_app, jsonify, request
+from marshmallow import ValidationError
+from webargs.flaskparser import use_args
 from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
 
 from food_planner_app import db
-from food_planner_app.models import Ingredient, Recipe, RecipeIngredient
+from food_planner_app.models import Ingredient, Recipe, RecipeIngredient, RecipeSchema, recipe_create_schema
 from food_planner_app.recipes import recipes_bp
+from food_planner_app.recipes.bulk import insert_recipes
+from food_planner_app.recipes.pantry import get_ingredient_index
+from food_planner_app.recipes.sampling import sample_recipe_ids
+from food_planner_app.search import get_inverted_index, get_search_backend, search_statement, tokenize
+from food_planner_app.serialization import compile_serializer, to_float
 from food_planner_app.utils import (
+    apply_filter,
+    apply_order,
+    apply_projection,
+    conditional_get,
+    get_field_selection,
     get_pagination,
+    paginate_sequence,
+    stream_ndjson,
     token_required,
     validate_json_content_type,
 )
 
+RECIPE_TABLES = (Recipe.__tablename__, RecipeIngredient.__tablename__, Ingredient.__tablename__)
+RECIPE_FIELDS = ('id', 'name', 'description', 'servings', 'total_calories', 'calories_per_serving')
+RECIPE_INGREDIENT_COLUMNS = {
+    'name': Ingredient.name,
+    'amount': RecipeIngredient.amount,
+    'unit': Ingredient.unit,
+    'calories': Ingredient.calories,
+}
+
+
+NUMERIC_FIELDS = ('total_calories', 'calories_per_serving', 'amount', 'calories')
+
+
+def _get_serializer(fields: tuple):
+    return compile_serializer(fields, tuple((field, to_float) for field in fields if field in NUMERIC_FIELDS))
+
+
+def _get_recipe_ingredients(recipe_ids, fields=tuple(RECIPE_INGREDIENT_COLUMNS)) -> dict:
+    """
+    Loads the given ingredient fields of all given recipes with a single projection query, grouped by recipe id.
+    The ingredients table is only joined when one of its columns is selected.
+    """
+    stmt = (
+        select(RecipeIngredient.recipe_id, *[RECIPE_INGREDIENT_COLUMNS[field] for field in fields])
+        .where(RecipeIngredient.recipe_id.in_(recipe_ids))
+        .order_by(RecipeIngredient.recipe_id, RecipeIngredient.ingredient_id)
+    )
+    if any(field != 'amount' for field in fields):
+        stmt = stmt.join(Ingredient, Ingredient.id == RecipeIngredient.ingredient_id)
+
+    serialize = _get_serializer(fields)
+    ingredients = defaultdict(list)
+    for row in db.session.execute(stmt):
+        ingredients[row.recipe_id].append(serialize(row))
+    return ingredients
+
+
+def _serialize_recipes(recipes, fields=RECIPE_FIELDS, ingredient_fields=tuple(RECIPE_INGREDIENT_COLUMNS)) -> list:
+    """Works on Recipe entities as well as projected rows, `ingredient_fields=None` leaves ingredients out."""
+    ingredients = {}
+    if recipes and ingredient_fields:
+        ingredients = _get_recipe_ingredients([recipe.id for recipe in recipes], ingredient_fields)
+
+    serialize = _get_serializer(fields)
+    data = [serialize(recipe) for recipe in recipes]
+    if ingredient_fields:
+        for recipe, item in zip(recipes, data):
+            item["ingredients"] = ingredients.get(recipe.id, [])
+    return data
+
+
+def _get_recipe_field_selection() -> tuple:
+    """Recipe columns and ingredient fields requested with ?fields=..., everything when not given."""
+    fields, nested = get_field_selection(Recipe, {'ingredients': tuple(RECIPE_INGREDIENT_COLUMNS)})
+    if fields is None:
+        return RECIPE_FIELDS, tuple(RECIPE_INGREDIENT_COLUMNS)
+    return fields, nested.get('ingredients')
+
 
 @recipes_bp.route('/recipes', methods=['GET'])
+@conditional_get(*RECIPE_TABLES)
 def get_recipes():
+    fields, ingredient_fields = _get_recipe_field_selection()
     query = select(Recipe)
+    query = apply_order(Recipe, query)
+    query = apply_filter(Recipe, query)
+    query = apply_projection(Recipe, query, fields)
     items, pagination = get_pagination(query, 'recipes.get_recipes')
 
-    data = []
+    data = _serialize_recipes(items, fields, ingredient_fields)
 
-    for recipe in items:
-        data.append({
-            "id": recipe.id,
-            "name": recipe.name,
-            "description": recipe.description,
-            "servings": recipe.servings,
-            "ingredients": [
-                {
-                    "name": ri.ingredient.name,
-                    "amount": float(ri.amount),
-                    "unit": ri.ingredient.unit,
-                    "calories": float(ri.ingredient.calories),
-                }
-                for ri in recipe.ingredients
-            ]
-        })
+    return jsonify({
+        "success": True,
+        "data": data,
+        "records_on_page": len(data),
+        "pagination": pagination
+    })
+
+
+@recipes_bp.route('/recipes/export', methods=['GET'])
+@conditional_get(*RECIPE_TABLES)
+def export_recipes():
+    fields, ingredient_fields = _get_recipe_field_selection()
+    query = select(Recipe)
+    query = apply_order(Recipe, query).order_by(Recipe.id)
+    query = apply_filter(Recipe, query)
+    query = apply_projection(Recipe, query, fields)
+
+    return stream_ndjson(query, lambda recipes: _serialize_recipes(recipes, fields, ingredient_fields))
+
+
+@recipes_bp.route('/recipes/search', methods=['GET'])
+@conditional_get(*RECIPE_TABLES)
+def search_recipes():
+    query = request.args.get('q', '')
+    if not tokenize(query):
+        abort(400, description="Search query q is required")
+
+    backend = get_search_backend()
+    if backend == 'memory':
+        recipe_ids, pagination = paginate_sequence(get_inverted_index().search(query), 'recipes.search_recipes')
+        items = db.session.execute(select(Recipe).where(Recipe.id.in_(recipe_ids))).scalars().all()
+        items.sort(key=lambda recipe: recipe_ids.index(recipe.id))
+    else:
+        # relevance is not a sortable column, so search always paginates by page, like the memory backend
+        items, pagination = get_pagination(search_statement(query, backend), 'recipes.search_recipes', keyset=False)
+
+    data = _serialize_recipes(items)
+
+    return jsonify({
+        "success": True,
+        "data": data,
+        "records_on_page": len(data),
+        "pagination": pagination
+    })
+
+
+@recipes_bp.route('/recipes/by-ingredients', methods=['GET'])
+@conditional_get(*RECIPE_TABLES)
+def recipes_by_ingredients():
+    names = {name.strip().lower() for name in request.args.get('have', '').split(',') if name.strip()}
+    if not names:
+        abort(400, description="Parameter have must be a comma separated list of ingredient names")
+    max_missing = max(min(request.args.get('missing', 2, type=int), 10), 0)
+
+    ingredient_ids = db.session.execute(
+        select(Ingredient.id).where(func.lower(Ingredient.name).in_(names))
+    ).scalars().all()
+
+    matches, pagination = paginate_sequence(
+        get_ingredient_index().search(ingredient_ids, max_missing),
+        'recipes.recipes_by_ingredients'
+    )
+    missing = dict(matches)
+    items = db.session.execute(select(Recipe).where(Recipe.id.in_(missing))).scalars().all()
+    items.sort(key=lambda recipe: (missing[recipe.id], recipe.id))
+
+    data = _serialize_recipes(items)
+    for recipe in data:
+        recipe["missing"] = missing[recipe["id"]]
 
     return jsonify({
         "success": True,
@@ -45,27 +177,14 @@ def get_recipes():
 
 
 @recipes_bp.route('/recipes/<int:recipe_id>', methods=['GET'])
+@conditional_get(*RECIPE_TABLES)
 def get_recipe(recipe_id: int):
     recipe = db.session.get(Recipe, recipe_id)
 
     if recipe is None:
         abort(404)
 
-    data = {
-        "id": recipe.id,
-        "name": recipe.name,
-        "description": recipe.description,
-        "servings": recipe.servings,
-        "ingredients": [
-            {
-                "name": ri.ingredient.name,
-                "amount": float(ri.amount),
-                "unit": ri.ingredient.unit,
-                "calories": float(ri.ingredient.calories),
-            }
-            for ri in recipe.ingredients
-        ]
-    }
+    data = _serialize_recipes([recipe])[0]
 
     return jsonify({
         "success": True,
@@ -75,14 +194,20 @@ def get_recipe(recipe_id: int):
 
 @recipes_bp.route('/recipes/random', methods=['GET'])
 def random_recipes():
-    days = min(int(request.args.get("days", 7)), 14)
+    days = max(min(request.args.get("days", 7, type=int), 14), 0)
+    seed = request.args.get("seed", type=int)
 
-    recipes = (
-        db.session.query(Recipe)
-        .order_by(func.random())
-        .limit(days)
-        .all()
-    )
+    exclude = request.args.get("exclude", "")
+    try:
+        exclude = {int(recipe_id) for recipe_id in exclude.split(",") if recipe_id}
+    except ValueError:
+        abort(400, description="Exclude must be a comma separated list of recipe ids")
+
+    recipe_ids = sample_recipe_ids(days, seed=seed, exclude=exclude)
+    rows = db.session.execute(
+        select(Recipe.id, Recipe.name, Recipe.servings).where(Recipe.id.in_(recipe_ids))
+    ).all()
+    rows.sort(key=lambda row: recipe_ids.index(row.id))
 
     data = [
         {
@@ -90,7 +215,7 @@ def random_recipes():
             "name": r.name,
             "servings": r.servings
         }
-        for r in recipes
+        for r in rows
     ]
 
     return jsonify({
@@ -103,39 +228,26 @@ def random_recipes():
 @recipes_bp.route('/recipes', methods=['POST'])
 @token_required
 @validate_json_content_type
-def create_recipe(_user_id: int):
-    data = request.get_json()
-
-    required_fields = ["name", "instructions", "ingredients"]
-    missing = [f for f in required_fields if f not in data]
-
-    if missing:
-        return jsonify({
-            "success": False,
-            "message": {f: ["Missing data for required field."] for f in missing}
-        }), 400
+@use_args(recipe_create_schema, error_status_code=400)
+def create_recipe(_user_id: int, data: dict):
+    ingredients = data["ingredients"]
+    ingredient_ids = dict(db.session.execute(
+        select(Ingredient.name, Ingredient.id).where(Ingredient.name.in_([ing["name"] for ing in ingredients]))
+    ).all())
+    for ing in ingredients:
+        if ing["name"] not in ingredient_ids:
+            abort(400, description=f"Ingredient not found: {ing['name']}")
 
     recipe = Recipe(
         name=data["name"],
-        description=data.get("description"),
-        servings=data.get("servings", 1),
+        description=data["description"],
+        servings=data["servings"],
     )
+    recipe.ingredients = [
+        RecipeIngredient(ingredient_id=ingredient_ids[ing["name"]], amount=ing["amount"])
+        for ing in ingredients
+    ]
     db.session.add(recipe)
-    db.session.flush()
-
-    for ing in data.get("ingredients", []):
-        ingredient = Ingredient.query.filter_by(name=ing["name"]).first()
-        if not ingredient:
-            abort(400, description=f"Ingredient not found: {ing['name']}")
-
-        db.session.add(
-            RecipeIngredient(
-                recipe_id=recipe.id,
-                ingredient_id=ingredient.id,
-                amount=ing["amount"],
-            )
-        )
-
     db.session.commit()
 
     return jsonify({
@@ -147,17 +259,82 @@ def create_recipe(_user_id: int):
     }), 201
 
 
-@recipes_bp.route('/recipes/<int:recipe_id>', methods=['PUT'])
+@recipes_bp.route('/recipes/bulk', methods=['POST'])
 @token_required
 @validate_json_content_type
-def update_recipe(_user_id: int, recipe_id: int):
+def create_recipes_bulk(_user_id: int):
     data = request.get_json()
 
+    if not isinstance(data, list) or not data:
+        abort(400, description="Request body must be a non-empty list of recipes")
+
+    results = [{"index": index, "success": False} for index in range(len(data))]
+    items = {}
+    errors = {}
+    for index, item in enumerate(data):
+        try:
+            items[index] = recipe_create_schema.load(item)
+            errors[index] = None
+        except ValidationError as err:
+            errors[index] = err.messages
+
+    ingredient_names = {ing["name"] for item in items.values() for ing in item["ingredients"]}
+    recipe_names = {item["name"] for item in items.values()}
+
+    ingredient_ids = dict(db.session.execute(
+        select(Ingredient.name, Ingredient.id).where(Ingredient.name.in_(ingredient_names))
+    ).all())
+    existing = set(db.session.execute(
+        select(Recipe.name).where(Recipe.name.in_(recipe_names))
+    ).scalars())
+
+    seen = set()
+    recipes = []
+    for index, item in items.items():
+        unknown = [ing["name"] for ing in item["ingredients"] if ing["name"] not in ingredient_ids]
+        if unknown:
+            errors[index] = f"Ingredient not found: {', '.join(unknown)}"
+        elif item["name"] in existing or item["name"] in seen:
+            errors[index] = "Recipe with this name already exists"
+        else:
+            seen.add(item["name"])
+            recipes.append(item)
+
+    try:
+        recipe_ids = insert_recipes(db.session, recipes, ingredient_ids, current_app.config.get('BULK_BATCH_SIZE', 500))
+        db.session.commit()
+    except IntegrityError:
+        db.session.rollback()
+        abort(409, description="Recipes conflict with concurrently created data")
+
+    for index, result in enumerate(results):
+        if errors[index] is None:
+            result["success"] = True
+            result["id"] = recipe_ids[items[index]["name"]]
+            result["name"] = items[index]["name"]
+        else:
+            result["message"] = errors[index]
+
+    return jsonify({
+        "success": bool(recipe_ids),
+        "created": len(recipe_ids),
+        "failed": len(data) - len(recipe_ids),
+        "data": results
+    }), 201 if recipe_ids else 400
+
+
+@recipes_bp.route('/recipes/<int:recipe_id>', methods=['PUT'])
+@token_required
+@validate_json_content_type
+@use_args(RecipeSchema(only=('servings',), partial=True), error_status_code=400)
+def update_recipe(_user_id: int, data: dict, recipe_id: int):
     recipe = db.session.get(Recipe, recipe_id)
 
     if recipe is None:
         abort(404)
 
+    # only servings is validated, calories per serving divide by it; name and description are copied as sent
+    data = {**request.get_json(), **data}
     for field in ("name", "description", "servings"):
         if field in data:
             setattr(recipe, field, data[field])
@@ -0,0 +1,68 @@
+import random
+from array import array
+
+from sqlalchemy import func, select
+
+from food_planner_app import db
+from food_planner_app.models import Recipe
+from food_planner_app.versions import get_versioned
+
+PROBE_ROUNDS = 4
+IDS_KEY = 'recipe_ids'
+
+
+def _probe(candidates: list) -> set:
+    """Returns the candidate ids which exist, with one primary key lookup per candidate."""
+    return set(db.session.execute(select(Recipe.id).where(Recipe.id.in_(candidates))).scalars())
+
+
+def _all_recipe_ids() -> array:
+    """Every recipe id of the catalog, cached per app and reloaded when the recipes table version changes."""
+    return get_versioned(
+        IDS_KEY, (Recipe.__tablename__,),
+        lambda: array('q', db.session.execute(select(Recipe.id).order_by(Recipe.id)).scalars())
+    )
+
+
+def sample_recipe_ids(count: int, seed: int = None, exclude=()) -> list:
+    """
+    Picks up to `count` distinct recipe ids uniformly at random.
+    Each round draws untried random ids of the [min, max] id range and keeps the ones that exist, so every
+    recipe is equally likely however the ids are spread. After PROBE_ROUNDS rounds with misses (a sparse
+    id range) the rest is sampled from the cached array of all ids.
+    The same seed gives the same ids as long as the catalog does not change.
+    """
+    if count <= 0:
+        return []
+
+    low, high = db.session.execute(select(func.min(Recipe.id), func.max(Recipe.id))).one()
+    if low is None:
+        return []
+
+    rng = random.Random(seed)
+    skip = set(exclude)
+    tried = {recipe_id for recipe_id in skip if low <= recipe_id <= high}
+    chosen = []
+
+    for _ in range(PROBE_ROUNDS):
+        wanted = min(2 * (count - len(chosen)), high - low + 1 - len(tried))
+        if wanted <= 0:
+            break
+
+        candidates = []
+        while len(candidates) < wanted:
+            candidate = rng.randint(low, high)
+            if candidate not in tried:
+                tried.add(candidate)
+                candidates.append(candidate)
+
+        found = _probe(candidates)
+        chosen.extend(candidate for candidate in candidates if candidate in found)
+        del chosen[count:]
+        if len(chosen) == count:
+            return chosen
+
+    skip.update(chosen)
+    eligible = [recipe_id for recipe_id in _all_recipe_ids() if recipe_id not in skip]
+    chosen.extend(rng.sample(eligible, min(count - len(chosen), len(eligible))))
+    return chosen
@@ -0,0 +1,86 @@
+import random
+import time
+from contextlib import contextmanager
+
+from flask import current_app, has_app_context, has_request_context, request
+from flask_sqlalchemy.session import Session
+from sqlalchemy import event
+
+READ_METHODS = {'GET', 'HEAD'}
+WROTE_KEY = 'wrote_to_primary'
+REPLICA_KEY = 'replica_bind_key'
+PRIMARY_KEY = 'read_from_primary'
+
+
+class RoutingSession(Session):
+    """
+    Sends SELECTs issued while handling GET and HEAD requests to one of the REPLICA_BINDS engines.
+    Everything else goes to the primary. The replica is picked once per session, i.e. per request.
+    A session that has written sticks to the primary until it is removed, and all sessions of the process
+    read from the primary for REPLICA_LAG_TOLERANCE seconds after a committed write.
+
+    REPLICA_LAG_TOLERANCE is a fixed window, not a measurement: it only covers writes committed by this
+    process, so a client whose write went to another worker may read a replica that has not applied it yet,
+    and a replica lagging longer than the window is read anyway.
+    """
+
+    def get_bind(self, mapper=None, clause=None, bind=None, **kwargs):
+        if bind is None:
+            if getattr(clause, 'is_dml', False):
+                self.info[WROTE_KEY] = True
+            elif self._is_replica_read(clause):
+                # one replica for the whole session, so versions and rows of a request come from the same one
+                if REPLICA_KEY not in self.info:
+                    self.info[REPLICA_KEY] = replica_bind_key(current_app)
+                bind_key = self.info[REPLICA_KEY]
+                if bind_key is not None:
+                    return self._db.engines[bind_key]
+        return super().get_bind(mapper=mapper, clause=clause, bind=bind, **kwargs)
+
+    def _is_replica_read(self, clause) -> bool:
+        if not has_request_context() or request.method not in READ_METHODS:
+            return False
+        if self._flushing or self.info.get(WROTE_KEY) or self.info.get(PRIMARY_KEY):
+            return False
+        return getattr(clause, 'is_select', False) and clause._for_update_arg is None
+
+
+@contextmanager
+def primary_reads(session):
+    """
+    Sends every read of `session` to the primary while active. Used around process-wide caches keyed by
+    table versions: the versions and the rows they describe must come from the same engine, or a lagging
+    replica makes the version seen by readers differ from the one the cache was built at, on every request.
+    """
+    previous = session.info.get(PRIMARY_KEY, False)
+    session.info[PRIMARY_KEY] = True
+    try:
+        yield
+    finally:
+        session.info[PRIMARY_KEY] = previous
+
+
+def replica_bind_key(app):
+    """
+    Picks one of the REPLICA_BINDS to read from. Returns None when there are no replicas or
+    this process committed a write less than REPLICA_LAG_TOLERANCE seconds ago.
+    """
+    binds = app.config.get('REPLICA_BINDS')
+    if not binds:
+        return None
+
+    last_write = app.extensions.get('last_primary_write')
+    if last_write is not None and time.monotonic() - last_write < app.config.get('REPLICA_LAG_TOLERANCE', 5):
+        return None
+    return random.choice(binds)
+
+
+@event.listens_for(RoutingSession, 'after_flush')
+def _mark_written(session, flush_context):
+    session.info[WROTE_KEY] = True
+
+
+@event.listens_for(RoutingSession, 'after_commit')
+def _remember_write(session):
+    if session.info.get(WROTE_KEY) and has_app_context():
+        current_app.extensions['last_primary_write'] = time.monotonic()
@@ -0,0 +1,225 @@
+import math
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import Counter, defaultdict
+from itertools import chain
+
+from flask import current_app, has_app_context
+from sqlalchemy import DDL, column, event, select, table, text
+from sqlalchemy.orm import attributes
+from sqlalchemy.dialects.mysql import match
+
+from food_planner_app import db
+from food_planner_app.models import Recipe
+from food_planner_app.versions import bump_table_versions, get_versioned, update_versioned
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+# version counter of recipe names and descriptions, unlike the recipes counter not bumped by calorie refreshes
+TEXT_VERSION = 'recipes.text'
+INDEX_KEY = 'search_index'
+PENDING_KEY = 'search_index_pending'
+
+recipes_fts = table('recipes_fts', column('rowid'), column('rank'))
+
+SQLITE_FTS_DDL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS recipes_fts "
+    "USING fts5(name, description, content='recipes', content_rowid='id')",
+    "CREATE TRIGGER IF NOT EXISTS recipes_fts_insert AFTER INSERT ON recipes BEGIN "
+    "INSERT INTO recipes_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS recipes_fts_delete AFTER DELETE ON recipes BEGIN "
+    "INSERT INTO recipes_fts(recipes_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS recipes_fts_update AFTER UPDATE OF name, description ON recipes BEGIN "
+    "INSERT INTO recipes_fts(recipes_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO recipes_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+]
+MYSQL_FULLTEXT_DDL = "ALTER TABLE recipes ADD FULLTEXT INDEX ix_recipes_fulltext (name, description)"
+
+
+def _sqlite_has_fts5(ddl, target, bind, **kw) -> bool:
+    options = bind.exec_driver_sql('PRAGMA compile_options').scalars().all()
+    return 'ENABLE_FTS5' in options
+
+
+# keep the full-text index next to the recipes table whenever it is created with create_all()
+for statement in SQLITE_FTS_DDL:
+    event.listen(Recipe.__table__, 'after_create', DDL(statement).execute_if(dialect='sqlite', callable_=_sqlite_has_fts5))
+event.listen(Recipe.__table__, 'after_create', DDL(MYSQL_FULLTEXT_DDL).execute_if(dialect='mysql'))
+event.listen(Recipe.__table__, 'before_drop', DDL('DROP TABLE IF EXISTS recipes_fts').execute_if(dialect='sqlite'))
+
+
+def tokenize(value: str) -> list:
+    return TOKEN_RE.findall(value.lower()) if value else []
+
+
+class InvertedIndex:
+    """
+    In-process token -> {recipe id: term frequency} index ranking matches with TF-IDF.
+    Like the FTS5 and FULLTEXT queries of search_statement, every query token matches as a prefix.
+    """
+
+    def __init__(self, documents):
+        self.postings = defaultdict(dict)
+        # recipe id -> its distinct tokens, to take a recipe out of the postings again
+        self.documents = {}
+        self._lock = threading.Lock()
+        for document in documents:
+            self._add(*document)
+        self.tokens = sorted(self.postings)
+
+    @property
+    def size(self) -> int:
+        return len(self.documents)
+
+    def _add(self, recipe_id: int, name: str, description: str) -> list:
+        """Adds a recipe to the postings and returns the tokens which were not indexed before."""
+        new_tokens = []
+        frequencies = Counter(tokenize(name) + tokenize(description))
+        for token, frequency in frequencies.items():
+            if token not in self.postings:
+                new_tokens.append(token)
+            self.postings[token][recipe_id] = frequency
+        self.documents[recipe_id] = tuple(frequencies)
+        return new_tokens
+
+    def _drop(self, recipe_id: int) -> None:
+        for token in self.documents.pop(recipe_id, ()):
+            postings = self.postings[token]
+            del postings[recipe_id]
+            if not postings:
+                del self.postings[token]
+                del self.tokens[bisect_left(self.tokens, token)]
+
+    def update(self, recipe_ids, documents) -> None:
+        """Replaces the recipes `recipe_ids` by their current (id, name, description) rows, deleted recipes have none."""
+        with self._lock:
+            for recipe_id in recipe_ids:
+                self._drop(recipe_id)
+            for document in documents:
+                for token in self._add(*document):
+                    insort(self.tokens, token)
+
+    def _expand(self, prefix: str) -> list:
+        start = bisect_left(self.tokens, prefix)
+        end = start
+        while end < len(self.tokens) and self.tokens[end].startswith(prefix):
+            end += 1
+        return self.tokens[start:end]
+
+    def search(self, query: str) -> list:
+        """Returns ids of recipes containing a word starting with every query token, best matches first."""
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        with self._lock:
+            scores = self._score(tokens)
+        return [recipe_id for recipe_id, _ in sorted(scores.items(), key=lambda item: (-item[1], item[0]))]
+
+    def _score(self, tokens: list) -> Counter:
+        scores = None
+        for token in tokens:
+            keys = self._expand(token)
+            token_scores = Counter()
+            for key in keys:
+                postings = self.postings[key]
+                idf = math.log(1 + self.size / len(postings))
+                for recipe_id, frequency in postings.items():
+                    token_scores[recipe_id] += frequency * idf
+
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = Counter({recipe_id: scores[recipe_id] + score
+                                  for recipe_id, score in token_scores.items() if recipe_id in scores})
+            if not scores:
+                break
+        return scores
+
+
+def get_search_backend() -> str:
+    """'sqlite' (FTS5), 'mysql' (FULLTEXT) or 'memory', unless forced by FULL_TEXT_SEARCH."""
+    backend = current_app.config.get('FULL_TEXT_SEARCH', 'auto')
+    if backend != 'auto':
+        return backend
+
+    backend = current_app.extensions.get('search_backend')
+    if backend is None:
+        dialect = db.engine.dialect.name
+        backend = 'memory'
+        if dialect == 'mysql':
+            backend = dialect
+        elif dialect == 'sqlite':
+            exists = db.session.execute(
+                text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'recipes_fts'")
+            ).scalar()
+            backend = dialect if exists else 'memory'
+        current_app.extensions['search_backend'] = backend
+    return backend
+
+
+def _load_documents(recipe_ids=None):
+    stmt = select(Recipe.id, Recipe.name, Recipe.description)
+    if recipe_ids is not None:
+        stmt = stmt.where(Recipe.id.in_(recipe_ids))
+    return db.session.execute(stmt).all()
+
+
+def get_inverted_index() -> InvertedIndex:
+    """
+    Returns the in-process index. Recipe writes made through this process are applied incrementally on commit,
+    any other change of the recipes.text version (bulk imports, other workers) triggers a full rebuild.
+    """
+    return get_versioned(INDEX_KEY, (TEXT_VERSION,), lambda: InvertedIndex(_load_documents()))
+
+
+@event.listens_for(db.session, 'after_flush')
+def _collect_changes(session, flush_context):
+    recipes = [obj for obj in chain(session.new, session.deleted) if isinstance(obj, Recipe)]
+    recipes += [
+        obj for obj in session.dirty
+        if isinstance(obj, Recipe) and any(attributes.get_history(obj, key).has_changes() for key in ('name', 'description'))
+    ]
+    if recipes:
+        bump_table_versions(session, [TEXT_VERSION], flushed=True)
+        session.info.setdefault(PENDING_KEY, {'recipe_ids': set()})['recipe_ids'].update(obj.id for obj in recipes)
+
+
+@event.listens_for(db.session, 'after_flush_postexec')
+def _load_changes(session, flush_context):
+    pending = session.info.get(PENDING_KEY)
+    if pending is None or not has_app_context() or INDEX_KEY not in current_app.extensions:
+        return
+
+    pending['rows'] = _load_documents(pending['recipe_ids'])
+
+
+@event.listens_for(db.session, 'after_commit')
+def _apply_changes(session):
+    pending = session.info.pop(PENDING_KEY, None)
+    if pending is None or 'rows' not in pending or not has_app_context():
+        return
+
+    update_versioned(session, INDEX_KEY, TEXT_VERSION, lambda index: index.update(pending['recipe_ids'], pending['rows']))
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_changes(session):
+    session.info.pop(PENDING_KEY, None)
+
+
+def search_statement(query: str, backend: str):
+    """Select of recipes matching the query ordered by relevance, for the database backed indexes."""
+    tokens = tokenize(query)
+
+    if backend == 'sqlite':
+        expression = ' '.join(f'"{token}"*' for token in tokens)
+        return (
+            select(Recipe)
+            .join(recipes_fts, recipes_fts.c.rowid == Recipe.id)
+            .where(text('recipes_fts MATCH :query').bindparams(query=expression))
+            .order_by(recipes_fts.c.rank, Recipe.id)
+        )
+
+    relevance = match(Recipe.name, Recipe.description, against=' '.join(f'+{token}*' for token in tokens)).in_boolean_mode()
+    return select(Recipe).where(relevance > 0).order_by(relevance.desc(), Recipe.id)
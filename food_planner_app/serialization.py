@@ -0,0 +1,100 @@
+from decimal import Decimal
+from functools import lru_cache
+
+from flask.json.provider import DefaultJSONProvider
+from marshmallow import fields as ma_fields
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - the stdlib provider is used instead
+    orjson = None
+
+# fields whose database values are already what marshmallow would dump
+PASSTHROUGH_FIELDS = (ma_fields.String, ma_fields.Integer, ma_fields.Boolean)
+
+
+def to_float(value):
+    return None if value is None else float(value)
+
+
+def _decimal_to_str(places: Decimal):
+    def convert(value):
+        return None if value is None else str(Decimal(value).quantize(places))
+    return convert
+
+
+def _field_converter(field):
+    """Converter reproducing field.serialize() for a value, or None when the value can be used as is."""
+    if isinstance(field, ma_fields.Decimal) and not field.as_string and field.places is not None and field.rounding is None:
+        # what the JSON provider makes of the quantized Decimal marshmallow returns
+        return _decimal_to_str(field.places)
+    if type(field) in PASSTHROUGH_FIELDS:
+        return None
+    return lambda value: field._serialize(value, None, None)
+
+
+@lru_cache(maxsize=256)
+def compile_serializer(fields: tuple, converters: tuple = ()):
+    """
+    Compiles a `row -> dict` function reading `fields` as attributes of ORM entities or result rows.
+    `converters` holds (field, function) pairs applied to single values. The generated function is one
+    dict display, without per-row loops over field lists or schema lookups.
+    """
+    converters = dict(converters)
+    namespace = {}
+    items = []
+    for index, field in enumerate(fields):
+        value = f'row.{field}'
+        if field in converters:
+            namespace[f'_convert_{index}'] = converters[field]
+            value = f'_convert_{index}({value})'
+        items.append(f'{field!r}: {value}')
+
+    source = f"def serialize(row):\n    return {{{', '.join(items)}}}\n"
+    exec(compile(source, f'<serializer {",".join(fields)}>', 'exec'), namespace)
+    return namespace['serialize']
+
+
+@lru_cache(maxsize=256)
+def schema_serializer(schema_class, only: tuple = None):
+    """Compiled equivalent of schema_class(only=only).dump() for a single flat object."""
+    schema = schema_class(only=only)
+    names = tuple(name for name, field in schema.dump_fields.items() if field.attribute is None and field.data_key is None)
+    if len(names) != len(schema.dump_fields):
+        raise ValueError(f'{schema_class.__name__} renames fields and cannot be compiled')
+
+    converters = []
+    for name in names:
+        converter = _field_converter(schema.dump_fields[name])
+        if converter is not None:
+            converters.append((name, converter))
+    return compile_serializer(names, tuple(converters))
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider encoding with orjson, with the same output rules as the default provider."""
+
+    @property
+    def _options(self) -> int:
+        # datetimes are handed to default() so they keep the HTTP date format of the default provider
+        options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if self.sort_keys:
+            options |= orjson.OPT_SORT_KEYS
+        return options
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self._dump_bytes(obj).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def _dump_bytes(self, obj, indent: bool = False) -> bytes:
+        options = self._options
+        if indent:
+            options |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=options)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = self.compact is False or (self.compact is None and self._app.debug)
+        return self._app.response_class(self._dump_bytes(obj, indent) + b'\n', mimetype=self.mimetype)
@@ -1,15 +1,36 @@
+import base64
+import hashlib
+import json
+import math
+import operator
 import re
+from decimal import Decimal
 from functools import wraps
+from itertools import islice
+from typing import NamedTuple
 
 import jwt
-from flask import abort, current_app, request, url_for
+from flask import Response, abort, current_app, make_response, request, stream_with_context, url_for
+from sqlalchemy import and_, func, or_, select, text
 from sqlalchemy.orm.attributes import InstrumentedAttribute
-from sqlalchemy.sql.expression import BinaryExpression
+from sqlalchemy.sql.util import find_tables
 from werkzeug.exceptions import BadRequest, UnsupportedMediaType
 
 from food_planner_app import Config, db
+from food_planner_app.cache import get_app_cache
+from food_planner_app.versions import get_table_versions
 
 COMPARISON_OPERATORS_RE = re.compile(r'(.*)\[(eq|gte|gt|lte|lt|ne)\]')
+COUNT_MODES = {'exact', 'estimate', 'none'}
+NON_FILTER_PARAMS = {'fields', 'sort', 'page', 'limit', 'cursor', 'count'}
+FILTER_OPERATORS = {
+    'eq': operator.eq,
+    'gte': operator.ge,
+    'gt': operator.gt,
+    'lte': operator.le,
+    'lt': operator.lt,
+    'ne': operator.ne,
+}
 
 
 def validate_json_content_type(func):
@@ -27,6 +48,50 @@ def validate_json_content_type(func):
     return wrapper
 
 
+def conditional_get(*tables):
+    """
+    Tags GET responses with an ETag derived from the version counters of `tables` and the query string.
+    When If-None-Match matches, answers 304 right away without running the view.
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            versions = get_table_versions(*tables)
+            key = repr((request.path, sorted(request.args.items(multi=True)), versions))
+            etag = hashlib.sha1(key.encode()).hexdigest()
+
+            if request.if_none_match.contains_weak(etag):
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+
+            response = make_response(func(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
+
+
+def _decode_token(token: str) -> dict:
+    """
+    Verifies the token, remembering verified payloads until their expiry in a per-app LRU keyed
+    by the token digest, so repeated requests with the same token skip signature and claims checks.
+    """
+    secret_key = current_app.config.get('SECRET_KEY')
+    if not current_app.config.get('JWT_CACHE_ENABLED', True):
+        return jwt.decode(token, secret_key, algorithms=['HS256'])
+
+    cache = get_app_cache('token_cache', current_app.config.get('JWT_CACHE_SIZE', 10000))
+    key = hashlib.sha256(token.encode()).digest()
+    payload = cache.get(key)
+    if payload is None:
+        payload = jwt.decode(token, secret_key, algorithms=['HS256'])
+        if 'exp' in payload:
+            cache.set(key, payload, expires_at=payload['exp'])
+    return payload
+
+
 def token_required(func):
     @wraps(func)
     def wrapper (*args, **kwargs):
@@ -38,11 +103,7 @@ def token_required(func):
             abort(401, description='Missing or invalid Authorization header')
 
         try:
-            payload = jwt.decode(
-                token,
-                current_app.config.get('SECRET_KEY'),
-                algorithms=['HS256']
-                )
+            payload = _decode_token(token)
         except jwt.ExpiredSignatureError:
             abort(401, description='Expired token. Please login to get new token')
         except jwt.InvalidTokenError:
@@ -52,82 +113,372 @@ def token_required(func):
     return wrapper
 
 
+def get_field_selection(model, nested: dict = None) -> tuple:
+    """
+    Parses ?fields=... into selected column names of `model` and, for every relation in `nested`
+    (relation name -> allowed field names), the selected nested fields. `relation` alone selects all
+    of its fields and `relation.field` single ones. Returns (None, {}) when nothing valid was asked for.
+    """
+    nested = nested or {}
+    fields = []
+    nested_fields = {}
+    for field in request.args.get('fields', '').split(','):
+        relation, _, nested_field = field.partition('.')
+        if relation in nested:
+            selected = nested_fields.setdefault(relation, [])
+            for name in ([nested_field] if nested_field else nested[relation]):
+                if name in nested[relation] and name not in selected:
+                    selected.append(name)
+        elif field in model.__table__.columns and field not in fields:
+            fields.append(field)
+
+    if not fields and not nested_fields:
+        return None, {}
+    return tuple(fields), {relation: tuple(selected) for relation, selected in nested_fields.items()}
+
+
 def get_schema_args(model) -> dict:
     """
     Reads ?fields=... from URL and builds arguments for Marshmallow schema.
     Allows selecting only specific columns of a model.
     """
     schema_args = {'many': True}
-    fields = request.args.get('fields')
+    fields, _ = get_field_selection(model)
     if fields:
-        schema_args['only'] = [field for field in fields.split(',') if field in model.__table__.columns]
+        schema_args['only'] = fields
     return schema_args
 
 
+def apply_projection(model, query, fields):
+    """
+    Narrows the SELECT of `model` entities down to plain rows of the given columns. The primary key and
+    sort columns are always fetched, since pagination cursors and nested loads depend on them.
+    """
+    if not fields:
+        return query
+
+    columns = list(fields)
+    for column_attr, _ in get_query_plan(model).sort_columns:
+        if column_attr.key not in columns:
+            columns.append(column_attr.key)
+    if 'id' not in columns:
+        columns.append('id')
+    return query.with_only_columns(*[getattr(model, column) for column in columns])
+
+
+def _selects_entity(stmt) -> bool:
+    description = stmt.column_descriptions[0]
+    return len(stmt.column_descriptions) == 1 and description['expr'] is description['entity']
+
+
+def _fetch(stmt) -> list:
+    """ORM entities for entity statements, plain rows for column projections."""
+    result = db.session.execute(stmt).unique()
+    return result.scalars().all() if _selects_entity(stmt) else result.all()
+
+
+class QueryPlan(NamedTuple):
+    filters: tuple
+    sort_columns: tuple
+    order_by: tuple
+
+
+def _compile_query_plan(model, filter_params: tuple, sort_keys: str) -> QueryPlan:
+    """
+    Resolves filter parameter names and sort keys against the model's __filterable__ and __sortable__
+    allowlists. Anything else, relationships included, is ignored.
+    """
+    filters = []
+    for param in filter_params:
+        name, operator_name = param, 'eq'
+        match = COMPARISON_OPERATORS_RE.fullmatch(param)
+        if match is not None:
+            name, operator_name = match.groups()
+        if name in model.__filterable__:
+            filters.append((param, getattr(model, name), FILTER_OPERATORS[operator_name]))
+
+    sort_columns = []
+    for key in sort_keys.split(',') if sort_keys else ():
+        desc = key.startswith('-')
+        name = key[1:] if desc else key
+        if name in model.__sortable__:
+            sort_columns.append((getattr(model, name), desc))
+
+    order_by = tuple(column_attr.desc() if desc else column_attr for column_attr, desc in sort_columns)
+    return QueryPlan(tuple(filters), tuple(sort_columns), order_by)
+
+
+def get_query_plan(model) -> QueryPlan:
+    """
+    Returns the compiled filter and sort plan for the current request. Plans are cached per model and
+    normalized query shape (filter parameter names and sort keys, not values) in the query_plan_cache.
+    """
+    filter_params = tuple(sorted(param for param in request.args if param not in NON_FILTER_PARAMS))
+    key = (model.__name__, filter_params, request.args.get('sort', ''))
+
+    cache = get_app_cache('query_plan_cache', current_app.config.get('QUERY_PLAN_CACHE_SIZE', 256))
+    plan = cache.get(key)
+    if plan is None:
+        plan = _compile_query_plan(model, filter_params, key[2])
+        cache.set(key, plan)
+    return plan
+
+
 def apply_order(model, query):
-    sort_keys = request.args.get('sort')
-    if sort_keys:
-        for key in sort_keys.split(','):
-            desc = False
-            if key.startswith('-'):
-                key = key[1:]
-                desc = True
-            column_attr = getattr(model, key, None)
-            if column_attr is not None:
-                query = query.order_by(column_attr.desc()) if desc else query.order_by(column_attr)
+    order_by = get_query_plan(model).order_by
+    return query.order_by(*order_by) if order_by else query
+
+
+def apply_filter(model, query):
+    for param, column_attr, compare in get_query_plan(model).filters:
+        query = query.filter(compare(column_attr, request.args[param]))
     return query
 
 
-def _get_filter_argument(column_name: InstrumentedAttribute, value: str, operator: str) -> BinaryExpression: #funkcja prywatna
-    operator_mapping = {
-        'eq': column_name == value,
-        'gte': column_name >= value,
-        'gt': column_name > value,
-        'lte': column_name <= value,
-        'lt': column_name < value,
-        'ne': column_name != value
+def _encode_cursor(values: list) -> str:
+    raw = json.dumps(values, default=str, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def _decode_cursor(cursor: str) -> list:
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+    except ValueError:
+        abort(400, description='Invalid cursor')
+    if not isinstance(values, list):
+        abort(400, description='Invalid cursor')
+    return values
+
+
+def _coerce_cursor_value(column_attr: InstrumentedAttribute, value):
+    """Converts a decoded cursor value to the type of its sort column, a value which does not fit is a 400."""
+    if not isinstance(value, (str, int, float)):
+        abort(400, description='Invalid cursor')
+    try:
+        python_type = column_attr.type.python_type
+    except NotImplementedError:
+        return value
+    try:
+        value = python_type(value)
+    except (TypeError, ValueError, ArithmeticError):
+        abort(400, description='Invalid cursor')
+    if isinstance(value, (float, Decimal)) and not math.isfinite(value):
+        abort(400, description='Invalid cursor')
+    return value
+
+
+def _get_keyset_columns(model) -> list:
+    """Sort columns for cursor pagination, always ending with the primary key as a stable tiebreaker."""
+    keyset_columns = []
+    for column_attr, desc in get_query_plan(model).sort_columns:
+        column = model.__table__.columns.get(column_attr.key)
+        if column is None:
+            continue
+        if column.nullable:
+            abort(400, description=f'Cursor pagination cannot sort by nullable field {column_attr.key}')
+        keyset_columns.append((column_attr, desc))
+    if not any(column_attr.key == 'id' for column_attr, _ in keyset_columns):
+        keyset_columns.append((model.id, False))
+    return keyset_columns
+
+
+def _get_keyset_condition(keyset_columns: list, values: list):
+    """Builds (a > x) OR (a = x AND b > y) ... honouring the direction of each sort column."""
+    conditions = []
+    for index, (column_attr, desc) in enumerate(keyset_columns):
+        equal = [keyset_columns[i][0] == values[i] for i in range(index)]
+        step = column_attr < values[index] if desc else column_attr > values[index]
+        conditions.append(and_(*equal, step))
+    return or_(*conditions)
+
+
+def _get_keyset_pagination(stmt, func_name: str, per_page: int, params: dict):
+    """
+    Seeks past the row encoded in ?cursor=... instead of using OFFSET, so every page
+    costs the same as the first one. An empty cursor starts from the beginning.
+    """
+    cursor = request.args.get('cursor', '')
+    per_page = max(per_page, 1)
+    model = stmt.column_descriptions[0]['entity']
+    keyset_columns = _get_keyset_columns(model)
+
+    stmt = stmt.order_by(None).order_by(
+        *[column_attr.desc() if desc else column_attr for column_attr, desc in keyset_columns]
+    )
+    if cursor:
+        values = _decode_cursor(cursor)
+        if len(values) != len(keyset_columns):
+            abort(400, description='Invalid cursor')
+        values = [_coerce_cursor_value(column_attr, value) for (column_attr, _), value in zip(keyset_columns, values)]
+        stmt = stmt.where(_get_keyset_condition(keyset_columns, values))
+
+    items = _fetch(stmt.limit(per_page + 1))
+
+    pagination = {
+        'current_page': url_for(func_name, cursor=cursor, **params)
     }
-    return operator_mapping[operator]
 
+    if len(items) > per_page:
+        items = items[:per_page]
+        next_cursor = _encode_cursor([getattr(items[-1], column_attr.key) for column_attr, _ in keyset_columns])
+        pagination['next_cursor'] = next_cursor
+        pagination['next_page'] = url_for(func_name, cursor=next_cursor, **params)
 
-def apply_filter(model, query):
-    for param, value in request.args.items():
-        if param not in {'fields', 'sort', 'page', 'limit'}:
-            operator = 'eq'
-            match = COMPARISON_OPERATORS_RE.match(param)
-            if match is not None:
-                param, operator = match.groups()
-            column_attr = getattr(model, param, None)
-            if column_attr is not None:
-                filter_argument = _get_filter_argument(column_attr, value, operator)
-                query = query.filter(filter_argument)
-    return query
+    return items, pagination
+
+
+def _get_count_cache_key(func_name: str) -> tuple:
+    """Normalized filter set of the request: parameters which do not affect the count are dropped and the rest sorted."""
+    filters = sorted((key, value) for key, value in request.args.items(multi=True) if key not in NON_FILTER_PARAMS)
+    return func_name, tuple(filters)
+
+
+def _estimate_table_rows(table_name: str):
+    """Cheap row estimate from table statistics, without scanning the table."""
+    dialect = db.engine.dialect.name
+    if dialect == 'mysql':
+        stmt = text(
+            'SELECT TABLE_ROWS FROM information_schema.TABLES '
+            'WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = :name'
+        )
+        return db.session.execute(stmt, {'name': table_name}).scalar()
+    if dialect == 'sqlite':
+        # the largest rowid is a single b-tree seek and an upper bound of the row count
+        return db.session.execute(text(f'SELECT MAX(rowid) FROM "{table_name}"')).scalar() or 0
+    return None
+
+
+def _get_total_records(stmt, func_name: str, count_mode: str):
+    """
+    Returns (total, estimated) for the filtered statement according to ?count=...
+    Estimates are the last exact count of the same filters, or table statistics when the statement is unfiltered.
+    Exact counts are cached per normalized filter set and invalidated by the version counters of queried tables.
+    """
+    if count_mode == 'none':
+        return None, False
+
+    tables = sorted({table.name for table in find_tables(stmt)})
+    cache = get_app_cache('count_cache', current_app.config.get('COUNT_CACHE_SIZE', 1024))
+    key = _get_count_cache_key(func_name)
+    cached = cache.get(key)
+
+    if count_mode == 'estimate':
+        if cached is not None:
+            return cached[1], True
+        # table statistics only describe the unfiltered table, a filtered estimate is not worth a count
+        if stmt.whereclause is not None:
+            return None, False
+        model = stmt.column_descriptions[0]['entity']
+        estimate = _estimate_table_rows(model.__tablename__)
+        if estimate is not None:
+            return estimate, True
 
+    versions = get_table_versions(*tables)
+    if cached is not None and cached[0] == versions:
+        return cached[1], False
 
-def get_pagination(stmt, func_name: str):
-    page = request.args.get('page', 1, type=int)
+    total = db.session.execute(select(func.count()).select_from(stmt.order_by(None).subquery())).scalar()
+    cache.set(key, (versions, total))
+    return total, False
+
+
+def _get_page_args() -> tuple:
+    page = max(request.args.get('page', 1, type=int), 1)
     per_page = request.args.get('limit', current_app.config.get('PER_PAGE', 5), type=int)
+    if per_page < 1:
+        per_page = current_app.config.get('PER_PAGE', 5)
+    params = {key: value for key, value in request.args.items() if key not in {'page', 'limit', 'cursor'}}
+    return page, per_page, params
 
-    params = {key: value for key, value in request.args.items() if key not in {'page', 'limit'}}
 
-    pagination_obj = db.paginate(
-        stmt,
-        page=page,
-        per_page=per_page,
-        error_out=False
-    )
+def _get_page_links(func_name: str, page: int, params: dict, has_next: bool) -> dict:
+    links = {'current_page': url_for(func_name, page=page, **params)}
+
+    if has_next:
+        links['next_page'] = url_for(func_name, page=page + 1, **params)
+
+    if page > 1:
+        links['previous_page'] = url_for(func_name, page=page - 1, **params)
+
+    return links
+
+
+def get_pagination(stmt, func_name: str, keyset: bool = True):
+    """
+    Paginates `stmt` by ?page=..., or by ?cursor=... over the primary key and sort columns.
+    Pass keyset=False for statements whose order cannot be seeked on, e.g. relevance ranking, which then
+    ignore the cursor and paginate by page.
+    """
+    page, per_page, params = _get_page_args()
+
+    if keyset and 'cursor' in request.args:
+        return _get_keyset_pagination(stmt, func_name, per_page, params)
+
+    count_mode = request.args.get('count', 'exact')
+    if count_mode not in COUNT_MODES:
+        abort(400, description=f"Count must be one of: {', '.join(sorted(COUNT_MODES))}")
+
+    items = _fetch(stmt.limit(per_page + 1).offset((page - 1) * per_page))
+    has_next = len(items) > per_page
+    items = items[:per_page]
+
+    pagination = {}
+    total, estimated = _get_total_records(stmt, func_name, count_mode)
+    if total is not None:
+        pagination['total_pages'] = math.ceil(total / per_page)
+        pagination['total_records'] = total
+    if estimated:
+        pagination['estimated'] = True
+
+    pagination.update(_get_page_links(func_name, page, params, has_next))
+
+    return items, pagination
+
+
+def paginate_sequence(sequence, func_name: str):
+    """Paginates an already materialized sequence, e.g. ranked ids, with the same response shape as get_pagination."""
+    page, per_page, params = _get_page_args()
+    start = (page - 1) * per_page
+    items = sequence[start:start + per_page]
 
     pagination = {
-        'total_pages': pagination_obj.pages,
-        'total_records': pagination_obj.total,
-        'current_page': url_for(func_name, page=page, **params)
+        'total_pages': math.ceil(len(sequence) / per_page),
+        'total_records': len(sequence)
     }
+    pagination.update(_get_page_links(func_name, page, params, start + per_page < len(sequence)))
+
+    return items, pagination
+
+
+def stream_ndjson(stmt, serialize) -> Response:
+    """
+    Streams the results of `stmt` as NDJSON. Rows are fetched in keyset batches of EXPORT_BATCH_SIZE
+    (seeking past the last row of the previous batch on the sort columns and id) and `serialize` turns each
+    batch into dicts, so memory does not grow with the table. Every batch is read completely before
+    `serialize` runs, so it may query the same connection, which unbuffered MySQL cursors would not allow.
+    """
+    batch_size = max(current_app.config.get('EXPORT_BATCH_SIZE', 1000), 1)
+    keyset_columns = _get_keyset_columns(stmt.column_descriptions[0]['entity'])
+    stmt = stmt.order_by(None).order_by(
+        *[column_attr.desc() if desc else column_attr for column_attr, desc in keyset_columns]
+    ).limit(batch_size)
 
-    if pagination_obj.has_next:
-        pagination['next_page'] = url_for(func_name, page=page + 1, **params)
+    def generate():
+        batch_stmt = stmt
+        while True:
+            items = _fetch(batch_stmt)
+            for item in serialize(items):
+                yield current_app.json.dumps(item) + '\n'
+            if len(items) < batch_size:
+                return
+            values = [getattr(items[-1], column_attr.key) for column_attr, _ in keyset_columns]
+            batch_stmt = stmt.where(_get_keyset_condition(keyset_columns, values))
 
-    if pagination_obj.has_prev:
-        pagination['previous_page'] = url_for(func_name, page=page - 1, **params)
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
 
-    return pagination_obj.items, pagination
 
+def chunked(iterable, size: int):
+    """Yields lists of up to `size` consecutive items."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
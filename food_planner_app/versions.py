@@ -0,0 +1,137 @@
+import threading
+
+from flask import current_app
+from sqlalchemy import event, insert, select, update
+
+from food_planner_app import db
+from food_planner_app.models import TableVersion
+from food_planner_app.routing import primary_reads
+
+PENDING_KEY = 'pending_table_versions'
+COMMITTED_KEY = 'committed_table_versions'
+BUILD_LOCKS_KEY = 'versioned_build_locks'
+
+
+def bump_table_versions(session, tables, flushed: bool = False) -> None:
+    """
+    Marks the given tables as written by the session's current transaction.
+    Must be called by any code writing to tables without going through an ORM flush (bulk inserts, raw updates).
+    Flush listeners pass flushed=True, caches updated incrementally from flushed objects (see update_versioned)
+    rebuild instead when a table was also written around the ORM.
+
+    The counters are incremented once the transaction commits, in a short transaction of its own
+    (see commit_table_versions). Updating the table_versions rows inside the writing transaction would hold
+    their row locks until it ends and make every concurrent writer to the same table wait for it.
+    """
+    tables = set(tables) - {TableVersion.__tablename__}
+    if tables:
+        if PENDING_KEY not in session.info:
+            session.info.pop(COMMITTED_KEY, None)
+        pending = session.info.setdefault(PENDING_KEY, {})
+        for table in tables:
+            pending[table] = pending.get(table, False) or not flushed
+
+
+def commit_table_versions(session) -> dict:
+    """
+    Increments the counters of the tables written by the transaction the session just committed and returns
+    {table name: whether it was written without a flush}. Runs from after_commit, may be called again for
+    the same commit and returns the same tables.
+
+    Between the commit and the increment readers may still see the old version next to the new rows. Anything
+    they cache meanwhile is stored under the old version and is never served once the increment is visible.
+    """
+    tables = session.info.pop(PENDING_KEY, None)
+    if tables:
+        _increment(session.get_bind(TableVersion.__mapper__), sorted(tables))
+        session.info[COMMITTED_KEY] = tables
+    return session.info.get(COMMITTED_KEY, {})
+
+
+def _increment(engine, tables: list) -> None:
+    with engine.begin() as connection:
+        result = connection.execute(
+            update(TableVersion.__table__)
+            .where(TableVersion.name.in_(tables))
+            .values(version=TableVersion.version + 1)
+        )
+        if result.rowcount < len(tables):
+            existing = set(connection.execute(select(TableVersion.name).where(TableVersion.name.in_(tables))).scalars())
+            connection.execute(
+                insert(TableVersion.__table__),
+                [{'name': table, 'version': 1} for table in tables if table not in existing]
+            )
+
+
+def get_table_versions(*tables, bind=None) -> tuple:
+    """
+    Returns current versions of the given tables, in the order they were given.
+    Reads through db.session, or in a connection of its own from `bind` when given.
+    """
+    stmt = select(TableVersion.name, TableVersion.version).where(TableVersion.name.in_(tables))
+    if bind is None:
+        versions = dict(db.session.execute(stmt).all())
+    else:
+        with bind.connect() as connection:
+            versions = dict(connection.execute(stmt).all())
+    return tuple(versions.get(table, 0) for table in tables)
+
+
+def get_versioned(key: str, tables: tuple, build):
+    """
+    Returns the value app.extensions[key] holds as (versions of `tables`, value), calling build() again
+    when those versions have changed since. Versions and whatever build() reads come from the primary,
+    see primary_reads. Concurrent callers finding a stale value wait for a single build and share it.
+    """
+    with primary_reads(db.session):
+        versions = get_table_versions(*tables)
+        cached = current_app.extensions.get(key)
+        if cached is not None and cached[0] == versions:
+            return cached[1]
+
+        lock = current_app.extensions.setdefault(BUILD_LOCKS_KEY, {}).setdefault(key, threading.Lock())
+        with lock:
+            cached = current_app.extensions.get(key)
+            if cached is not None and cached[0] == versions:
+                return cached[1]
+            value = build()
+            current_app.extensions[key] = (versions, value)
+            return value
+
+
+def update_versioned(session, key: str, table: str, apply) -> None:
+    """
+    Called after the session committed writes to `table`. When app.extensions[key] was built by get_versioned
+    at the version right before this commit, calls apply(value) to bring it up to date and stores it under the
+    new version. Otherwise (writes around the ORM, a write of another worker in between) it is left to be
+    rebuilt on next use.
+    """
+    cached = current_app.extensions.get(key)
+    written = commit_table_versions(session)
+    if cached is None or table not in written or written[table]:
+        return
+
+    # the commit bumped the version exactly once, any other difference means the value missed a write
+    (version,) = get_table_versions(table, bind=session.get_bind(TableVersion.__mapper__))
+    versions, value = cached
+    if versions == (version - 1,):
+        apply(value)
+        current_app.extensions[key] = ((version,), value)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _bump_after_flush(session, flush_context):
+    tables = {obj.__table__.name for obj in session.new}
+    tables.update(obj.__table__.name for obj in session.deleted)
+    tables.update(obj.__table__.name for obj in session.dirty if session.is_modified(obj))
+    bump_table_versions(session, tables, flushed=True)
+
+
+@event.listens_for(db.session, 'after_commit')
+def _commit_versions(session):
+    commit_table_versions(session)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _discard_versions(session):
+    session.info.pop(PENDING_KEY, None)
@@ -0,0 +1,50 @@
+"""recipe calories
+
+Revision ID: 5b1f0c7e9a24
+Revises: 2e755c15187c
+Create Date: 2026-10-18 09:12:41.517203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5b1f0c7e9a24'
+down_revision = '2e755c15187c'
+branch_labels = None
+depends_on = None
+
+
+RECIPE_CALORIES = (
+    '(SELECT COALESCE(SUM(ri.amount * i.calories), 0) '
+    'FROM recipe_ingredients ri JOIN ingredients i ON i.id = ri.ingredient_id '
+    'WHERE ri.recipe_id = recipes.id)'
+)
+
+
+def upgrade():
+    # the baseline API accepted any servings, repair them before dividing and constraining
+    op.execute('UPDATE recipes SET servings = 1 WHERE servings < 1')
+
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_calories', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('calories_per_serving', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False))
+        batch_op.create_index(batch_op.f('ix_recipes_total_calories'), ['total_calories'], unique=False)
+        batch_op.create_index(batch_op.f('ix_recipes_calories_per_serving'), ['calories_per_serving'], unique=False)
+        batch_op.create_check_constraint('ck_recipes_servings_positive', 'servings >= 1')
+
+    # SQLite divides integers without a remainder
+    op.execute(
+        f'UPDATE recipes SET total_calories = {RECIPE_CALORIES}, '
+        f'calories_per_serving = CAST({RECIPE_CALORIES} AS REAL) / servings'
+    )
+
+
+def downgrade():
+    with op.batch_alter_table('recipes', schema=None) as batch_op:
+        batch_op.drop_constraint('ck_recipes_servings_positive', type_='check')
+        batch_op.drop_index(batch_op.f('ix_recipes_calories_per_serving'))
+        batch_op.drop_index(batch_op.f('ix_recipes_total_calories'))
+        batch_op.drop_column('calories_per_serving')
+        batch_op.drop_column('total_calories')
@@ -0,0 +1,32 @@
+"""table versions
+
+Revision ID: a3c94d0e6f12
+Revises: 5b1f0c7e9a24
+Create Date: 2026-10-18 10:02:17.884150
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a3c94d0e6f12'
+down_revision = '5b1f0c7e9a24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+    op.bulk_insert(table_versions, [
+        {'name': name, 'version': 1}
+        for name in ('ingredients', 'recipe_ingredients', 'recipes', 'recipes.text', 'users')
+    ])
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,54 @@
+"""recipe full text search
+
+Revision ID: d81e5a2b7c40
+Revises: a3c94d0e6f12
+Create Date: 2026-10-18 13:40:05.362981
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'd81e5a2b7c40'
+down_revision = 'a3c94d0e6f12'
+branch_labels = None
+depends_on = None
+
+
+SQLITE_UPGRADE = [
+    "CREATE VIRTUAL TABLE recipes_fts "
+    "USING fts5(name, description, content='recipes', content_rowid='id')",
+    "CREATE TRIGGER recipes_fts_insert AFTER INSERT ON recipes BEGIN "
+    "INSERT INTO recipes_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "CREATE TRIGGER recipes_fts_delete AFTER DELETE ON recipes BEGIN "
+    "INSERT INTO recipes_fts(recipes_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); END",
+    "CREATE TRIGGER recipes_fts_update AFTER UPDATE OF name, description ON recipes BEGIN "
+    "INSERT INTO recipes_fts(recipes_fts, rowid, name, description) VALUES ('delete', old.id, old.name, old.description); "
+    "INSERT INTO recipes_fts(rowid, name, description) VALUES (new.id, new.name, new.description); END",
+    "INSERT INTO recipes_fts(recipes_fts) VALUES ('rebuild')",
+]
+
+SQLITE_DOWNGRADE = [
+    "DROP TRIGGER recipes_fts_update",
+    "DROP TRIGGER recipes_fts_delete",
+    "DROP TRIGGER recipes_fts_insert",
+    "DROP TABLE recipes_fts",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_UPGRADE:
+            op.execute(statement)
+    elif dialect == 'mysql':
+        op.create_index('ix_recipes_fulltext', 'recipes', ['name', 'description'], mysql_prefix='FULLTEXT')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for statement in SQLITE_DOWNGRADE:
+            op.execute(statement)
+    elif dialect == 'mysql':
+        op.drop_index('ix_recipes_fulltext', table_name='recipes')
@@ -1,8 +1,8 @@
 from pathlib import Path
-import json
 
 from food_planner_app import create_app, db
-from food_planner_app.models import Ingredient, Recipe, RecipeIngredient
+from food_planner_app.commands.db_manage_commands import print_import_stats
+from food_planner_app.commands.importing import import_file
 
 
 BASE_DIR = Path(__file__).resolve().parent
@@ -12,70 +12,12 @@ app = create_app()
 print("DB URI:", app.config["SQLALCHEMY_DATABASE_URI"])
 
 with app.app_context():
+    for file_name in ("ingredients.json", "recipes.json"):
+        path = DATA_DIR / file_name
+        if not path.exists():
+            raise FileNotFoundError(f"Missing file: {path}")
 
-    # ---- INGREDIENTS ----
-    ingredients_path = DATA_DIR / "ingredients.json"
-    if not ingredients_path.exists():
-        raise FileNotFoundError(f"Missing file: {ingredients_path}")
-
-    with open(ingredients_path, encoding="utf-8") as f:
-        ingredients = json.load(f)
-
-    print("ING FILE PATH:", ingredients_path)
-    print("ING COUNT IN FILE:", len(ingredients))
-
-    for item in ingredients:
-        exists = Ingredient.query.filter_by(name=item["name"]).first()
-        if not exists:
-            db.session.add(
-                Ingredient(
-                    name=item["name"],
-                    calories=item["calories"],
-                    unit=item["unit"],
-                )
-            )
-
-    db.session.commit()
-    print("COUNT IN SESSION:", Ingredient.query.count())
-
-    # ---- RECIPES ----
-    recipes_path = DATA_DIR / "recipes.json"
-    if not recipes_path.exists():
-        raise FileNotFoundError(f"Missing file: {recipes_path}")
-
-    with open(recipes_path, encoding="utf-8") as f:
-        recipes = json.load(f)
-
-    print("RECIPES FILE PATH:", recipes_path)
-    print("RECIPES COUNT IN FILE:", len(recipes))
-
-    for item in recipes:
-        if Recipe.query.filter_by(name=item["name"]).first():
-            continue
-
-        recipe = Recipe(
-            name=item["name"],
-            description=item.get("description"),
-            servings=item.get("servings", 1),
-        )
-        db.session.add(recipe)
-        db.session.flush()
-
-        for ing in item.get("ingredients", []):
-            ingredient = Ingredient.query.filter_by(name=ing["name"]).first()
-            if not ingredient:
-                raise ValueError(f"Ingredient not found: {ing['name']}")
-
-            db.session.add(
-                RecipeIngredient(
-                    recipe_id=recipe.id,
-                    ingredient_id=ingredient.id,
-                    amount=ing["amount"],
-                )
-            )
-
-    db.session.commit()
-    print("Recipes seeded.")
-
-print("Ingredients seeded.")
+        print("FILE PATH:", path)
+        print_import_stats(import_file(db.session, path))
 
+print("Ingredients and recipes seeded.")
@@ -2,6 +2,7 @@ import pytest
 
 from config import TestingConfig
 from food_planner_app import create_app, db
+from food_planner_app.query_counter import QueryCounter
 
 
 @pytest.fixture
@@ -85,3 +86,13 @@ def auth_headers(token):
         "Authorization": f"Bearer {token}"
     }
 
+
+
+@pytest.fixture
+def queries(app):
+    """Records SQL statements executed by the app while the test runs, see QueryCounter."""
+    with app.app_context():
+        engine = db.engine
+
+    with QueryCounter(engine) as counter:
+        yield counter
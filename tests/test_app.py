@@ -1,8 +1,45 @@
+import threading
+import time
+
 from flask import Flask
 
+from food_planner_app import db
+from food_planner_app.models import Recipe
+from food_planner_app.versions import get_versioned
+
 
 def test_app(app):
     assert isinstance(app, Flask)
     assert app.config['TESTING'] is True
     assert app.config['DEBUG'] is True
 
+
+
+def test_versioned_value_is_built_once_by_concurrent_callers(app):
+    builds = []
+
+    def build():
+        builds.append(threading.get_ident())
+        time.sleep(0.05)
+        return object()
+
+    def worker(results):
+        with app.app_context():
+            results.append(get_versioned('test_value', (Recipe.__tablename__,), build))
+            db.session.remove()
+
+    results = []
+    threads = [threading.Thread(target=worker, args=(results,)) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(builds) == 1
+    assert len(set(map(id, results))) == 1
+
+    with app.app_context():
+        db.session.add(Recipe(name='Soup', servings=1))
+        db.session.commit()
+        assert get_versioned('test_value', (Recipe.__tablename__,), build) is not results[0]
+    assert len(builds) == 2
@@ -1,5 +1,13 @@
+import gc
+import time
+
+import jwt
 import pytest
 
+from config import TestingConfig
+from food_planner_app import create_app
+from food_planner_app.hashing import hash_password
+
 
 def test_registration(client):
     response = client.post('/api/v1/auth/register',
@@ -100,3 +108,88 @@ def test_get_current_user_missing_token(client):
     assert response_data['success'] is False
     assert 'data' not in response_data
 
+
+
+def test_token_cache(app, client, token):
+    headers = {'Authorization': f'Bearer {token}'}
+    client.get('/api/v1/auth/me', headers=headers)
+    client.get('/api/v1/auth/me', headers=headers)
+
+    stats = app.extensions['token_cache'].stats()
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+    assert stats['size'] == 1
+
+
+def test_token_cache_rejects_expired_token(app, client, user):
+    app.config['JWT_EXPIRED_MINUTES'] = 2 / 60
+    token = client.post('/api/v1/auth/login', json={
+        'username': user['username'],
+        'password': user['password']
+    }).get_json()['token']
+    headers = {'Authorization': f'Bearer {token}'}
+    assert client.get('/api/v1/auth/me', headers=headers).status_code == 200
+
+    expires_at = jwt.decode(token, options={'verify_signature': False})['exp']
+    time.sleep(max(expires_at - time.time(), 0) + 0.1)
+    response = client.get('/api/v1/auth/me', headers=headers)
+
+    assert response.status_code == 401
+    assert response.get_json()['message'] == 'Expired token. Please login to get new token'
+
+
+def test_token_cache_disabled(app, client, token):
+    app.config['JWT_CACHE_ENABLED'] = False
+    response = client.get('/api/v1/auth/me', headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 200
+    assert 'token_cache' not in app.extensions
+
+
+def test_login_upgrades_outdated_password_hash(app, client, user):
+    from food_planner_app.models import User
+
+    with app.app_context():
+        assert User.query.first().password.startswith('pbkdf2:sha256:1000$')
+
+    app.config['PASSWORD_HASH_METHOD'] = 'pbkdf2:sha256:2000'
+    response = client.post('/api/v1/auth/login', json={
+        'username': user['username'],
+        'password': user['password']
+    })
+    assert response.status_code == 200
+
+    with app.app_context():
+        assert User.query.first().password.startswith('pbkdf2:sha256:2000$')
+
+
+@pytest.mark.parametrize('workers', [0, 2])
+def test_login_hashing_pool(app, client, user, workers):
+    app.config['PASSWORD_HASH_WORKERS'] = workers
+    response = client.post('/api/v1/auth/login', json={
+        'username': user['username'],
+        'password': 'wrong-password'
+    })
+    assert response.status_code == 401
+
+    response = client.post('/api/v1/auth/login', json={
+        'username': user['username'],
+        'password': user['password']
+    })
+    assert response.status_code == 200
+
+
+def test_hashing_pool_belongs_to_the_app(app, client, user):
+    client.post('/api/v1/auth/login', json={'username': user['username'], 'password': user['password']})
+    executor = app.extensions['password_hash_executor']
+
+    other = create_app(TestingConfig)
+    with other.app_context():
+        assert hash_password('secret') != 'secret'
+        assert other.extensions['password_hash_executor'] is not executor
+
+    other_executor = other.extensions['password_hash_executor']
+    del other
+    gc.collect()
+    with pytest.raises(RuntimeError):
+        other_executor.submit(len, '')
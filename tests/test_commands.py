@@ -0,0 +1,174 @@
+import json
+
+import pytest
+
+from sqlalchemy import func, select
+
+from food_planner_app import db
+from food_planner_app.models import Ingredient, Recipe, RecipeIngredient
+
+
+def write_catalog(tmp_path):
+    ingredients = [
+        {"name": "flour", "calories": 364, "unit": "g"},
+        {"name": "milk", "calories": 42, "unit": "ml"},
+    ]
+    recipes = [
+        {
+            "name": f"Pancakes {i}",
+            "description": "Fluffy.",
+            "servings": 2,
+            "ingredients": [{"name": "flour", "amount": 100}, {"name": "milk", "amount": 200}]
+        }
+        for i in range(5)
+    ]
+    recipes.append({"name": "Mystery", "servings": 1, "ingredients": [{"name": "unicorn", "amount": 1}]})
+
+    ingredients_path = tmp_path / "ingredients.json"
+    ingredients_path.write_text(json.dumps(ingredients, indent=2))
+    recipes_path = tmp_path / "recipes.ndjson"
+    recipes_path.write_text("\n".join(json.dumps(recipe) for recipe in recipes))
+    return ingredients_path, recipes_path
+
+
+def test_import_command(app, client, tmp_path):
+    ingredients_path, recipes_path = write_catalog(tmp_path)
+    runner = app.test_cli_runner()
+
+    result = runner.invoke(args=["db-manage", "import", str(ingredients_path)])
+    assert "Ingredients: 2 inserted, 0 updated" in result.output
+    assert "rows/sec" in result.output
+
+    result = runner.invoke(args=["db-manage", "import", str(recipes_path), "--chunk-size", "2"])
+    assert "Recipes: 5 inserted, 0 updated, 1 skipped." in result.output
+
+    data = client.get("/api/v1/recipes").get_json()
+    assert data["pagination"]["total_records"] == 5
+    assert data["data"][0]["total_calories"] == 100 * 364 + 200 * 42
+    assert data["data"][0]["ingredients"][1]["name"] == "milk"
+
+
+def test_import_command_is_idempotent(app, client, tmp_path):
+    ingredients_path, recipes_path = write_catalog(tmp_path)
+    runner = app.test_cli_runner()
+
+    for _ in range(2):
+        runner.invoke(args=["db-manage", "import", str(ingredients_path)])
+        result = runner.invoke(args=["db-manage", "import", str(recipes_path)])
+
+    assert "Recipes: 0 inserted, 0 updated, 1 skipped." in result.output
+    data = client.get("/api/v1/recipes").get_json()
+    assert data["pagination"]["total_records"] == 5
+    assert len(data["data"][0]["ingredients"]) == 2
+
+    etag = client.get("/api/v1/recipes").headers["ETag"]
+    records = [json.loads(line) for line in recipes_path.read_text().splitlines()]
+    records[0]["servings"] = 4
+    records[1]["ingredients"][0]["amount"] = 150
+    records.append({"description": "No name", "ingredients": []})
+    recipes_path.write_text("\n".join(json.dumps(record) for record in records))
+    result = runner.invoke(args=["db-manage", "import", str(recipes_path)])
+    assert "Recipes: 0 inserted, 2 updated, 2 skipped." in result.output
+    assert client.get("/api/v1/recipes").headers["ETag"] != etag
+
+    etag = client.get("/api/v1/recipes").headers["ETag"]
+    result = runner.invoke(args=["db-manage", "import", str(recipes_path)])
+    assert "Recipes: 0 inserted, 0 updated, 2 skipped." in result.output
+    assert client.get("/api/v1/recipes", headers={"If-None-Match": etag}).status_code == 304
+
+    ingredients_path.write_text(json.dumps([{"name": "milk", "calories": 50, "unit": "ml"}]))
+    result = runner.invoke(args=["db-manage", "import", str(ingredients_path)])
+    assert "Ingredients: 0 inserted, 1 updated" in result.output
+
+    data = client.get("/api/v1/recipes/1").get_json()
+    assert data["data"]["total_calories"] == 100 * 364 + 200 * 50
+
+
+@pytest.mark.parametrize("recipe", [
+    {"name": "No servings", "servings": 0, "ingredients": [{"name": "milk", "amount": 100}]},
+    {"name": "No amount", "servings": 1, "ingredients": [{"name": "milk"}]},
+])
+def test_import_command_skips_invalid_recipes(app, client, tmp_path, recipe):
+    ingredients_path, recipes_path = write_catalog(tmp_path)
+    lines = recipes_path.read_text().splitlines()
+    lines.insert(2, json.dumps(recipe))
+    recipes_path.write_text("\n".join(lines))
+
+    runner = app.test_cli_runner()
+    runner.invoke(args=["db-manage", "import", str(ingredients_path)])
+    result = runner.invoke(args=["db-manage", "import", str(recipes_path), "--chunk-size", "3"])
+
+    assert result.exit_code == 0
+    assert f"Skipping recipe {recipe['name']}" in result.output
+    assert "Recipes: 5 inserted, 0 updated, 2 skipped." in result.output
+    assert client.get("/api/v1/recipes").get_json()["pagination"]["total_records"] == 5
+
+
+def test_import_command_skips_invalid_ingredients(app, client, tmp_path):
+    ingredients_path, recipes_path = write_catalog(tmp_path)
+    ingredients = json.loads(ingredients_path.read_text())
+    ingredients.insert(1, {"name": "sugar", "unit": "g"})
+    ingredients_path.write_text(json.dumps(ingredients))
+
+    result = app.test_cli_runner().invoke(args=["db-manage", "import", str(ingredients_path), "--chunk-size", "1"])
+
+    assert result.exit_code == 0
+    assert "Skipping ingredient sugar" in result.output
+    assert "Ingredients: 2 inserted, 0 updated, 1 skipped." in result.output
+    names = [ingredient["name"] for ingredient in client.get("/api/v1/ingredients").get_json()["data"]]
+    assert sorted(names) == ["flour", "milk"]
+
+
+def test_add_data_command(app, client):
+    result = app.test_cli_runner().invoke(args=["db-manage", "add-data"])
+
+    assert "Sample ingredients and recipes added successfully." in result.output
+    data = client.get("/api/v1/recipes").get_json()
+    assert data["pagination"]["total_records"] == 7
+
+
+def test_generate_command(app, client):
+    runner = app.test_cli_runner()
+    args = ["db-manage", "generate", "--ingredients", "80", "--recipes", "300", "--avg-ingredients", "4", "--seed", "7"]
+
+    result = runner.invoke(args=args + ["--batch-size", "128"])
+    assert "Generated 80 ingredients and 300 recipes" in result.output
+
+    with app.app_context():
+        names = db.session.execute(select(Recipe.name).order_by(Recipe.id)).scalars().all()
+        popularity = db.session.execute(
+            select(RecipeIngredient.ingredient_id, func.count())
+            .group_by(RecipeIngredient.ingredient_id)
+            .order_by(func.count().desc())
+        ).all()
+    assert len(set(names)) == 300
+    # zipf: the staple is used far more often than a typical ingredient
+    assert popularity[0][0] == 1
+    assert popularity[0][1] > 5 * popularity[len(popularity) // 2][1]
+
+    data = client.get("/api/v1/recipes/1").get_json()["data"]
+    assert data["total_calories"] > 0
+
+    # a second run with the same seed adds new, unique names
+    result = runner.invoke(args=args)
+    assert "Generated 80 ingredients and 300 recipes" in result.output
+    with app.app_context():
+        assert db.session.execute(select(func.count(func.distinct(Ingredient.name)))).scalar() == 160
+        assert db.session.execute(select(func.count(func.distinct(Recipe.name)))).scalar() == 600
+
+
+def test_remove_data_command_invalidates_cached_responses(app, client):
+    runner = app.test_cli_runner()
+    runner.invoke(args=["db-manage", "add-data"])
+    response = client.get("/api/v1/recipes")
+    etag = response.headers["ETag"]
+    assert response.get_json()["pagination"]["total_records"] == 7
+
+    result = runner.invoke(args=["db-manage", "remove-data"])
+    assert "successfully" in result.output
+
+    response = client.get("/api/v1/recipes", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["pagination"]["total_records"] == 0
+    response = client.get("/api/v1/recipes/by-ingredients?have=milk,egg")
+    assert response.get_json()["data"] == []
@@ -1,5 +1,12 @@
+import base64
+import json
+
 import pytest
 
+from food_planner_app import db
+from food_planner_app.models import Ingredient
+from food_planner_app.versions import get_table_versions
+
 
 def test_get_ingredients_no_records(client):
     response = client.get('/api/v1/ingredients')
@@ -250,3 +257,199 @@ def test_delete_ingredient_not_found(client, token):
     assert response.status_code == 404
     assert response_data["success"] is False
 
+
+
+def test_get_ingredients_cursor_pagination(client, sample_data):
+    response = client.get('/api/v1/ingredients?cursor=&limit=3')
+    response_data = response.get_json()
+    assert response.status_code == 200
+    assert [item['id'] for item in response_data['data']] == [1, 2, 3]
+    assert 'total_records' not in response_data['pagination']
+
+    names = []
+    url = '/api/v1/ingredients?cursor=&limit=3&sort=-calories'
+    while url:
+        response_data = client.get(url + '&limit=3').get_json()
+        names.extend(item['name'] for item in response_data['data'])
+        url = response_data['pagination'].get('next_page')
+
+    assert names == ['butter', 'sugar', 'flour', 'eggs', 'milk', 'water', 'salt']
+
+
+def test_get_ingredients_cursor_pagination_with_filter(client, sample_data):
+    response = client.get('/api/v1/ingredients?cursor=&limit=2&unit=g')
+    response_data = response.get_json()
+    assert [item['name'] for item in response_data['data']] == ['flour', 'eggs']
+
+    next_cursor = response_data['pagination']['next_cursor']
+    response = client.get(f'/api/v1/ingredients?cursor={next_cursor}&limit=2&unit=g')
+    response_data = response.get_json()
+    assert [item['name'] for item in response_data['data']] == ['salt', 'sugar']
+
+
+def test_get_ingredients_invalid_cursor(client, sample_data):
+    response = client.get('/api/v1/ingredients?cursor=not-a-cursor')
+    response_data = response.get_json()
+    assert response.status_code == 400
+    assert response_data['success'] is False
+
+
+@pytest.mark.parametrize('values', [
+    [{'id': 1}, 2],
+    [[1], 2],
+    [None, 2],
+    ['abc', 2],
+    ['NaN', 2],
+    [100, 'two'],
+])
+def test_get_ingredients_tampered_cursor(client, sample_data, values):
+    raw = base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip('=')
+    response = client.get(f'/api/v1/ingredients?sort=calories&cursor={raw}')
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Invalid cursor'
+
+
+def test_get_ingredients_count_modes(client, sample_data):
+    response = client.get('/api/v1/ingredients?count=none')
+    pagination = response.get_json()['pagination']
+    assert 'total_records' not in pagination
+    assert pagination['next_page'].startswith('/api/v1/ingredients?page=2')
+
+    response = client.get('/api/v1/ingredients?count=estimate')
+    pagination = response.get_json()['pagination']
+    assert pagination['total_records'] == 7
+    assert pagination['estimated'] is True
+
+    response = client.get('/api/v1/ingredients?count=estimate&unit=g')
+    pagination = response.get_json()['pagination']
+    assert 'total_records' not in pagination
+    assert 'estimated' not in pagination
+
+    client.get('/api/v1/ingredients?unit=g')
+    response = client.get('/api/v1/ingredients?count=estimate&unit=g')
+    pagination = response.get_json()['pagination']
+    assert pagination['total_records'] == 5
+    assert pagination['estimated'] is True
+
+    response = client.get('/api/v1/ingredients?count=all')
+    assert response.status_code == 400
+
+
+def test_get_ingredients_count_cache(app, client, token, sample_data):
+    client.get('/api/v1/ingredients?unit=g&page=1')
+    client.get('/api/v1/ingredients?page=2&unit=g&sort=-id')
+    cache = app.extensions['count_cache']
+    assert cache.stats()['hits'] == 1
+
+    client.post('/api/v1/ingredients',
+                json={'name': 'honey', 'calories': 304, 'unit': 'g'},
+                headers={'Authorization': f'Bearer {token}'})
+    response = client.get('/api/v1/ingredients?unit=g')
+    assert response.get_json()['pagination']['total_records'] == 6
+
+
+def test_export_ingredients(app, client, sample_data):
+    app.config['EXPORT_BATCH_SIZE'] = 2
+    response = client.get('/api/v1/ingredients/export?unit=g&fields=name,calories&sort=-calories')
+
+    assert response.status_code == 200
+    assert response.mimetype == 'application/x-ndjson'
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert lines == [
+        {'name': 'butter', 'calories': '717.00'},
+        {'name': 'sugar', 'calories': '387.00'},
+        {'name': 'flour', 'calories': '364.00'},
+        {'name': 'eggs', 'calories': '155.00'},
+        {'name': 'salt', 'calories': '0.00'},
+    ]
+
+
+def test_get_ingredients_etag(client, token, sample_data, queries):
+    response = client.get('/api/v1/ingredients?sort=-id')
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+
+    queries.clear()
+    response = client.get('/api/v1/ingredients?sort=-id', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.get_data() == b''
+    assert len(queries) == 1
+
+    response = client.get('/api/v1/ingredients?sort=id', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+
+    client.put('/api/v1/ingredients/1', json={'calories': 1}, headers={'Authorization': f'Bearer {token}'})
+    response = client.get('/api/v1/ingredients?sort=-id', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+
+
+def test_table_version_is_bumped_after_commit(app, sample_data, queries):
+    with app.app_context():
+        (version,) = get_table_versions(Ingredient.__tablename__)
+        queries.clear()
+
+        db.session.add(Ingredient(name='cocoa', calories=228, unit='g'))
+        db.session.flush()
+        db.session.get(Ingredient, 1).calories = 1
+        db.session.flush()
+        # the writing transaction never touches table_versions, so it holds no lock on its rows
+        assert not any('table_versions' in statement for statement in queries)
+
+        db.session.commit()
+        assert get_table_versions(Ingredient.__tablename__) == (version + 1,)
+
+        db.session.add(Ingredient(name='cinnamon', calories=247, unit='g'))
+        db.session.flush()
+        db.session.rollback()
+        assert get_table_versions(Ingredient.__tablename__) == (version + 1,)
+
+def test_get_ingredients_ignores_fields_outside_allowlist(client, sample_data, queries):
+    response = client.get("/api/v1/ingredients?recipes=1&sort=recipes,-calories")
+
+    assert response.status_code == 200
+    assert [ingredient["name"] for ingredient in response.get_json()["data"]][:2] == ["butter", "sugar"]
+    assert not any("recipe_ingredients" in statement for statement in queries)
+
+
+def test_get_ingredients_query_plan_cache(app, client, sample_data):
+    client.get("/api/v1/ingredients?calories[gte]=100&sort=-calories")
+    cache = app.extensions["query_plan_cache"]
+    hits = cache.hits
+
+    response = client.get("/api/v1/ingredients?sort=-calories&calories[gte]=300")
+
+    assert [ingredient["name"] for ingredient in response.get_json()["data"]] == ["butter", "sugar", "flour"]
+    assert cache.hits > hits
+    assert len(cache) == 1
+
+
+@pytest.mark.parametrize('only', [None, ('name', 'calories')])
+def test_compiled_serializer_matches_schema(app, sample_data, only):
+    from food_planner_app.models import Ingredient, IngredientSchema
+    from food_planner_app.serialization import schema_serializer
+
+    with app.app_context():
+        ingredients = Ingredient.query.all()
+        expected = json.loads(app.json.dumps(IngredientSchema(many=True, only=only).dump(ingredients)))
+        serialize = schema_serializer(IngredientSchema, only)
+
+        assert [serialize(ingredient) for ingredient in ingredients] == expected
+        assert schema_serializer(IngredientSchema, only) is serialize
+
+
+def test_orjson_provider_matches_default_provider(app):
+    from datetime import datetime, timezone
+    from decimal import Decimal
+
+    from flask.json.provider import DefaultJSONProvider
+    from food_planner_app.serialization import OrjsonProvider
+
+    assert isinstance(app.json, OrjsonProvider)
+    payload = {'b': Decimal('1.50'), 'a': datetime(2024, 1, 2, 3, 4, 5, tzinfo=timezone.utc), 'c': [1, 'x', None]}
+
+    assert json.loads(app.json.dumps(payload)) == json.loads(DefaultJSONProvider(app).dumps(payload))
+    assert app.json.loads(app.json.dumps(payload))['a'] == 'Tue, 02 Jan 2024 03:04:05 GMT'
@@ -0,0 +1,100 @@
+import re
+import threading
+
+from sqlalchemy import select
+
+from food_planner_app import db
+from food_planner_app.metrics import Metrics
+from food_planner_app.models import Ingredient
+
+
+def scrape(client) -> dict:
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.content_type.startswith("text/plain; version=0.0.4")
+
+    samples = {}
+    for line in response.get_data(as_text=True).splitlines():
+        if not line.startswith("#"):
+            name, value = line.rsplit(" ", 1)
+            samples[name] = float(value)
+    return samples
+
+
+def test_metrics_count_requests_by_endpoint_and_status(client, sample_data):
+    for _ in range(3):
+        client.get("/api/v1/ingredients")
+    client.get("/api/v1/ingredients/999")
+    client.get("/api/v1/missing")
+
+    samples = scrape(client)
+
+    assert samples['food_planner_http_requests_total{endpoint="ingredients.get_ingredients",method="GET",status="200"}'] == 3
+    assert samples['food_planner_http_requests_total{endpoint="ingredients.get_ingredient",method="GET",status="404"}'] == 1
+    assert samples['food_planner_http_requests_total{endpoint="unmatched",method="GET",status="404"}'] == 1
+    assert samples['food_planner_http_request_duration_seconds_count{endpoint="ingredients.get_ingredients"}'] == 3
+    assert samples['food_planner_http_request_duration_seconds_bucket{endpoint="ingredients.get_ingredients",le="+Inf"}'] == 3
+    # the scrape itself is the only request in flight
+    assert samples["food_planner_http_requests_in_flight"] == 1
+
+
+def test_metrics_export_cache_counters(client, sample_data):
+    client.get("/api/v1/ingredients")
+    client.get("/api/v1/ingredients")
+
+    samples = scrape(client)
+
+    assert samples['food_planner_cache_misses_total{cache="count_cache"}'] == 1
+    assert samples['food_planner_cache_hits_total{cache="count_cache"}'] == 1
+    assert samples['food_planner_cache_entries{cache="count_cache"}'] == 1
+    assert 'food_planner_cache_hits_total{cache="query_plan_cache"}' in samples
+
+
+def test_metrics_histogram_buckets_are_cumulative(client, sample_data):
+    client.get("/api/v1/ingredients")
+    samples = scrape(client)
+
+    pattern = re.compile(r'food_planner_http_request_duration_seconds_bucket\{endpoint="ingredients.get_ingredients",le="(.+)"\}')
+    counts = [value for name, value in samples.items() if pattern.fullmatch(name)]
+    assert counts == sorted(counts)
+    assert counts[-1] == 1
+
+
+def test_metrics_record_sql_statements_per_request(app, client, sample_data, queries):
+    client.get("/api/v1/ingredients/1")
+    statements = len(queries)
+
+    samples = scrape(client)
+
+    assert statements > 0
+    assert samples['food_planner_sql_statements_per_request_sum{endpoint="ingredients.get_ingredient"}'] == statements
+    assert samples['food_planner_sql_duration_seconds_per_request_sum{endpoint="ingredients.get_ingredient"}'] > 0
+
+
+def test_metrics_ignore_sql_outside_requests(app, client, sample_data):
+    with app.app_context():
+        db.session.execute(select(Ingredient)).all()
+
+    samples = scrape(client)
+
+    assert not any(name.startswith("food_planner_sql_statements_per_request_count") for name in samples)
+
+
+def test_metrics_aggregation_is_thread_safe():
+    metrics = Metrics()
+
+    def worker():
+        for _ in range(1000):
+            metrics.started()
+            metrics.finished("recipes.get_recipes", "GET", 200, 0.002, 3, 0.001)
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    output = metrics.render()
+    assert 'food_planner_http_requests_total{endpoint="recipes.get_recipes",method="GET",status="200"} 8000' in output
+    assert 'food_planner_sql_statements_per_request_count{endpoint="recipes.get_recipes"} 8000' in output
+    assert "food_planner_http_requests_in_flight 0" in output
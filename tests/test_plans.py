@@ -0,0 +1,105 @@
+import pytest
+
+
+@pytest.fixture
+def plan_recipes(app, sample_data):
+    from food_planner_app import db
+    from food_planner_app.models import Ingredient, Recipe, RecipeIngredient
+
+    with app.app_context():
+        flour = Ingredient.query.filter_by(name="flour").first()
+        for i in range(1, 31):
+            recipe = Recipe(name=f"Recipe {i}", description="Test", servings=2)
+            recipe.ingredients.append(RecipeIngredient(ingredient=flour, amount=i))
+            db.session.add(recipe)
+        db.session.commit()
+
+
+def test_generate_plan(client, plan_recipes):
+    response = client.get("/api/v1/plans/generate?calories=6000&tolerance=600&days=3&meals=3")
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data["success"] is True
+    assert len(data["data"]) == 3
+
+    ids = []
+    for day in data["data"]:
+        assert len(day["recipes"]) == 3
+        assert day["within_tolerance"] is True
+        assert abs(day["calories"] - 6000) <= 600
+        ids.extend(recipe["id"] for recipe in day["recipes"])
+    assert len(ids) == len(set(ids))
+
+
+def test_generate_plan_seed_is_reproducible(client, plan_recipes):
+    url = "/api/v1/plans/generate?calories=6000&days=5&seed=7"
+    assert client.get(url).get_json()["data"] == client.get(url).get_json()["data"]
+
+
+def test_generate_plan_missing_calories(client):
+    response = client.get("/api/v1/plans/generate?days=3")
+    data = response.get_json()
+
+    assert response.status_code == 400
+    assert data["success"] is False
+    assert "calories" in data["message"]
+
+
+def test_generate_plan_matrix_rebuilt_on_change(app, client, auth_headers, plan_recipes):
+    client.get("/api/v1/plans/generate?calories=6000")
+    matrix = app.extensions["calorie_matrix"][1]
+
+    client.get("/api/v1/plans/generate?calories=6000")
+    assert app.extensions["calorie_matrix"][1] is matrix
+
+    client.put("/api/v1/recipes/1", json={"servings": 1}, headers=auth_headers)
+    client.get("/api/v1/plans/generate?calories=6000")
+    assert app.extensions["calorie_matrix"][1] is not matrix
+    assert app.extensions["calorie_matrix"][1].calories_per_serving[0] == 364
+
+
+def test_shopping_list(client, auth_headers, sample_data, queries):
+    for name, ingredients in [
+        ("Pancakes", [{"name": "flour", "amount": 100}, {"name": "milk", "amount": 200}]),
+        ("Omelette", [{"name": "eggs", "amount": 150}, {"name": "milk", "amount": 50}]),
+    ]:
+        client.post("/api/v1/recipes", json={
+            "name": name,
+            "instructions": "Cook.",
+            "servings": 2,
+            "ingredients": ingredients
+        }, headers=auth_headers)
+
+    queries.clear()
+    response = client.post("/api/v1/shopping-list", json=[
+        {"recipe_id": 1, "servings": 4},
+        {"recipe_id": 2, "servings": 1},
+        {"recipe_id": 1, "servings": 2},
+    ])
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data["success"] is True
+    assert data["data"] == [
+        {"name": "eggs", "unit": "g", "amount": 75.0, "calories": 75 * 155},
+        {"name": "flour", "unit": "g", "amount": 300.0, "calories": 300 * 364},
+        {"name": "milk", "unit": "ml", "amount": 625.0, "calories": 625 * 42},
+    ]
+    assert len(queries) == 2
+
+
+def test_shopping_list_unknown_recipe(client):
+    response = client.post("/api/v1/shopping-list", json=[{"recipe_id": 1000, "servings": 1}])
+
+    assert response.status_code == 404
+    assert response.get_json()["message"] == "Recipes not found: 1000"
+
+
+def test_shopping_list_invalid_data(client):
+    response = client.post("/api/v1/shopping-list", json=[{"recipe_id": 1}])
+    data = response.get_json()
+
+    assert response.status_code == 400
+    assert data["success"] is False
+    assert "servings" in data["message"]["0"]
@@ -0,0 +1,150 @@
+import pytest
+
+from food_planner_app import db
+from food_planner_app.models import Ingredient, Recipe, RecipeIngredient
+from food_planner_app.query_counter import QueryCounter
+
+# most queries a single request of each endpoint may execute, independent of the number of rows it returns
+QUERY_BUDGETS = {
+    'ingredients.get_ingredients': 4,
+    'ingredients.export_ingredients': 2,
+    'ingredients.get_ingredient': 2,
+    'ingredients.create_ingredient': 3,
+    'ingredients.update_ingredient': 6,
+    'ingredients.delete_ingredient': 7,
+    'recipes.get_recipes': 5,
+    'recipes.export_recipes': 3,
+    'recipes.search_recipes': 6,
+    'recipes.recipes_by_ingredients': 6,
+    'recipes.get_recipe': 3,
+    'recipes.random_recipes': 9,
+    'recipes.create_recipe': 7,
+    'recipes.create_recipes_bulk': 8,
+    'recipes.update_recipe': 6,
+    'recipes.delete_recipe': 7,
+    'plans.generate': 5,
+    'plans.shopping_list': 2,
+    'auth.register': 5,
+    'auth.login': 1,
+    'auth.get_current_user': 1,
+    'auth.update_user_password': 4,
+    'auth.update_user_data': 4,
+}
+
+
+def recipe_payload(name: str) -> dict:
+    return {
+        "name": name,
+        "instructions": "Mix.",
+        "servings": 2,
+        "ingredients": [{"name": "flour", "amount": 100}, {"name": "milk", "amount": 200}, {"name": "eggs", "amount": 50}],
+    }
+
+
+REQUESTS = {
+    'ingredients.get_ingredients': lambda headers: {'path': '/api/v1/ingredients', 'query_string': {'limit': 20}},
+    'ingredients.export_ingredients': lambda headers: {'path': '/api/v1/ingredients/export'},
+    'ingredients.get_ingredient': lambda headers: {'path': '/api/v1/ingredients/2'},
+    'ingredients.create_ingredient': lambda headers: {
+        'method': 'POST', 'path': '/api/v1/ingredients', 'headers': headers,
+        'json': {'name': 'cocoa', 'calories': 228, 'unit': 'g'},
+    },
+    'ingredients.update_ingredient': lambda headers: {
+        'method': 'PUT', 'path': '/api/v1/ingredients/2', 'headers': headers, 'json': {'calories': 50},
+    },
+    'ingredients.delete_ingredient': lambda headers: {
+        'method': 'DELETE', 'path': '/api/v1/ingredients/1', 'headers': headers,
+    },
+    'recipes.get_recipes': lambda headers: {'path': '/api/v1/recipes', 'query_string': {'limit': 20}},
+    'recipes.export_recipes': lambda headers: {'path': '/api/v1/recipes/export'},
+    'recipes.search_recipes': lambda headers: {'path': '/api/v1/recipes/search', 'query_string': {'q': 'recipe'}},
+    'recipes.recipes_by_ingredients': lambda headers: {
+        'path': '/api/v1/recipes/by-ingredients', 'query_string': {'have': 'flour,milk,eggs,salt,sugar'},
+    },
+    'recipes.get_recipe': lambda headers: {'path': '/api/v1/recipes/3'},
+    'recipes.random_recipes': lambda headers: {
+        'path': '/api/v1/recipes/random', 'query_string': {'days': 7, 'seed': 7},
+    },
+    'recipes.create_recipe': lambda headers: {
+        'method': 'POST', 'path': '/api/v1/recipes', 'headers': headers, 'json': recipe_payload('Pancakes'),
+    },
+    'recipes.create_recipes_bulk': lambda headers: {
+        'method': 'POST', 'path': '/api/v1/recipes/bulk', 'headers': headers,
+        'json': [recipe_payload(f'Pancakes {i}') for i in range(10)],
+    },
+    'recipes.update_recipe': lambda headers: {
+        'method': 'PUT', 'path': '/api/v1/recipes/3', 'headers': headers, 'json': {'servings': 4},
+    },
+    'recipes.delete_recipe': lambda headers: {'method': 'DELETE', 'path': '/api/v1/recipes/3', 'headers': headers},
+    'plans.generate': lambda headers: {'path': '/api/v1/plans/generate', 'query_string': {'calories': 2000, 'days': 3}},
+    'plans.shopping_list': lambda headers: {
+        'method': 'POST', 'path': '/api/v1/shopping-list',
+        'json': [{'recipe_id': recipe_id, 'servings': 2} for recipe_id in range(1, 11)],
+    },
+    'auth.register': lambda headers: {
+        'method': 'POST', 'path': '/api/v1/auth/register',
+        'json': {'username': 'other', 'password': '123456', 'email': 'other@gmail.com'},
+    },
+    'auth.login': lambda headers: {
+        'method': 'POST', 'path': '/api/v1/auth/login', 'json': {'username': 'test', 'password': '123456'},
+    },
+    'auth.get_current_user': lambda headers: {'path': '/api/v1/auth/me', 'headers': headers},
+    'auth.update_user_password': lambda headers: {
+        'method': 'PUT', 'path': '/api/v1/auth/update/password/', 'headers': headers,
+        'json': {'current_password': '123456', 'new_password': '654321'},
+    },
+    'auth.update_user_data': lambda headers: {
+        'method': 'PATCH', 'path': '/api/v1/auth/update/data/', 'headers': headers, 'json': {'email': 'new@gmail.com'},
+    },
+}
+
+
+@pytest.fixture
+def catalog(app, sample_data):
+    with app.app_context():
+        ingredients = Ingredient.query.all()
+        for i in range(12):
+            recipe = Recipe(name=f"Recipe {i}", description="Test recipe", servings=2)
+            recipe.ingredients = [RecipeIngredient(ingredient=ingredient, amount=10) for ingredient in ingredients]
+            db.session.add(recipe)
+        db.session.commit()
+
+
+def test_every_endpoint_has_a_query_budget(app):
+    endpoints = {rule.endpoint for rule in app.url_map.iter_rules() if rule.rule.startswith('/api/')}
+
+    assert endpoints == set(QUERY_BUDGETS)
+    assert endpoints == set(REQUESTS)
+
+
+@pytest.mark.parametrize('endpoint', sorted(QUERY_BUDGETS))
+def test_endpoint_query_budget(app, client, catalog, auth_headers, endpoint):
+    kwargs = REQUESTS[endpoint](auth_headers)
+    kwargs.setdefault('method', 'GET')
+    with app.app_context():
+        engine = db.engine
+
+    with QueryCounter(engine) as queries:
+        response = client.open(**kwargs)
+
+    assert response.status_code < 400
+    queries.assert_at_most(QUERY_BUDGETS[endpoint], endpoint)
+
+
+def test_query_budget_failure_lists_statements_and_call_sites(app, client, catalog):
+    with app.app_context():
+        engine = db.engine
+
+    with QueryCounter(engine) as queries:
+        with app.app_context():
+            for recipe in Recipe.query.limit(3).all():
+                [ri.ingredient.name for ri in recipe.ingredients]
+
+    with pytest.raises(AssertionError) as excinfo:
+        queries.assert_at_most(2, 'lazy loading')
+
+    message = str(excinfo.value)
+    assert message.startswith(f'lazy loading executed {len(queries)} queries, budget is 2:')
+    assert 'FROM recipe_ingredients' in message
+    assert 'at tests/test_query_budgets.py:' in message
+    assert 'Repeated statements (possible N+1):' in message
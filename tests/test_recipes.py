@@ -1,5 +1,14 @@
+import json
+import sqlite3
+import weakref
+
 import pytest
 
+from config import TestingConfig
+from food_planner_app import create_app, db
+from food_planner_app.models import Ingredient, Recipe, RecipeIngredient
+from food_planner_app.recipes.pantry import IngredientIndex
+
 
 def create_recipe(client, auth_headers, ingredient_model):
     payload = {
@@ -149,6 +158,31 @@ def test_update_recipe_success(client, auth_headers, ingredient_model):
     assert data["data"]["name"] == "Updated Pasta"
 
 
+@pytest.mark.parametrize("servings", [0, -2, "many"])
+def test_recipe_servings_must_be_positive(client, auth_headers, ingredient_model, servings):
+    recipe_id = create_recipe(client, auth_headers, ingredient_model).get_json()["data"]["id"]
+
+    response = client.put(f"/api/v1/recipes/{recipe_id}", json={"servings": servings}, headers=auth_headers)
+    assert response.status_code == 400
+    assert "servings" in response.get_json()["message"]
+    assert client.get(f"/api/v1/recipes/{recipe_id}").get_json()["data"]["servings"] == 1
+
+    payload = {"name": "Soup", "instructions": "Boil.", "servings": servings, "ingredients": []}
+    response = client.post("/api/v1/recipes", json=payload, headers=auth_headers)
+    assert response.status_code == 400
+    assert "servings" in response.get_json()["message"]
+
+
+def test_update_recipe_validates_servings_only(client, auth_headers, ingredient_model):
+    recipe_id = create_recipe(client, auth_headers, ingredient_model).get_json()["data"]["id"]
+
+    response = client.put(
+        f"/api/v1/recipes/{recipe_id}", json={"name": "X", "description": "", "servings": "3"}, headers=auth_headers
+    )
+    assert response.status_code == 200
+    assert response.get_json()["data"] == {"id": recipe_id, "name": "X", "description": "", "servings": 3}
+
+
 def test_update_recipe_missing_token(client, auth_headers, ingredient_model):
     response = create_recipe(client, auth_headers, ingredient_model)
     assert response.status_code == 201
@@ -232,3 +266,549 @@ def test_delete_recipe_not_found(client, auth_headers):
     assert data["success"] is False
     assert "data" not in data
 
+
+
+def test_recipe_calories_are_materialized(client, auth_headers, ingredient_model):
+    response = create_recipe(client, auth_headers, ingredient_model)
+    recipe_id = response.get_json()["data"]["id"]
+
+    response = client.get(f"/api/v1/recipes/{recipe_id}")
+    data = response.get_json()["data"]
+
+    assert data["total_calories"] == 200 * 42
+    assert data["calories_per_serving"] == 200 * 42
+
+
+def test_recipe_calories_follow_changes(client, auth_headers, ingredient_model):
+    response = create_recipe(client, auth_headers, ingredient_model)
+    recipe_id = response.get_json()["data"]["id"]
+
+    client.put(f"/api/v1/recipes/{recipe_id}", json={"servings": 4}, headers=auth_headers)
+    client.put(f"/api/v1/ingredients/{ingredient_model.id}", json={"calories": 50}, headers=auth_headers)
+
+    data = client.get(f"/api/v1/recipes/{recipe_id}").get_json()["data"]
+    assert data["total_calories"] == 200 * 50
+    assert data["calories_per_serving"] == 200 * 50 / 4
+
+
+def test_get_recipes_filter_and_sort_by_calories(client, auth_headers, ingredient_model):
+    create_recipe(client, auth_headers, ingredient_model)
+    client.post("/api/v1/recipes", json={
+        "name": "Light Soup",
+        "instructions": "Boil.",
+        "ingredients": [{"name": ingredient_model.name, "amount": 10}]
+    }, headers=auth_headers)
+
+    response = client.get("/api/v1/recipes?sort=calories_per_serving")
+    names = [recipe["name"] for recipe in response.get_json()["data"]]
+    assert names == ["Light Soup", "Pasta"]
+
+    response = client.get("/api/v1/recipes?calories_per_serving[lt]=1000")
+    names = [recipe["name"] for recipe in response.get_json()["data"]]
+    assert names == ["Light Soup"]
+
+
+def test_check_calories_command(app, client, auth_headers, ingredient_model):
+    from food_planner_app import db
+    from food_planner_app.models import Recipe
+
+    response = create_recipe(client, auth_headers, ingredient_model)
+    recipe_id = response.get_json()["data"]["id"]
+
+    with app.app_context():
+        db.session.execute(Recipe.__table__.update().values(total_calories=1))
+        db.session.commit()
+
+    runner = app.test_cli_runner()
+    result = runner.invoke(args=["db-manage", "check-calories"])
+    assert f"Recipe {recipe_id} (Pasta)" in result.output
+
+    result = runner.invoke(args=["db-manage", "check-calories", "--fix"])
+    assert "recomputed" in result.output
+
+    result = runner.invoke(args=["db-manage", "check-calories"])
+    assert "All recipe calories are consistent." in result.output
+
+
+@pytest.fixture
+def many_recipes(app, ingredient_model):
+    from food_planner_app import db
+    from food_planner_app.models import Recipe
+
+    with app.app_context():
+        db.session.add_all([Recipe(name=f"Recipe {i}", description="Test", servings=1) for i in range(20)])
+        db.session.commit()
+
+
+def test_random_recipes(client, many_recipes):
+    response = client.get("/api/v1/recipes/random?days=7")
+    data = response.get_json()
+
+    assert response.status_code == 200
+    assert data["success"] is True
+    assert data["days"] == 7
+    assert len(data["data"]) == 7
+    assert len({recipe["id"] for recipe in data["data"]}) == 7
+    assert set(data["data"][0]) == {"id", "name", "servings"}
+
+
+def test_random_recipes_seed_is_reproducible(client, many_recipes):
+    first = client.get("/api/v1/recipes/random?days=5&seed=42").get_json()["data"]
+    second = client.get("/api/v1/recipes/random?days=5&seed=42").get_json()["data"]
+
+    assert first == second
+
+
+def test_random_recipes_exclude(client, many_recipes):
+    exclude = ",".join(str(recipe_id) for recipe_id in range(1, 18))
+    response = client.get(f"/api/v1/recipes/random?days=7&exclude={exclude}")
+    ids = {recipe["id"] for recipe in response.get_json()["data"]}
+
+    assert ids == {18, 19, 20}
+
+
+def test_random_recipes_are_uniform_over_sparse_ids(app):
+    from collections import Counter
+
+    from food_planner_app.recipes.sampling import sample_recipe_ids
+
+    with app.app_context():
+        db.session.add_all([Recipe(name=f"Recipe {i}", servings=1) for i in range(200)])
+        db.session.commit()
+        db.session.execute(Recipe.__table__.delete().where(Recipe.id.between(2, 80)))
+        db.session.commit()
+
+        picks = Counter(recipe_id for seed in range(2000) for recipe_id in sample_recipe_ids(1, seed=seed))
+
+        # too sparse for random probes to hit, the rest comes from the cached id array
+        db.session.execute(Recipe.__table__.delete().where(Recipe.id.between(81, 199)))
+        db.session.commit()
+        assert sorted(sample_recipe_ids(3, seed=1)) == [1, 200]
+
+    # 121 recipes left, about 16.5 picks each
+    assert set(picks) <= {1, *range(81, 201)}
+    assert len(picks) > 110
+    assert max(picks.values()) < 40
+    assert picks[81] < 40
+
+
+def test_random_recipes_invalid_exclude(client):
+    response = client.get("/api/v1/recipes/random?exclude=abc")
+    data = response.get_json()
+
+    assert response.status_code == 400
+    assert data["success"] is False
+
+
+def test_get_recipes_cursor_pagination(client, many_recipes):
+    ids = []
+    url = "/api/v1/recipes?cursor="
+    while url:
+        data = client.get(url).get_json()
+        assert data["records_on_page"] <= 5
+        ids.extend(recipe["id"] for recipe in data["data"])
+        url = data["pagination"].get("next_page")
+
+    assert ids == list(range(1, 21))
+
+
+@pytest.fixture
+def recipes_with_ingredients(app, sample_data):
+    from food_planner_app import db
+    from food_planner_app.models import Ingredient, Recipe, RecipeIngredient
+
+    with app.app_context():
+        ingredients = Ingredient.query.all()
+        for i in range(25):
+            recipe = Recipe(name=f"Recipe {i}", description="Test", servings=2)
+            recipe.ingredients = [RecipeIngredient(ingredient=ingredient, amount=10) for ingredient in ingredients]
+            db.session.add(recipe)
+        db.session.commit()
+
+
+def test_get_recipes_query_count_does_not_depend_on_page_size(client, recipes_with_ingredients, queries):
+    client.get("/api/v1/recipes?limit=2")
+    small_page = len(queries)
+
+    queries.clear()
+    response = client.get("/api/v1/recipes?limit=20&sort=-id&servings=2")
+    data = response.get_json()
+
+    assert len(data["data"]) == 20
+    assert len(data["data"][0]["ingredients"]) == 7
+    assert len(queries) == small_page
+    assert len(queries) <= 5
+
+
+def test_get_recipe_query_count(client, recipes_with_ingredients, queries):
+    response = client.get("/api/v1/recipes/1")
+
+    assert len(response.get_json()["data"]["ingredients"]) == 7
+    assert len(queries) == 3
+
+
+def test_create_recipes_bulk(app, client, auth_headers, sample_data, queries):
+    payload = [
+        {
+            "name": f"Bulk {i}",
+            "instructions": "Mix.",
+            "servings": 2,
+            "ingredients": [{"name": "milk", "amount": 100}, {"name": "flour", "amount": 50}]
+        }
+        for i in range(12)
+    ]
+    payload.append({"name": "Broken", "instructions": "Mix.", "ingredients": [{"name": "unicorn", "amount": 1}]})
+    payload.append({"name": "Bulk 0", "instructions": "Mix.", "ingredients": []})
+    payload.append({"name": "No instructions", "ingredients": []})
+
+    app.config["BULK_BATCH_SIZE"] = 5
+    queries.clear()
+    response = client.post("/api/v1/recipes/bulk", json=payload, headers=auth_headers)
+    data = response.get_json()
+
+    assert response.status_code == 201
+    assert data["success"] is True
+    assert data["created"] == 12
+    assert data["failed"] == 3
+    assert all(result["success"] for result in data["data"][:12])
+    assert data["data"][12]["message"] == "Ingredient not found: unicorn"
+    assert data["data"][13]["message"] == "Recipe with this name already exists"
+    assert "instructions" in data["data"][14]["message"]
+    assert not any(statement.startswith("SELECT ingredients.id") for statement in queries)
+
+    recipe = client.get(f"/api/v1/recipes/{data['data'][0]['id']}").get_json()["data"]
+    assert recipe["name"] == "Bulk 0"
+    assert recipe["total_calories"] == 100 * 42 + 50 * 364
+    assert len(recipe["ingredients"]) == 2
+
+
+def test_create_recipes_bulk_reports_invalid_items(client, auth_headers, sample_data):
+    def item(**fields):
+        return {"name": "Valid", "instructions": "Mix.", "ingredients": [{"name": "milk", "amount": 100}], **fields}
+
+    payload = [
+        item(),
+        item(name=["Pasta"]),
+        item(name={"name": "Pasta"}),
+        item(name="x" * 51),
+        item(servings=0),
+        item(ingredients=[{"name": "milk", "amount": -1}]),
+        item(ingredients=[{"name": "milk", "amount": "lots"}]),
+        item(ingredients=[{"name": "milk", "amount": 1}, {"name": "milk", "amount": 2}]),
+        "Pasta",
+    ]
+    response = client.post("/api/v1/recipes/bulk", json=payload, headers=auth_headers)
+    results = response.get_json()["data"]
+
+    assert response.status_code == 201
+    assert response.get_json()["created"] == 1
+    assert results[0]["success"] is True
+    assert all(result["success"] is False for result in results[1:])
+    assert all("name" in results[index]["message"] for index in (1, 2, 3))
+    assert "servings" in results[4]["message"]
+    assert "amount" in results[5]["message"]["ingredients"]["0"]
+    assert "amount" in results[6]["message"]["ingredients"]["0"]
+    assert results[7]["message"] == {"ingredients": ["Duplicate ingredient: milk"]}
+    assert "_schema" in results[8]["message"]
+
+
+def test_create_recipes_bulk_all_invalid(client, auth_headers):
+    response = client.post("/api/v1/recipes/bulk", json=[{"name": "Pasta"}], headers=auth_headers)
+    data = response.get_json()
+
+    assert response.status_code == 400
+    assert data["success"] is False
+    assert data["created"] == 0
+
+
+def test_create_recipes_bulk_not_a_list(client, auth_headers):
+    response = client.post("/api/v1/recipes/bulk", json={"name": "Pasta"}, headers=auth_headers)
+
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_export_recipes(app, client, recipes_with_ingredients):
+    app.config["EXPORT_BATCH_SIZE"] = 10
+    response = client.get("/api/v1/recipes/export?sort=-id")
+
+    assert response.status_code == 200
+    assert response.mimetype == "application/x-ndjson"
+
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [recipe["id"] for recipe in lines] == list(range(25, 0, -1))
+    assert all(len(recipe["ingredients"]) == 7 for recipe in lines)
+
+
+def test_get_recipe_etag_follows_ingredient_changes(client, auth_headers, ingredient_model):
+    recipe_id = create_recipe(client, auth_headers, ingredient_model).get_json()["data"]["id"]
+
+    etag = client.get(f"/api/v1/recipes/{recipe_id}").headers["ETag"]
+    response = client.get(f"/api/v1/recipes/{recipe_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+    client.put(f"/api/v1/ingredients/{ingredient_model.id}", json={"unit": "g"}, headers=auth_headers)
+    response = client.get(f"/api/v1/recipes/{recipe_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.get_json()["data"]["ingredients"][0]["unit"] == "g"
+
+
+@pytest.fixture
+def searchable_recipes(app):
+    from food_planner_app import db
+    from food_planner_app.models import Recipe
+
+    with app.app_context():
+        db.session.add_all([
+            Recipe(name="Tomato soup", description="Creamy tomato soup with basil and tomato paste", servings=2),
+            Recipe(name="Pasta", description="Pasta with tomato sauce", servings=2),
+            Recipe(name="Pancakes", description="Sweet breakfast", servings=4),
+        ])
+        db.session.commit()
+
+
+@pytest.mark.parametrize("backend", ["auto", "memory"])
+def test_search_recipes(app, client, searchable_recipes, backend):
+    app.config["FULL_TEXT_SEARCH"] = backend
+
+    response = client.get("/api/v1/recipes/search?q=tomato")
+    data = response.get_json()
+    assert response.status_code == 200
+    assert [recipe["name"] for recipe in data["data"]] == ["Tomato soup", "Pasta"]
+
+    response = client.get("/api/v1/recipes/search?q=tomato sau")
+    assert [recipe["name"] for recipe in response.get_json()["data"]] == ["Pasta"]
+
+    response = client.get("/api/v1/recipes/search?q=pan&limit=1")
+    data = response.get_json()
+    assert [recipe["name"] for recipe in data["data"]] == ["Pancakes"]
+    assert "next_page" not in data["pagination"]
+
+
+@pytest.mark.parametrize("backend", ["auto", "memory"])
+def test_search_recipes_ignores_cursor(app, client, searchable_recipes, backend):
+    app.config["FULL_TEXT_SEARCH"] = backend
+
+    response = client.get("/api/v1/recipes/search?q=tomato&cursor=&limit=1")
+    data = response.get_json()
+    assert response.status_code == 200
+    assert [recipe["name"] for recipe in data["data"]] == ["Tomato soup"]
+    assert "next_cursor" not in data["pagination"]
+
+    data = client.get(data["pagination"]["next_page"] + "&limit=1").get_json()
+    assert [recipe["name"] for recipe in data["data"]] == ["Pasta"]
+
+
+@pytest.mark.parametrize("backend", ["auto", "memory"])
+def test_search_recipes_follows_changes(app, client, auth_headers, searchable_recipes, backend):
+    app.config["FULL_TEXT_SEARCH"] = backend
+    assert client.get("/api/v1/recipes/search?q=waffles").get_json()["data"] == []
+
+    client.put("/api/v1/recipes/3", json={"name": "Waffles"}, headers=auth_headers)
+    response = client.get("/api/v1/recipes/search?q=waffles")
+    assert [recipe["id"] for recipe in response.get_json()["data"]] == [3]
+
+    client.delete("/api/v1/recipes/3", headers=auth_headers)
+    assert client.get("/api/v1/recipes/search?q=waffles").get_json()["data"] == []
+
+
+@pytest.mark.parametrize("query", ["tomato", "tom", "tom sau", "pasta tom", "soup bas", "sweet break", "pa", "basil pasta"])
+def test_search_backends_agree(app, client, searchable_recipes, query):
+    results = {}
+    for backend in ("sqlite", "memory"):
+        app.config["FULL_TEXT_SEARCH"] = backend
+        response = client.get("/api/v1/recipes/search", query_string={"q": query})
+        results[backend] = sorted(recipe["id"] for recipe in response.get_json()["data"])
+
+    assert results["sqlite"] == results["memory"]
+
+
+def test_search_index_updates_in_place(app, client, auth_headers, searchable_recipes, ingredient_model):
+    app.config["FULL_TEXT_SEARCH"] = "memory"
+    client.get("/api/v1/recipes/search?q=tomato")
+    index = app.extensions["search_index"][1]
+
+    client.put("/api/v1/recipes/1", json={"servings": 3}, headers=auth_headers)
+    client.put(f"/api/v1/ingredients/{ingredient_model.id}", json={"calories": 1}, headers=auth_headers)
+    client.get("/api/v1/recipes/search?q=tomato")
+    assert app.extensions["search_index"][1] is index
+
+    client.put("/api/v1/recipes/1", json={"description": "Tomato soup with cream"}, headers=auth_headers)
+    client.delete("/api/v1/recipes/3", headers=auth_headers)
+    assert [recipe["id"] for recipe in client.get("/api/v1/recipes/search?q=cream").get_json()["data"]] == [1]
+    assert client.get("/api/v1/recipes/search?q=basil").get_json()["data"] == []
+    assert client.get("/api/v1/recipes/search?q=pancakes").get_json()["data"] == []
+    assert app.extensions["search_index"][1] is index
+    assert "basil" not in index.tokens
+
+
+def test_search_recipes_missing_query(client):
+    response = client.get("/api/v1/recipes/search?q=  ")
+
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def create_pantry_recipe(client, auth_headers, name, ingredients):
+    payload = {
+        "name": name,
+        "instructions": "Mix everything.",
+        "ingredients": [{"name": ingredient, "amount": 100} for ingredient in ingredients]
+    }
+    return client.post("/api/v1/recipes", json=payload, headers=auth_headers).get_json()["data"]["id"]
+
+
+def test_recipes_by_ingredients(client, auth_headers, sample_data):
+    pancakes = create_pantry_recipe(client, auth_headers, "Pancakes", ["milk", "flour", "eggs"])
+    omelette = create_pantry_recipe(client, auth_headers, "Omelette", ["eggs", "salt"])
+    cake = create_pantry_recipe(client, auth_headers, "Cake", ["flour", "eggs", "sugar", "butter"])
+    create_pantry_recipe(client, auth_headers, "Brine", ["water", "salt"])
+
+    response = client.get("/api/v1/recipes/by-ingredients?have=Eggs,milk,flour")
+    data = response.get_json()
+    assert response.status_code == 200
+    assert [(recipe["id"], recipe["missing"]) for recipe in data["data"]] == [(pancakes, 0), (omelette, 1), (cake, 2)]
+    assert data["pagination"]["total_records"] == 3
+
+    response = client.get("/api/v1/recipes/by-ingredients?have=eggs,milk,flour&missing=0")
+    assert [recipe["id"] for recipe in response.get_json()["data"]] == [pancakes]
+
+
+def test_recipes_by_ingredients_index_is_updated_incrementally(app, client, auth_headers, sample_data):
+    create_pantry_recipe(client, auth_headers, "Pancakes", ["milk", "flour", "eggs"])
+    client.get("/api/v1/recipes/by-ingredients?have=eggs")
+    index = app.extensions["ingredient_index"][1]
+
+    omelette = create_pantry_recipe(client, auth_headers, "Omelette", ["eggs", "salt"])
+    response = client.get("/api/v1/recipes/by-ingredients?have=eggs,salt&missing=0")
+    assert [recipe["id"] for recipe in response.get_json()["data"]] == [omelette]
+
+    client.delete(f"/api/v1/recipes/{omelette}", headers=auth_headers)
+    response = client.get("/api/v1/recipes/by-ingredients?have=eggs,salt&missing=0")
+    assert response.get_json()["data"] == []
+
+    assert app.extensions["ingredient_index"][1] is index
+    assert omelette not in index.masks
+
+
+def test_recipes_by_ingredients_rebuilds_after_bulk_insert(app, client, auth_headers, sample_data):
+    client.get("/api/v1/recipes/by-ingredients?have=eggs")
+    index = app.extensions["ingredient_index"][1]
+
+    payload = [{"name": "Omelette", "instructions": "Fry.", "ingredients": [{"name": "eggs", "amount": 100}]}]
+    client.post("/api/v1/recipes/bulk", json=payload, headers=auth_headers)
+
+    response = client.get("/api/v1/recipes/by-ingredients?have=eggs&missing=0")
+    assert [recipe["name"] for recipe in response.get_json()["data"]] == ["Omelette"]
+    assert app.extensions["ingredient_index"][1] is not index
+
+
+def test_ingredient_index_uses_dense_positions_by_popularity():
+    rows = [(1, 90001), (1, 5), (2, 5), (2, 70000), (3, 5), (3, 90001)]
+    index = IngredientIndex(rows)
+
+    assert index.positions == {5: 0, 90001: 1, 70000: 2}
+    assert max(mask.bit_length() for mask in index.masks.values()) == 3
+    assert index.postings[90001] == {1, 3}
+
+    assert index.search([5, 90001]) == [(1, 0), (3, 0)]
+    assert index.search([70000], max_missing=1) == [(2, 1)]
+    # recipes sharing no ingredient with the pantry are never candidates
+    assert index.search([12345], max_missing=5) == []
+
+    index.update([1], [(1, 12345)])
+    assert index.postings[90001] == {3}
+    assert index.search([12345]) == [(1, 0)]
+
+
+def test_recipes_by_ingredients_missing_have(client):
+    response = client.get("/api/v1/recipes/by-ingredients?have=,")
+
+    assert response.status_code == 400
+    assert response.get_json()["success"] is False
+
+
+def test_get_recipes_fields_projection(client, recipes_with_ingredients, queries):
+    response = client.get("/api/v1/recipes?fields=name&sort=-id&limit=2")
+    data = response.get_json()["data"]
+
+    assert data == [{"name": "Recipe 24"}, {"name": "Recipe 23"}]
+    assert not any("recipe_ingredients" in statement for statement in queries)
+    assert not any("recipes.description" in statement for statement in queries)
+
+
+def test_get_recipes_nested_fields(client, recipes_with_ingredients, queries):
+    response = client.get("/api/v1/recipes?fields=name,ingredients.amount&limit=1")
+    data = response.get_json()["data"]
+
+    assert data[0]["name"] == "Recipe 0"
+    assert data[0]["ingredients"] == [{"amount": 10.0}] * 7
+    assert not any("JOIN ingredients" in statement for statement in queries)
+
+    response = client.get("/api/v1/recipes?fields=id,ingredients&limit=1")
+    data = response.get_json()["data"]
+    assert set(data[0]) == {"id", "ingredients"}
+    assert set(data[0]["ingredients"][0]) == {"name", "amount", "unit", "calories"}
+
+
+def test_get_recipes_fields_with_cursor(client, recipes_with_ingredients):
+    response = client.get("/api/v1/recipes?fields=name&sort=-calories_per_serving,name&cursor=&limit=10")
+    data = response.get_json()
+
+    assert data["data"][0] == {"name": "Recipe 0"}
+    page = client.get(data["pagination"]["next_page"]).get_json()
+    assert page["data"][0] == {"name": "Recipe 18"}
+
+
+class UnbufferedCursor(sqlite3.Cursor):
+    closed = False
+
+    def execute(self, *args, **kwargs):
+        if any(cursor is not self and not cursor.closed for cursor in self.connection.cursors):
+            raise sqlite3.OperationalError("Commands out of sync, another cursor still has rows pending")
+        return super().execute(*args, **kwargs)
+
+    def close(self):
+        self.closed = True
+        super().close()
+
+
+class UnbufferedConnection(sqlite3.Connection):
+    """Rejects statements while another cursor is still open, like the unbuffered cursors of MySQL drivers."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.cursors = weakref.WeakSet()
+
+    def cursor(self, factory=UnbufferedCursor):
+        cursor = super().cursor(factory)
+        self.cursors.add(cursor)
+        return cursor
+
+
+def test_export_recipes_does_not_query_while_a_cursor_is_open(tmp_path):
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        SQLALCHEMY_ENGINE_OPTIONS = {"connect_args": {"factory": UnbufferedConnection}}
+        EXPORT_BATCH_SIZE = 3
+
+    app = create_app(Config)
+    with app.app_context():
+        db.create_all()
+        flour = Ingredient(name="flour", calories=364, unit="g")
+        for i in range(10):
+            recipe = Recipe(name=f"Recipe {i}", servings=2)
+            recipe.ingredients = [RecipeIngredient(ingredient=flour, amount=10 * (i + 1))]
+            db.session.add(recipe)
+        db.session.commit()
+
+    response = app.test_client().get("/api/v1/recipes/export?sort=-servings")
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+
+    assert response.status_code == 200
+    assert [recipe["id"] for recipe in lines] == list(range(1, 11))
+    assert [recipe["ingredients"][0]["amount"] for recipe in lines] == [10 * (i + 1) for i in range(10)]
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
@@ -0,0 +1,122 @@
+import shutil
+import sqlite3
+
+import pytest
+from sqlalchemy import select
+
+from config import TestingConfig
+from food_planner_app import create_app, db, routing, search
+from food_planner_app.models import Ingredient, RecipeIngredient
+from food_planner_app.recipes import pantry
+from food_planner_app.versions import get_table_versions
+
+
+@pytest.fixture
+def replica_app(tmp_path):
+    primary, replica = tmp_path / 'primary.db', tmp_path / 'replica.db'
+
+    class Config(TestingConfig):
+        SQLALCHEMY_DATABASE_URI = f'sqlite:///{primary}'
+        SQLALCHEMY_BINDS = {'replica': f'sqlite:///{replica}'}
+        REPLICA_BINDS = ('replica',)
+        REPLICA_LAG_TOLERANCE = 0
+
+    app = create_app(Config)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Ingredient(name='milk', calories=42, unit='ml'))
+        db.session.commit()
+        db.engine.dispose()
+
+    shutil.copy(primary, replica)
+    with sqlite3.connect(replica) as connection:
+        connection.execute("INSERT INTO ingredients (name, calories, unit) VALUES ('replica only', 1, 'g')")
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        for engine in db.engines.values():
+            engine.dispose()
+    # metadata per bind key is registered on the shared extension, other apps have no such bind
+    db.metadatas.pop('replica', None)
+
+
+def ingredient_names(client):
+    return [ingredient['name'] for ingredient in client.get('/api/v1/ingredients').get_json()['data']]
+
+
+def test_get_requests_read_from_replica(replica_app):
+    assert ingredient_names(replica_app.test_client()) == ['milk', 'replica only']
+
+    with replica_app.test_request_context(method='POST'):
+        assert db.session.execute(select(Ingredient.name)).scalars().all() == ['milk']
+
+
+def test_session_sticks_to_primary_after_write(replica_app):
+    with replica_app.test_request_context(method='GET'):
+        db.session.add(Ingredient(name='flour', calories=364, unit='g'))
+        db.session.flush()
+
+        assert db.session.execute(select(Ingredient.name).order_by(Ingredient.id)).scalars().all() == ['milk', 'flour']
+
+
+@pytest.mark.parametrize('tolerance, expected', [
+    (0, ['milk', 'replica only']),
+    (60, ['milk', 'flour']),
+])
+def test_reads_after_write_honour_lag_tolerance(replica_app, tolerance, expected):
+    replica_app.config['REPLICA_LAG_TOLERANCE'] = tolerance
+    client = replica_app.test_client()
+    user = {'username': 'test', 'password': '123456', 'email': 'test@gmail.com'}
+    token = client.post('/api/v1/auth/register', json=user).get_json()['token']
+
+    response = client.post(
+        '/api/v1/ingredients',
+        json={'name': 'flour', 'calories': 364, 'unit': 'g'},
+        headers={'Authorization': f'Bearer {token}'}
+    )
+    assert response.status_code == 201
+
+    assert ingredient_names(client) == expected
+
+
+def test_process_caches_are_keyed_by_primary_versions(replica_app):
+    # the replica has not caught up with writes to recipe ingredients and recipe texts yet
+    primary = replica_app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    connection = sqlite3.connect(primary)
+    with connection:
+        connection.execute(
+            "INSERT INTO table_versions (name, version) VALUES ('recipe_ingredients', 5), (:text, 5)",
+            {'text': search.TEXT_VERSION}
+        )
+    connection.close()
+
+    with replica_app.test_request_context(method='GET'):
+        assert get_table_versions(RecipeIngredient.__tablename__) == (0,)
+        index = pantry.get_ingredient_index()
+        inverted_index = search.get_inverted_index()
+        assert replica_app.extensions['ingredient_index'][0] == (5,)
+
+    with replica_app.test_request_context(method='GET'):
+        assert pantry.get_ingredient_index() is index
+        assert search.get_inverted_index() is inverted_index
+
+
+def test_replica_is_chosen_once_per_request(replica_app, monkeypatch):
+    chosen = []
+
+    def choose(app):
+        chosen.append(app)
+        return 'replica'
+
+    monkeypatch.setattr(routing, 'replica_bind_key', choose)
+
+    for _ in range(2):
+        with replica_app.test_request_context(method='GET'):
+            get_table_versions(Ingredient.__tablename__)
+            db.session.execute(select(Ingredient.name)).all()
+            db.session.execute(select(Ingredient.id)).all()
+            db.session.remove()
+
+    assert len(chosen) == 2
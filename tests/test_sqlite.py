@@ -0,0 +1,83 @@
+import sqlite3
+import threading
+import time
+
+import pytest
+from sqlalchemy import text
+
+from config import SqliteConfig
+from food_planner_app import create_app, db
+from food_planner_app.models import Ingredient
+
+
+@pytest.fixture
+def sqlite_app(tmp_path):
+    class Config(SqliteConfig):
+        TESTING = True
+        SECRET_KEY = 'test-secret-key'
+        SQLALCHEMY_DATABASE_URI = f"sqlite:///{tmp_path / 'app.db'}"
+        SQLITE_PRAGMAS = {**SqliteConfig.SQLITE_PRAGMAS, 'busy_timeout': 2000}
+
+    app = create_app(Config)
+    with app.app_context():
+        db.create_all()
+        db.session.add(Ingredient(name='milk', calories=42, unit='ml'))
+        db.session.commit()
+
+    yield app
+
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
+
+
+def test_sqlite_pragmas_are_applied(sqlite_app):
+    with sqlite_app.app_context():
+        with db.engine.connect() as connection:
+            assert connection.execute(text('PRAGMA journal_mode')).scalar() == 'wal'
+            assert connection.execute(text('PRAGMA synchronous')).scalar() == 1
+            assert connection.execute(text('PRAGMA foreign_keys')).scalar() == 1
+            assert connection.execute(text('PRAGMA busy_timeout')).scalar() == 2000
+            assert connection.execute(text('PRAGMA cache_size')).scalar() == -64 * 1024
+
+
+def test_sqlite_reads_do_not_wait_for_writers(sqlite_app):
+    writer = sqlite3.connect(sqlite_app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///'))
+    writer.execute('BEGIN EXCLUSIVE')
+    writer.execute("INSERT INTO ingredients (name, calories, unit) VALUES ('flour', 364, 'g')")
+
+    try:
+        started = time.perf_counter()
+        response = sqlite_app.test_client().get('/api/v1/ingredients')
+        elapsed = time.perf_counter() - started
+    finally:
+        writer.rollback()
+        writer.close()
+
+    assert response.status_code == 200
+    assert [ingredient['name'] for ingredient in response.get_json()['data']] == ['milk']
+    assert elapsed < 1
+
+
+def test_sqlite_writers_wait_for_each_other(sqlite_app):
+    path = sqlite_app.config['SQLALCHEMY_DATABASE_URI'].removeprefix('sqlite:///')
+    writer = sqlite3.connect(path, check_same_thread=False)
+    writer.execute('BEGIN IMMEDIATE')
+    writer.execute("INSERT INTO ingredients (name, calories, unit) VALUES ('flour', 364, 'g')")
+
+    def commit_later():
+        time.sleep(0.3)
+        writer.commit()
+
+    thread = threading.Thread(target=commit_later)
+    thread.start()
+    try:
+        with sqlite_app.app_context():
+            db.session.add(Ingredient(name='eggs', calories=155, unit='g'))
+            db.session.commit()
+            names = db.session.execute(text('SELECT name FROM ingredients ORDER BY id')).scalars().all()
+    finally:
+        thread.join()
+        writer.close()
+
+    assert names == ['milk', 'flour', 'eggs']